@@ -0,0 +1,47 @@
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+
+from kitaptakip import create_app
+
+
+@contextmanager
+def temp_app(**config):
+    """Geçici bir SQLite dosyası üzerinde uygulama oluşturur."""
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = {
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tmp, 'bench.db'),
+            'AUTH_ENABLED': False,
+        }
+        settings.update(config)
+        yield create_app(settings)
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples):
+    """Saniye cinsinden örnekleri milisaniye özetine çevirir."""
+    return {
+        'count': len(samples),
+        'mean_ms': statistics.fmean(samples) * 1000 if samples else 0.0,
+        'p50_ms': percentile(samples, 50) * 1000,
+        'p95_ms': percentile(samples, 95) * 1000,
+        'p99_ms': percentile(samples, 99) * 1000,
+    }
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
@@ -0,0 +1,68 @@
+"""Token doğrulama maliyeti: ilk doğrulama, hatırlanan token ve uç nokta gecikmesi.
+
+    python -m bench.auth --tokens 10000 --requests 5000
+"""
+import argparse
+import json
+import random
+import time
+
+from kitaptakip.auth import KeySet, LocalIssuer, TokenVerifier
+
+from ._common import summarize, temp_app
+
+APP_ID = 'bench'
+KEYS = 'k2:bench-secret-2,k1:bench-secret-1'
+
+
+def verify_cost(args):
+    keys = KeySet(lambda: [('k2', 'bench-secret-2'), ('k1', 'bench-secret-1')])
+    keys.load()
+    issuer = LocalIssuer(keys)
+    tokens = [issuer.issue(APP_ID, f'u{i}') for i in range(args.tokens)]
+    verifier = TokenVerifier(keys, memo_size=args.tokens)
+
+    def measure():
+        samples = []
+        for token in tokens:
+            start = time.perf_counter()
+            verifier.verify(token)
+            samples.append(time.perf_counter() - start)
+        return summarize(samples)
+
+    return {'cold': measure(), 'memoized': measure(), 'memo': verifier.memo.stats()}
+
+
+def endpoint_latency(enabled, args):
+    with temp_app(AUTH_ENABLED=enabled, AUTH_KEYS=KEYS) as app:
+        client = app.test_client()
+        headers = {}
+        if enabled:
+            issuer = app.extensions['auth_issuer']
+            headers = {u: {'Authorization': f'Bearer {issuer.issue(APP_ID, u)}'}
+                       for u in (f'u{i}' for i in range(args.users))}
+        rng = random.Random(7)
+        samples = []
+        for _ in range(args.requests):
+            user_id = f'u{rng.randrange(args.users)}'
+            start = time.perf_counter()
+            client.get(f'/apps/{APP_ID}/users/{user_id}/summary', headers=headers.get(user_id))
+            samples.append(time.perf_counter() - start)
+        return summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tokens', type=int, default=10000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+    print(json.dumps({
+        'verify': verify_cost(args),
+        'summary_auth_off': endpoint_latency(False, args),
+        'summary_auth_on': endpoint_latency(True, args),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""1.000 işlemi tek toplu istekle ve 1.000 ayrı istekle uygulamak.
+
+    python -m bench.batch --ops 1000
+"""
+import argparse
+import json
+import random
+
+from ._common import Timer, temp_app
+
+BASE = '/apps/bench/users/u1'
+
+
+def seed(client, count):
+    return [
+        client.post(f'{BASE}/books', json={'title': f'Kitap {i}', 'totalPages': 500}).get_json()['id']
+        for i in range(count)
+    ]
+
+
+def make_ops(count, book_ids, rng):
+    adds = count // 10
+    deletes = min(count // 10, len(book_ids) // 2)
+    ops = [{'op': 'add', 'title': f'Yeni {i}', 'totalPages': 300} for i in range(adds)]
+    targets = book_ids[deletes:]
+    ops += [{'op': 'increment', 'bookId': rng.choice(targets), 'pages': rng.randint(1, 20)}
+            for _ in range(count - adds - deletes)]
+    ops += [{'op': 'delete', 'bookId': book_id} for book_id in book_ids[:deletes]]
+    rng.shuffle(ops)
+    return ops
+
+
+def send_single(client, op):
+    if op['op'] == 'add':
+        return client.post(f'{BASE}/books', json={'title': op['title'], 'totalPages': op['totalPages']})
+    if op['op'] == 'increment':
+        return client.post(f"{BASE}/books/{op['bookId']}/pages", json={'pages': op['pages']})
+    return client.delete(f"{BASE}/books/{op['bookId']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--ops', type=int, default=1000)
+    parser.add_argument('--books', type=int, default=300)
+    args = parser.parse_args()
+
+    with temp_app() as app:
+        client = app.test_client()
+        ops = make_ops(args.ops, seed(client, args.books), random.Random(1))
+        with Timer() as batched:
+            response = client.post(f'{BASE}/books:batch', json={'ops': ops})
+        batch_failures = sum(r['status'] >= 400 for r in response.get_json()['results'])
+
+    with temp_app() as app:
+        client = app.test_client()
+        ops = make_ops(args.ops, seed(client, args.books), random.Random(1))
+        with Timer() as single:
+            single_failures = sum(send_single(client, op).status_code >= 400 for op in ops)
+
+    print(json.dumps({
+        'ops': args.ops,
+        'batch_seconds': batched.elapsed,
+        'batch_failures': batch_failures,
+        'single_seconds': single.elapsed,
+        'single_failures': single_failures,
+        'speedup': single.elapsed / batched.elapsed,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Worker başına değişiklik veri yolu: boştaki ve etkin abonelerle dağıtım gecikmesi.
+
+    python -m bench.changefeed --idle 10000 --active 1000 --rounds 5
+"""
+import argparse
+import json
+import threading
+import time
+import tracemalloc
+
+from kitaptakip import books, changes
+from kitaptakip.extensions import db
+
+from ._common import Timer, summarize, temp_app
+
+APP_ID = 'bench'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--idle', type=int, default=10_000)
+    parser.add_argument('--active', type=int, default=1_000)
+    parser.add_argument('--rounds', type=int, default=5, help='etkin kullanıcı başına yazma')
+    args = parser.parse_args()
+
+    with temp_app(CHANGE_POLL_INTERVAL=0.05, CHANGE_QUEUE_SIZE=args.rounds + 16) as app:
+        bus = app.extensions['change_bus']
+        with app.app_context():
+            book_ids = {}
+            for i in range(args.active):
+                book = books.add_book(APP_ID, f'active{i}', f'Kitap {i}', 10**6)
+                book_ids[f'active{i}'] = book.id
+            db.session.commit()
+
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        idle = [bus.subscribe(APP_ID, f'idle{i}') for i in range(args.idle)]
+        active = {user_id: bus.subscribe(APP_ID, user_id) for user_id in book_ids}
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        subscription_bytes = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+
+        written_at = {}
+        latencies = []
+        lock = threading.Lock()
+
+        def consume(subscription):
+            local = []
+            while len(local) < args.rounds:
+                change = subscription.get(timeout=10)
+                if change is None:
+                    break
+                local.append(time.perf_counter() - written_at[change['version']])
+            with lock:
+                latencies.extend(local)
+
+        consumers = [threading.Thread(target=consume, args=(s,)) for s in active.values()]
+        for thread in consumers:
+            thread.start()
+
+        with Timer() as writing, app.app_context():
+            for _ in range(args.rounds):
+                for user_id, book_id in book_ids.items():
+                    books.increment_pages(APP_ID, user_id, book_id, 1)
+                    written_at[changes.current_version(APP_ID, user_id)] = time.perf_counter()
+                    db.session.commit()
+        for thread in consumers:
+            thread.join()
+
+        for subscription in idle + list(active.values()):
+            bus.unsubscribe(subscription)
+
+    events = args.active * args.rounds
+    print(json.dumps({
+        'idle_subscribers': args.idle,
+        'active_subscribers': args.active,
+        'bytes_per_subscription': subscription_bytes / (args.idle + args.active),
+        'events_written': events,
+        'events_delivered': len(latencies),
+        'write_throughput_eps': events / writing.elapsed,
+        'delivery_latency': summarize(latencies),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""Kitap listesi ve değişiklik farkları için yanıt biçimleri: 10k kitapta gövde
+boyutu ve kodlama CPU'su (JSON satırları, sütunlu JSON, MessagePack; ham, gzip,
+br), uçtan uca liste çekimi ve ETag ile 304 yeniden doğrulaması.
+
+    python -m bench.encoding --books 10000 --rounds 20
+"""
+import argparse
+import gzip
+import json
+import os
+import tempfile
+import time
+
+import brotli
+import msgpack
+from sqlalchemy import insert
+
+from kitaptakip import create_app, encoding
+from kitaptakip.config import Config
+from kitaptakip.extensions import db
+from kitaptakip.models import Book, new_id, utcnow
+
+from ._common import summarize
+
+APP_ID = 'bench'
+USER_ID = 'u1'
+
+
+def seed(count):
+    now = utcnow()
+    rows = [
+        {'id': new_id(), 'app_id': APP_ID, 'user_id': USER_ID, 'title': f'Kitap {i}',
+         'total_pages': 100 + i % 800, 'pages_read': i % 100, 'last_page_read': i % 100,
+         'created_at': now}
+        for i in range(count)
+    ]
+    db.session.execute(insert(Book.__table__), rows)
+    db.session.commit()
+
+
+def _cpu(fn, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.process_time()
+        result = fn()
+        samples.append(time.process_time() - start)
+    return result, summarize(samples)
+
+
+def offline(found, rounds):
+    columns = encoding.book_columns(found)
+    variants = {
+        'json_rows': lambda: json.dumps({'books': found}, ensure_ascii=False, separators=(',', ':')).encode(),
+        'json_columns': lambda: json.dumps({'books': columns}, ensure_ascii=False, separators=(',', ':')).encode(),
+        'msgpack_rows': lambda: msgpack.packb({'books': found}, use_bin_type=True),
+        'msgpack_columns': lambda: msgpack.packb({'books': columns}, use_bin_type=True),
+    }
+    codings = {
+        'gzip': lambda body: gzip.compress(body, compresslevel=Config.COMPRESS_GZIP_LEVEL, mtime=0),
+        'br': lambda body: brotli.compress(body, quality=Config.COMPRESS_BROTLI_QUALITY),
+    }
+    result = {}
+    for name, encode in variants.items():
+        body, timing = _cpu(encode, rounds)
+        entry = {'bytes': len(body), 'encode_cpu': timing}
+        for coding, compress in codings.items():
+            packed, timing = _cpu(lambda: compress(body), rounds)
+            entry[coding] = {'bytes': len(packed), 'compress_cpu': timing}
+        result[name] = entry
+    return result
+
+
+def fetch_all(client, url, headers):
+    # limit=500 sayfalarla tüm liste; toplam aktarılan bayt ve süre
+    transferred = 0
+    cursor = None
+    start = time.perf_counter()
+    while True:
+        query = f'?limit=500&cursor={cursor}' if cursor else '?limit=500'
+        response = client.get(url + query, headers=headers)
+        transferred += len(response.data)
+        body = response.data
+        if response.headers.get('Content-Encoding') == 'br':
+            body = brotli.decompress(body)
+        elif response.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        payload = msgpack.unpackb(body) if response.mimetype == encoding.MSGPACK else json.loads(body)
+        cursor = payload['nextCursor']
+        if not cursor:
+            break
+    return {'bytes': transferred, 'seconds': time.perf_counter() - start}
+
+
+def revalidate(client, url, rounds):
+    first = client.get(url + '?limit=500')
+    etag = first.headers['ETag']
+    full, cached = [], []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        client.get(url + '?limit=500')
+        full.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        response = client.get(url + '?limit=500', headers={'If-None-Match': etag})
+        cached.append(time.perf_counter() - start)
+        assert response.status_code == 304
+    return {'full_200': summarize(full), 'not_modified_304': summarize(cached)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--books', type=int, default=10000)
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tmp, 'bench.db'),
+            'AUTH_ENABLED': False,
+            'METRICS_ENABLED': False,
+        })
+        with app.app_context():
+            seed(args.books)
+            found = [book.to_dict() for book in db.session.query(Book).all()]
+            result = {'books': args.books, 'offline': offline(found, args.rounds)}
+        client = app.test_client()
+        url = f'/apps/{APP_ID}/users/{USER_ID}/books'
+        formats = {
+            'json': {},
+            'json_gzip': {'Accept-Encoding': 'gzip'},
+            'columns_br': {'Accept': encoding.COLUMNS, 'Accept-Encoding': 'br, gzip'},
+            'msgpack_br': {'Accept': encoding.MSGPACK, 'Accept-Encoding': 'br, gzip'},
+        }
+        result['fetch_all'] = {name: fetch_all(client, url, headers) for name, headers in formats.items()}
+        result['revalidate'] = revalidate(client, url, args.rounds)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
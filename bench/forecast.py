@@ -0,0 +1,165 @@
+"""Önceden hesaplanmış ilerleme/tahmin alanları: "bu hafta bitireceklerim" ve
+"ayın en çok okuyanları" indeks taramasıyla, ham oturum taramasına karşı.
+Artırım UPDATE'inin tahmin sütunlarıyla ek maliyeti de ölçülür.
+
+    python -m bench.forecast --users 200 --books 200 --increments 20
+"""
+import argparse
+import json
+import random
+from datetime import timedelta
+
+from sqlalchemy import case, func, insert, select, text, update
+
+from kitaptakip import batch, books, stats
+from kitaptakip.extensions import db
+from kitaptakip.models import Book, MonthlyUserStats, ReadingSession, new_id, utcnow
+
+from ._common import Timer, summarize, temp_app
+
+APP_ID = 'bench'
+
+
+def seed(users, per_user, increments):
+    rng = random.Random(7)
+    now = utcnow()
+    for u in range(users):
+        user_id = f'u{u}'
+        rows = [
+            {'id': new_id(), 'app_id': APP_ID, 'user_id': user_id, 'title': f'Kitap {b}',
+             'total_pages': rng.randint(100, 900), 'pages_read': 0, 'last_page_read': 0,
+             'created_at': now}
+            for b in range(per_user)
+        ]
+        db.session.execute(insert(Book.__table__), rows)
+        # Kitapların bir kısmı okunur; artırımlar toplu istek yoluyla (tek UPDATE)
+        reading = rng.sample(rows, k=max(1, per_user // 5))
+        ops = [
+            {'op': 'increment', 'bookId': row['id'], 'pages': rng.randint(5, 40)}
+            for row in reading for _ in range(increments)
+        ]
+        batch.apply_batch(APP_ID, user_id, ops)
+        db.session.commit()
+
+
+def _timed(fn, rounds):
+    samples = []
+    for _ in range(rounds):
+        with Timer() as timer:
+            result = fn()
+        samples.append(timer.elapsed)
+    return result, summarize(samples)
+
+
+def raw_finishing(user_id, today, days):
+    # Aynı tahmin her seferinde bu ve geçen haftanın oturumlarından hesaplanır
+    week = today - timedelta(days=today.weekday())
+    this_week = func.sum(case((ReadingSession.created_at >= week, ReadingSession.pages), else_=0))
+    velocity = {
+        book_id: (current, total - current)
+        for book_id, current, total in db.session.execute(
+            select(ReadingSession.book_id, this_week, func.sum(ReadingSession.pages))
+            .where(ReadingSession.app_id == APP_ID, ReadingSession.user_id == user_id,
+                   ReadingSession.created_at >= week - timedelta(weeks=1))
+            .group_by(ReadingSession.book_id)
+        )
+    }
+    found = []
+    for book in db.session.scalars(select(Book).where(Book.app_id == APP_ID, Book.user_id == user_id)):
+        current, previous = velocity.get(book.id, (0, 0))
+        remaining = book.total_pages - book.pages_read
+        if current + previous and remaining > 0:
+            elapsed = today.weekday() + 1 + (7 if previous else 0)
+            eta = today + timedelta(days=-(-remaining * elapsed // (current + previous)))
+            if eta <= today + timedelta(days=days - 1):
+                found.append(book)
+    return found
+
+
+def raw_top_readers(month, limit):
+    total = func.sum(ReadingSession.pages)
+    return db.session.execute(
+        select(ReadingSession.user_id, total)
+        .where(ReadingSession.app_id == APP_ID, ReadingSession.created_at >= month)
+        .group_by(ReadingSession.user_id)
+        .order_by(total.desc(), ReadingSession.user_id.desc())
+        .limit(limit)
+    ).all()
+
+
+def plan(stmt):
+    compiled = stmt.compile(db.engine, compile_kwargs={'literal_binds': True})
+    rows = db.session.execute(text(f'EXPLAIN QUERY PLAN {compiled}')).all()
+    return [row[-1] for row in rows]
+
+
+def update_cost(book_ids, forecast):
+    values = books.increment_values(1)
+    if not forecast:
+        values = {key: values[key] for key in ('pages_read', 'last_page_read')}
+    samples = []
+    for book_id in book_ids:
+        with Timer() as timer:
+            db.session.execute(update(Book).where(Book.id == book_id).values(**values))
+            db.session.commit()
+        samples.append(timer.elapsed)
+    return summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--books', type=int, default=200)
+    parser.add_argument('--increments', type=int, default=20, help='Okunan kitap başına artırım')
+    parser.add_argument('--rounds', type=int, default=50)
+    args = parser.parse_args()
+    with temp_app(METRICS_ENABLED=False) as app, app.app_context():
+        with Timer() as timer:
+            seed(args.users, args.books, args.increments)
+        today = utcnow().date()
+        month = today.replace(day=1)
+        user_id = 'u0'
+        fast, fast_timing = _timed(
+            lambda: books.finishing_books(APP_ID, user_id, today, today + timedelta(days=6), 500), args.rounds
+        )
+        slow, slow_timing = _timed(lambda: raw_finishing(user_id, today, 7), args.rounds)
+        top, top_timing = _timed(lambda: stats.top_readers(APP_ID, month, 10), args.rounds)
+        raw_top, raw_top_timing = _timed(lambda: raw_top_readers(month, 10), args.rounds)
+        finishing_stmt = (
+            select(Book).where(Book.app_id == APP_ID, Book.user_id == user_id,
+                               Book.finish_day.between(today.toordinal(), today.toordinal() + 6))
+            .order_by(Book.finish_day, Book.id)
+        )
+        top_stmt = (
+            select(MonthlyUserStats.user_id, MonthlyUserStats.pages)
+            .where(MonthlyUserStats.app_id == APP_ID, MonthlyUserStats.month == month)
+            .order_by(MonthlyUserStats.pages.desc(), MonthlyUserStats.user_id.desc()).limit(10)
+        )
+        sample = db.session.scalars(select(Book.id).limit(2000)).all()
+        result = {
+            'books': args.users * args.books,
+            'sessions': db.session.scalar(select(func.count()).select_from(ReadingSession)),
+            'seed_seconds': timer.elapsed,
+            'finishing_this_week': {
+                'books': len(fast),
+                'same_as_raw': {book.id for book in fast} == {book.id for book in slow},
+                'indexed': fast_timing,
+                'raw_scan': slow_timing,
+                'plan': plan(finishing_stmt),
+            },
+            'top_readers': {
+                'same_as_raw': [tuple(row) for row in top] == [tuple(row) for row in raw_top],
+                'indexed': top_timing,
+                'raw_scan': raw_top_timing,
+                'plan': plan(top_stmt),
+            },
+            'increment_update': {
+                'pages_only': update_cost(sample[:1000], forecast=False),
+                'with_forecast': update_cost(sample[1000:], forecast=True),
+            },
+        }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
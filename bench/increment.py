@@ -0,0 +1,73 @@
+"""Aynı kitaba eşzamanlı sayfa artırımı: kayıp güncelleme var mı, verim ne?
+
+    python -m bench.increment --threads 16 --requests 200
+"""
+import argparse
+import json
+import threading
+import time
+
+from ._common import summarize, temp_app
+
+BOOKS = '/apps/bench/users/u1/books'
+
+
+def run(threads, requests, pages):
+    with temp_app() as app:
+        client = app.test_client()
+        book_id = client.post(BOOKS, json={'title': 'Bench', 'totalPages': 10**9}).get_json()['id']
+        url = f'{BOOKS}/{book_id}/pages'
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(threads)
+
+        def worker():
+            local_client = app.test_client()
+            local = []
+            barrier.wait()
+            for _ in range(requests):
+                start = time.perf_counter()
+                response = local_client.post(url, json={'pages': pages})
+                local.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+            with lock:
+                latencies.extend(local)
+
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        started = time.perf_counter()
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        final = client.get(f'{BOOKS}/{book_id}').get_json()
+        expected = threads * requests * pages
+        return {
+            'threads': threads,
+            'requests': threads * requests,
+            'errors': len(errors),
+            'expected_pages_read': expected,
+            'pages_read': final['pagesRead'],
+            'lost_updates': (expected - final['pagesRead']) // pages,
+            'throughput_rps': threads * requests / elapsed,
+            'latency': summarize(latencies),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200, help='iş parçacığı başına istek')
+    parser.add_argument('--pages', type=int, default=1)
+    args = parser.parse_args()
+    result = run(args.threads, args.requests, args.pages)
+    print(json.dumps(result, indent=2))
+    if result['lost_updates'] or result['errors']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
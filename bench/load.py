@@ -0,0 +1,302 @@
+"""Kitap takibi iş yükü için yerel gunicorn'a karşı yük testi.
+
+Sentetik uygulama/kullanıcı/kitap verisini handleAddBook'un yazdığı biçimde
+doldurur, gunicorn'u ayrı bir süreçte başlatır ve gösterge paneli listeleme,
+sayfa artırma, ekleme, silme ve değişiklik aboneliği karışımını çalıştırır.
+Senaryo başına verim, p50/p95/p99 gecikme ve istek başına SQL sorgu sayısı
+(Server-Timing başlığından) JSON olarak yazılır; --baseline ile kayıtlı
+sonuçla karşılaştırılır.
+
+    python -m bench.load --duration 30 --output results.json
+    python -m bench.load --baseline bench/baselines/sqlite.json
+    python -m bench.load --database-url postgresql+psycopg2://localhost/kitaptakip_bench
+
+Ağ erişimi gerekmez; Postgres yalnızca --database-url verilirse kullanılır.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from sqlalchemy import insert
+
+from kitaptakip import create_app
+from kitaptakip.auth import KeySet, LocalIssuer, parse_keys
+from kitaptakip.extensions import db
+from kitaptakip.models import Book, new_id, utcnow
+
+from ._common import summarize
+
+KEYS = 'load:load-test-secret'
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Gösterge paneli okuma ağırlıklı; abonelik seyrek ama uzun ömürlü
+MIX = {'dashboard': 55, 'increment': 30, 'add': 8, 'delete': 5, 'subscribe': 2}
+TITLE_WORDS = 'Kürk Mantolu Madonna İnce Memed Saatleri Ayarlama Enstitüsü Tutunamayanlar Çalıkuşu Sefiller'.split()
+_QUERIES = re.compile(r'db-queries;desc="(\d+)"')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def seed(database_url, tenants, users, books, rng):
+    """handleAddBook biçiminde kitaplar: pagesRead = lastPageRead = 0."""
+    app = create_app({'SQLALCHEMY_DATABASE_URI': database_url, 'AUTH_ENABLED': False,
+                      'METRICS_ENABLED': False})
+    library = {}
+    with app.app_context():
+        now = utcnow()
+        rows = []
+        for t in range(tenants):
+            for u in range(users):
+                owner = (f'app{t}', f'user{u}')
+                ids = library[owner] = []
+                for _ in range(max(1, int(rng.expovariate(1 / books)))):
+                    book_id = new_id()
+                    ids.append(book_id)
+                    rows.append({
+                        'id': book_id, 'app_id': owner[0], 'user_id': owner[1],
+                        'title': ' '.join(rng.sample(TITLE_WORDS, 3)),
+                        'total_pages': rng.randint(80, 900), 'pages_read': 0,
+                        'last_page_read': 0, 'created_at': now,
+                    })
+                    if len(rows) == 10_000:
+                        db.session.execute(insert(Book), rows)
+                        rows.clear()
+        if rows:
+            db.session.execute(insert(Book), rows)
+        db.session.commit()
+        db.engine.dispose()
+    return library
+
+
+def start_server(database_url, port, workers, worker_class, **environ):
+    env = dict(
+        os.environ,
+        DATABASE_URL=database_url,
+        AUTH_KEYS=KEYS,
+        METRICS_SERVER_TIMING='1',
+        # Kapanan abonelik bağlantısı en geç bir saniyede fark edilir
+        CHANGE_HEARTBEAT='1',
+        ACCESS_LOG='',
+        **environ,
+    )
+    command = [
+        sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}',
+        '--workers', str(workers), '--worker-class', worker_class, '--timeout', '60',
+        '--log-level', 'warning', 'wsgi:app',
+    ]
+    process = subprocess.Popen(command, cwd=ROOT, env=env)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('gunicorn başlatılamadı')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/_stats')
+            if connection.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('gunicorn zamanında hazır olmadı')
+
+
+class Driver:
+    def __init__(self, port, library, issuer, rng_seed):
+        self.port = port
+        self.library = library
+        self.owners = list(library)
+        self.tokens = {owner: issuer.issue(*owner) for owner in self.owners}
+        self.rng_seed = rng_seed
+        self.samples = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def _request(self, method, path, owner, body=None, stream=False):
+        connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+        headers = {'Authorization': f'Bearer {self.tokens[owner]}'}
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            # Abonelikte ilk olay (retry) gelince bağlantı kapatılır
+            data = response.read1(64) if stream else response.read()
+            match = _QUERIES.search(response.getheader('Server-Timing') or '')
+            return response.status, data, int(match.group(1)) if match else None
+        finally:
+            connection.close()
+
+    def _owner(self, rng):
+        # Az sayıda kullanıcı trafiğin çoğunu üretir
+        return self.owners[min(int(rng.paretovariate(1.2)) - 1, len(self.owners) - 1)]
+
+    def step(self, scenario, rng):
+        owner = self._owner(rng)
+        base = f'/apps/{owner[0]}/users/{owner[1]}'
+        ids = self.library[owner]
+        if scenario == 'dashboard':
+            return [self._request('GET', f'{base}/books?limit=100', owner),
+                    self._request('GET', f'{base}/summary', owner)]
+        if scenario == 'increment':
+            if not ids:
+                return None
+            return [self._request('POST', f'{base}/books/{rng.choice(ids)}/pages', owner,
+                                  {'pages': rng.randint(1, 40)})]
+        if scenario == 'add':
+            result = self._request('POST', f'{base}/books', owner,
+                                   {'title': ' '.join(rng.sample(TITLE_WORDS, 3)),
+                                    'totalPages': str(rng.randint(80, 900))})
+            if result[0] == 201:
+                with self._lock:
+                    ids.append(json.loads(result[1])['id'])
+            return [result]
+        if scenario == 'delete':
+            with self._lock:
+                if len(ids) < 2:
+                    return None
+                book_id = ids.pop(rng.randrange(len(ids)))
+            return [self._request('DELETE', f'{base}/books/{book_id}', owner)]
+        return [self._request('GET', f'{base}/changes', owner, stream=True)]
+
+    def worker(self, index, deadline):
+        rng = random.Random(self.rng_seed * 1000 + index)
+        scenarios, weights = zip(*MIX.items())
+        while time.monotonic() < deadline:
+            scenario = rng.choices(scenarios, weights)[0]
+            start = time.perf_counter()
+            try:
+                results = self.step(scenario, rng)
+            except OSError:
+                with self._lock:
+                    self.errors[scenario] += 1
+                continue
+            elapsed = time.perf_counter() - start
+            if results is None:
+                continue
+            with self._lock:
+                if any(status >= 400 for status, _, _ in results):
+                    self.errors[scenario] += 1
+                    continue
+                self.samples[scenario].append(elapsed)
+                counts = [queries for _, _, queries in results if queries is not None]
+                if counts:
+                    self.queries[scenario].append(sum(counts))
+
+    def run(self, concurrency, duration):
+        deadline = time.monotonic() + duration
+        threads = [threading.Thread(target=self.worker, args=(i, deadline))
+                   for i in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def report(self, duration):
+        scenarios = {}
+        for scenario in MIX:
+            samples = self.samples.get(scenario, [])
+            queries = self.queries.get(scenario, [])
+            result = summarize(samples)
+            result.update(
+                throughput_rps=len(samples) / duration,
+                errors=self.errors.get(scenario, 0),
+                db_queries_mean=sum(queries) / len(queries) if queries else None,
+            )
+            scenarios[scenario] = result
+        total = sum(len(samples) for samples in self.samples.values())
+        return {'throughput_rps': total / duration, 'scenarios': scenarios}
+
+
+def compare(results, baseline, tolerance):
+    """p99 artışı ya da verim düşüşü toleransı aşan senaryoları işaretler."""
+    comparison = {}
+    regressions = []
+    for scenario, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(scenario)
+        if not previous or not previous['count'] or not current['count']:
+            continue
+        p99 = current['p99_ms'] / previous['p99_ms'] - 1 if previous['p99_ms'] else 0.0
+        throughput = (current['throughput_rps'] / previous['throughput_rps'] - 1
+                      if previous['throughput_rps'] else 0.0)
+        comparison[scenario] = {'p99_change_pct': p99 * 100, 'throughput_change_pct': throughput * 100}
+        if p99 > tolerance or throughput < -tolerance:
+            regressions.append(scenario)
+    return comparison, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', help='Varsayılan: geçici SQLite dosyası')
+    parser.add_argument('--tenants', type=int, default=3)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--books', type=int, default=40, help='Kullanıcı başına ortalama kitap')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--worker-class', default='sync')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--warmup', type=float, default=3)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Sonuç JSON dosyası')
+    parser.add_argument('--baseline', help='Karşılaştırılacak kayıtlı sonuç')
+    parser.add_argument('--tolerance', type=float, default=0.15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or 'sqlite:///' + os.path.join(tmp, 'load.db')
+        rng = random.Random(args.seed)
+        library = seed(database_url, args.tenants, args.users, args.books, rng)
+        keys = KeySet(lambda: parse_keys(KEYS))
+        keys.load()
+        issuer = LocalIssuer(keys)
+        port = free_port()
+        server = start_server(database_url, port, args.workers, args.worker_class)
+        try:
+            if args.warmup:
+                Driver(port, library, issuer, args.seed + 1).run(args.concurrency, args.warmup)
+            driver = Driver(port, library, issuer, args.seed)
+            driver.run(args.concurrency, args.duration)
+        finally:
+            server.terminate()
+            server.wait(10)
+
+    results = {
+        'config': {
+            'database': database_url.split(':', 1)[0],
+            'tenants': args.tenants, 'users': args.users, 'books': args.books,
+            'workers': args.workers, 'worker_class': args.worker_class,
+            'concurrency': args.concurrency, 'duration': args.duration, 'seed': args.seed,
+            'mix': MIX,
+        },
+        **driver.report(args.duration),
+    }
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            results['comparison'], regressions = compare(results, json.load(f), args.tolerance)
+        results['regressions'] = regressions
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Ölçüm katmanının maliyeti: METRICS_ENABLED kapalı ve açıkken istek gecikmesi.
+
+    python -m bench.metrics --books 500 --requests 5000 --rounds 6
+"""
+import argparse
+import json
+import time
+from contextlib import ExitStack
+
+from sqlalchemy import insert
+
+from kitaptakip.extensions import db
+from kitaptakip.models import Book, new_id, utcnow
+
+from ._common import summarize, temp_app
+
+APP_ID = 'bench'
+USER_ID = 'u1'
+ROUTES = (
+    f'/apps/{APP_ID}/users/{USER_ID}/books?limit=50',
+    f'/apps/{APP_ID}/users/{USER_ID}/summary',
+)
+
+
+def seed(books):
+    now = utcnow()
+    rows = [
+        {'id': new_id(), 'app_id': APP_ID, 'user_id': USER_ID, 'title': f'Kitap {b}',
+         'total_pages': 300, 'pages_read': b % 300, 'last_page_read': b % 300, 'created_at': now}
+        for b in range(books)
+    ]
+    db.session.execute(insert(Book.__table__), rows)
+    db.session.commit()
+
+
+def drive(clients, requests):
+    """İki uygulamaya sırayla istek atar; makinedeki dalgalanma iki tarafa eşit dağılır."""
+    samples = [[] for _ in clients]
+    for i in range(requests):
+        route = ROUTES[i % len(ROUTES)]
+        for client, bucket in zip(clients, samples):
+            start = time.perf_counter()
+            client.get(route)
+            bucket.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--books', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--rounds', type=int, default=6)
+    parser.add_argument('--profile-rate', type=int, default=0,
+                        help='PROFILE_SAMPLE_RATE (0: kapalı, varsayılan)')
+    args = parser.parse_args()
+    with ExitStack() as stack:
+        clients = []
+        for config in ({'METRICS_ENABLED': False},
+                       {'METRICS_ENABLED': True, 'PROFILE_SAMPLE_RATE': args.profile_rate}):
+            app = stack.enter_context(temp_app(SUMMARY_CACHE_ENABLED=False, **config))
+            with app.app_context():
+                seed(args.books)
+            clients.append(app.test_client())
+        drive(clients, len(ROUTES) * 10)
+        off, on = [], []
+        for round_ in range(args.rounds):
+            # Sıra her turda değişir; önce çalışan tarafın avantajı dengelenir
+            if round_ % 2:
+                on_samples, off_samples = drive(clients[::-1], args.requests)
+            else:
+                off_samples, on_samples = drive(clients, args.requests)
+            off += off_samples
+            on += on_samples
+    off_summary, on_summary = summarize(off), summarize(on)
+    print(json.dumps({
+        'metrics_off': off_summary,
+        'metrics_on': on_summary,
+        'overhead_mean_us': (on_summary['mean_ms'] - off_summary['mean_ms']) * 1000,
+        'overhead_mean_pct': (on_summary['mean_ms'] / off_summary['mean_ms'] - 1) * 100,
+        'overhead_p50_pct': (on_summary['p50_ms'] / off_summary['p50_ms'] - 1) * 100,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
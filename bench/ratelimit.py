@@ -0,0 +1,161 @@
+"""Jeton kovası ve kabul denetimi: kova işleminin maliyeti ve bellek sınırı,
+döngüde kitap ekleyen bir istemcinin komşu kullanıcıya etkisi, aşırı yükte
+429 ile yük atma.
+
+    python -m bench.ratelimit --duration 3 --abusers 4 --clients 16
+"""
+import argparse
+import json
+import threading
+import time
+
+from kitaptakip.ratelimit import InMemoryBucketStore, RateLimiter
+
+from ._common import summarize, temp_app
+
+APP_ID = 'bench'
+
+
+def hot_path(calls, keys, maxsize):
+    limiter = RateLimiter(InMemoryBucketStore(maxsize=maxsize), user_rate=20, user_burst=60,
+                          app_rate=10**6, app_burst=10**6)
+    start = time.perf_counter()
+    for i in range(calls):
+        limiter.acquire(APP_ID, f'u{i % keys}')
+    elapsed = time.perf_counter() - start
+    return {
+        'keys': keys,
+        'ns_per_acquire': elapsed / calls * 1e9,
+        'buckets_held': len(limiter.store),
+        'evictions': limiter.store.evictions,
+    }
+
+
+def _run_for(duration, fn):
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        fn()
+
+
+def noisy_neighbour(enabled, duration, abusers, rtt):
+    config = {'METRICS_ENABLED': False, 'RATE_LIMIT_ENABLED': enabled}
+    with temp_app(**config) as app:
+        client = app.test_client()
+        victim = f'/apps/{APP_ID}/users/victim/books'
+        for i in range(50):
+            client.post(victim, json={'title': f'Kitap {i}', 'totalPages': 300})
+        statuses = {}
+        latencies = []
+        lock = threading.Lock()
+
+        def abuse():
+            local = app.test_client()
+            url = f'/apps/{APP_ID}/users/abuser/books'
+            counts = {}
+
+            def add():
+                status = local.post(url, json={'title': 'Spam', 'totalPages': 1}).status_code
+                counts[status] = counts.get(status, 0) + 1
+                # Ağ gidiş-dönüşü; istemci yanıtı bekleyip hemen yeniden dener
+                time.sleep(rtt)
+            _run_for(duration, add)
+            with lock:
+                for status, total in counts.items():
+                    statuses[status] = statuses.get(status, 0) + total
+
+        def read():
+            local = app.test_client()
+
+            def get():
+                start = time.perf_counter()
+                local.get(victim)
+                latencies.append(time.perf_counter() - start)
+                time.sleep(0.01)
+            _run_for(duration, get)
+
+        threads = [threading.Thread(target=abuse) for _ in range(abusers)] + [threading.Thread(target=read)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return {
+            'abuser_statuses': {str(status): total for status, total in sorted(statuses.items())},
+            'victim_reads': summarize(latencies),
+        }
+
+
+def overload(enabled, duration, clients, in_flight, target_ms):
+    config = {
+        'METRICS_ENABLED': False,
+        'ADMISSION_ENABLED': enabled,
+        'ADMISSION_MAX_IN_FLIGHT': in_flight,
+        'ADMISSION_P99_TARGET_MS': target_ms,
+        'ADMISSION_WINDOW': 0.25,
+    }
+    with temp_app(**config) as app:
+        client = app.test_client()
+        url = f'/apps/{APP_ID}/users/u1/books'
+        client.post(f'{url}:batch', json={'ops': [
+            {'op': 'add', 'title': f'Kitap {i}', 'totalPages': 300} for i in range(300)
+        ]})
+        ok, shed = [], []
+        lock = threading.Lock()
+
+        def worker():
+            local = app.test_client()
+            local_ok, local_shed = [], 0
+
+            def get():
+                nonlocal local_shed
+                start = time.perf_counter()
+                response = local.get(url + '?limit=300')
+                if response.status_code == 429:
+                    local_shed += 1
+                    # İstemci Retry-After'ı bekler gibi kısa bir ara
+                    time.sleep(0.05)
+                else:
+                    local_ok.append(time.perf_counter() - start)
+            _run_for(duration, get)
+            with lock:
+                ok.extend(local_ok)
+                shed.append(local_shed)
+
+        threads = [threading.Thread(target=worker) for _ in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return {
+            'served': len(ok),
+            'served_per_s': len(ok) / duration,
+            'shed_429': sum(shed),
+            'served_latency': summarize(ok),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=500000)
+    parser.add_argument('--duration', type=float, default=3)
+    parser.add_argument('--abusers', type=int, default=4)
+    parser.add_argument('--rtt', type=float, default=0.002, help='Saldırgan istemcinin gidiş-dönüşü (sn)')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--in-flight', type=int, default=4)
+    parser.add_argument('--target-ms', type=float, default=100)
+    args = parser.parse_args()
+    result = {
+        'hot_path': [hot_path(args.calls, keys, maxsize=100000) for keys in (1000, 50000, 400000)],
+        'noisy_neighbour': {
+            name: noisy_neighbour(enabled, args.duration, args.abusers, args.rtt)
+            for name, enabled in (('unlimited', False), ('token_bucket', True))
+        },
+        'overload': {
+            name: overload(enabled, args.duration, args.clients, args.in_flight, args.target_ms)
+            for name, enabled in (('no_admission', False), ('admission', True))
+        },
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Okuma kopyası yönlendirmesi: gecikmeli SQLite kopyasıyla kendi yazmasını okuma.
+
+Birincil SQLite dosyası arka planda belleğe anlık görüntü olarak alınır ve
+--lag saniye sonra kopya dosyasına yazılır (sqlite3 backup). Her turda bir
+sayfa artırımının hemen ardından kitap ve özet okunur; belirteçli okumalar
+hiçbir zaman eski değer görmemelidir.
+
+    python -m bench.replicas --lag 0.2 --rounds 300
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import deque
+
+from kitaptakip import books, create_app
+from kitaptakip.extensions import db
+from kitaptakip.replicas import TOKEN_HEADER
+
+from ._common import summarize
+
+APP_ID = 'bench'
+USER_ID = 'u1'
+
+
+class LaggedReplica(threading.Thread):
+    """Birincilin `lag` saniye geriden gelen kopyası."""
+
+    def __init__(self, primary, replica, lag, interval=0.02):
+        super().__init__(daemon=True)
+        self.primary = primary
+        self.replica = replica
+        self.lag = lag
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.applied = 0
+
+    def snapshot(self):
+        source = sqlite3.connect(self.primary)
+        snapshot = sqlite3.connect(':memory:', check_same_thread=False)
+        source.backup(snapshot)
+        source.close()
+        return snapshot
+
+    def apply(self, snapshot):
+        target = sqlite3.connect(self.replica, timeout=5)
+        snapshot.backup(target)
+        target.close()
+        snapshot.close()
+        self.applied += 1
+
+    def run(self):
+        pending = deque()
+        while not self.stopped.is_set():
+            now = time.monotonic()
+            pending.append((now, self.snapshot()))
+            while pending and pending[0][0] + self.lag <= now:
+                self.apply(pending.popleft()[1])
+            time.sleep(self.interval)
+
+
+def run(client, book_id, rounds, use_token):
+    expected = None
+    stale = 0
+    latencies = []
+    base = f'/apps/{APP_ID}/users/{USER_ID}'
+    for _ in range(rounds):
+        response = client.post(f'{base}/books/{book_id}/pages', json={'pages': 1})
+        expected = response.get_json()['pagesRead']
+        headers = {TOKEN_HEADER: response.headers[TOKEN_HEADER]} if use_token else {}
+        start = time.perf_counter()
+        book = client.get(f'{base}/books/{book_id}', headers=headers).get_json()
+        summary = client.get(f'{base}/summary', headers=headers).get_json()
+        latencies.append(time.perf_counter() - start)
+        if book['pagesRead'] != expected or summary['pagesRead'] != expected:
+            stale += 1
+    return {'rounds': rounds, 'stale_reads': stale, 'read_pair': summarize(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lag', type=float, default=0.2)
+    parser.add_argument('--rounds', type=int, default=300)
+    parser.add_argument('--dashboard', type=int, default=2000, help='Yazmasız okuma sayısı')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        primary = os.path.join(tmp, 'primary.db')
+        replica = os.path.join(tmp, 'replica.db')
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + primary,
+            'REPLICAS': 'default=sqlite:///' + replica,
+            'AUTH_ENABLED': False,
+            'METRICS_ENABLED': False,
+        })
+        with app.app_context():
+            book_id = books.add_book(APP_ID, USER_ID, 'Tutunamayanlar', 10**6).id
+            db.session.commit()
+        replicator = LaggedReplica(primary, replica, args.lag)
+        replicator.apply(replicator.snapshot())
+        replicator.start()
+        time.sleep(args.lag * 2)
+        client = app.test_client()
+        counters = app.extensions['replicas']
+        results = {}
+        for name, use_token in (('without_token', False), ('with_token', True)):
+            counters.replica_reads = counters.primary_fallbacks = 0
+            results[name] = run(client, book_id, args.rounds, use_token)
+            results[name].update(replica_reads=counters.replica_reads,
+                                 primary_fallbacks=counters.primary_fallbacks)
+        # Yazma yokken panel okumalarının tamamı kopyadan karşılanmalı
+        time.sleep(args.lag * 2)
+        counters.replica_reads = counters.primary_fallbacks = 0
+        for _ in range(args.dashboard):
+            client.get(f'/apps/{APP_ID}/users/{USER_ID}/books')
+        results['dashboard_reads'] = {'requests': args.dashboard, 'replica_reads': counters.replica_reads}
+        replicator.stopped.set()
+        replicator.join()
+    results['lag_s'] = args.lag
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""Günlük özet tablosu ile ham oturum taraması arasındaki sorgu gecikmesi.
+
+    python -m bench.rollup --sessions 10000000 --users 1000 --days 365
+"""
+import argparse
+import json
+import random
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import func, insert, select
+
+from kitaptakip import stats
+from kitaptakip.extensions import db
+from kitaptakip.models import ReadingSession, utcnow
+
+from ._common import Timer, summarize, temp_app
+
+APP_ID = 'bench'
+
+
+def seed(sessions, users, days, chunk=50_000):
+    rng = random.Random(42)
+    now = utcnow()
+    span = days * 86400
+    rows = []
+    for i in range(sessions):
+        rows.append({
+            'app_id': APP_ID,
+            'user_id': f'u{i % users}',
+            'book_id': f'b{rng.randrange(20)}',
+            'pages': rng.randint(1, 40),
+            'created_at': now - timedelta(seconds=rng.randrange(span)),
+        })
+        if len(rows) == chunk:
+            db.session.execute(insert(ReadingSession), rows)
+            db.session.commit()
+            rows.clear()
+    if rows:
+        db.session.execute(insert(ReadingSession), rows)
+        db.session.commit()
+
+
+def _raw_days(user_id, start):
+    day = func.date(ReadingSession.created_at)
+    stmt = (
+        select(day, func.sum(ReadingSession.pages))
+        .where(
+            ReadingSession.app_id == APP_ID,
+            ReadingSession.user_id == user_id,
+            ReadingSession.created_at >= start,
+        )
+        .group_by(day)
+        .order_by(day.desc())
+    )
+    return db.session.execute(stmt).all()
+
+
+def raw_dashboard(user_id, today, days, weeks):
+    first_week = today - timedelta(days=today.weekday(), weeks=weeks - 1)
+    rows = _raw_days(user_id, min(today - timedelta(days=days - 1), first_week))
+    # Seri ve haftalık toplamlar da aynı ham taramadan türetilir
+    streak = 0
+    expected = today
+    for day, _ in rows:
+        day = date.fromisoformat(day)
+        if streak == 0 and day == today - timedelta(days=1):
+            expected = day
+        if day != expected:
+            break
+        streak += 1
+        expected = day - timedelta(days=1)
+    weekly = {}
+    for day, pages in rows:
+        day = date.fromisoformat(day)
+        if day >= first_week:
+            week = day - timedelta(days=day.weekday())
+            weekly[week] = weekly.get(week, 0) + pages
+    return rows, streak, weekly
+
+
+def rollup_dashboard(user_id, today, days, weeks):
+    daily = stats.daily_pages(APP_ID, user_id, today - timedelta(days=days - 1), today)
+    streak = stats.reading_streak(APP_ID, user_id, today)
+    weekly = stats.weekly_totals(APP_ID, user_id, today, weeks)
+    return daily, streak, weekly
+
+
+def measure(fn, user_ids, today, days, weeks):
+    samples = []
+    for user_id in user_ids:
+        start = time.perf_counter()
+        fn(user_id, today, days, weeks)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sessions', type=int, default=10_000_000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    with temp_app() as app, app.app_context():
+        with Timer() as seeding:
+            seed(args.sessions, args.users, args.days)
+        with Timer() as rebuilding:
+            stats.rebuild_daily_stats()
+            db.session.commit()
+
+        today = utcnow().date()
+        rng = random.Random(7)
+        user_ids = [f'u{rng.randrange(args.users)}' for _ in range(args.queries)]
+        result = {
+            'sessions': args.sessions,
+            'users': args.users,
+            'seed_seconds': seeding.elapsed,
+            'rebuild_seconds': rebuilding.elapsed,
+            'raw_30d': measure(raw_dashboard, user_ids, today, 30, 8),
+            'rollup_30d': measure(rollup_dashboard, user_ids, today, 30, 8),
+            'raw_365d': measure(raw_dashboard, user_ids, today, 365, 52),
+            'rollup_365d': measure(rollup_dashboard, user_ids, today, 365, 52),
+        }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
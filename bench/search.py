@@ -0,0 +1,88 @@
+"""Başlık araması: FTS5 sorgusu ve bellek içi öneri ağacı gecikmesi.
+
+    python -m bench.search --titles 1000000
+"""
+import argparse
+import json
+import random
+import time
+
+from sqlalchemy import insert
+
+from kitaptakip import search
+from kitaptakip.extensions import db
+from kitaptakip.models import Book, new_id, utcnow
+
+from ._common import Timer, summarize, temp_app
+
+APP_ID = 'bench'
+USER_ID = 'u1'
+WORDS = (
+    'İstanbul ışık şiir çağ gönül yol deniz kürk manto madonna ince memed saat ayar enstitü '
+    'yaban tutunamayanlar çalıkuşu sefiller suç ceza savaş barış aşk yaz kış gece gündüz '
+    'ırmak ağaç dağ ova kuş kedi köpek yıldız ay güneş rüzgâr yağmur kar sis bahar hüzün '
+    'sevda umut korku zaman hafıza şehir köy ev kapı pencere ayna gölge ışıltı öykü masal'
+).split()
+
+
+def make_title(rng):
+    return ' '.join(rng.choice(WORDS).capitalize() for _ in range(rng.randint(2, 4))) + f' {rng.randrange(1000)}'
+
+
+def seed(titles, rng, chunk=20_000):
+    now = utcnow()
+    rows = []
+    for _ in range(titles):
+        rows.append({'id': new_id(), 'app_id': APP_ID, 'user_id': USER_ID, 'title': make_title(rng),
+                     'total_pages': 100, 'pages_read': 0, 'last_page_read': 0, 'created_at': now})
+        if len(rows) == chunk:
+            db.session.execute(insert(Book), rows)
+            rows.clear()
+    if rows:
+        db.session.execute(insert(Book), rows)
+    db.session.commit()
+
+
+def measure(fn, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--titles', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=500)
+    args = parser.parse_args()
+    rng = random.Random(5)
+
+    with temp_app() as app, app.app_context():
+        with Timer() as seeding:
+            seed(args.titles, rng)
+        # Yazarken her tuş vuruşu: 1-4 harflik önekler
+        queries = [rng.choice(WORDS)[:rng.randint(1, 4)] for _ in range(args.queries)]
+        two_terms = [f'{rng.choice(WORDS)} {rng.choice(WORDS)[:2]}' for _ in range(args.queries)]
+        backend = app.extensions['search']
+        trie = app.extensions['search_trie']
+        with Timer() as building:
+            trie.suggest(APP_ID, USER_ID, 'a', 10)
+        result = {
+            'titles': args.titles,
+            'backend': backend.name,
+            'seed_seconds': seeding.elapsed,
+            'trie_build_seconds': building.elapsed,
+            'typeahead_trie': measure(lambda q: search.suggest_titles(APP_ID, USER_ID, q, 10), queries),
+            'typeahead_trie_two_terms': measure(
+                lambda q: search.suggest_titles(APP_ID, USER_ID, q, 10), two_terms),
+            f'search_{backend.name}': measure(lambda q: search.search_books(APP_ID, USER_ID, q, 10), queries),
+            f'search_{backend.name}_two_terms': measure(
+                lambda q: search.search_books(APP_ID, USER_ID, q, 10), two_terms),
+        }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
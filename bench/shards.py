@@ -0,0 +1,180 @@
+"""N yerel SQLite parçası: yönlendirme maliyeti, paralel yönetim özeti ve
+yazmalar sürerken çevrimiçi taşıma.
+
+    python -m bench.shards --shards 4 --users 400 --books 200
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy import insert
+
+from kitaptakip import create_app, sharding
+from kitaptakip.extensions import db
+from kitaptakip.models import Book, new_id, utcnow
+
+from ._common import Timer, summarize
+
+APP_ID = 'bench'
+
+
+def make_app(tmp, shards, **config):
+    settings = {
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tmp, 'directory.db'),
+        'AUTH_ENABLED': False,
+        'METRICS_ENABLED': False,
+        'SUMMARY_CACHE_ENABLED': False,
+        'SHARDS': ','.join(f's{i}=sqlite:///' + os.path.join(tmp, f's{i}.db') for i in range(shards)),
+    }
+    settings.update(config)
+    return create_app(settings)
+
+
+def seed(app, users, books):
+    router = app.extensions['shard_router']
+    rows = {}
+    now = utcnow()
+    for u in range(users):
+        shard, _ = router.locate(APP_ID, f'u{u}')
+        rows.setdefault(shard, []).extend(
+            {'id': new_id(), 'app_id': APP_ID, 'user_id': f'u{u}', 'title': f'Kitap {b}',
+             'total_pages': 10**6, 'pages_read': b, 'last_page_read': b, 'created_at': now}
+            for b in range(books)
+        )
+    with app.app_context():
+        for shard, shard_rows in rows.items():
+            with router.engines[shard].begin() as connection:
+                connection.execute(insert(Book.__table__), shard_rows)
+    return {shard: len(shard_rows) for shard, shard_rows in rows.items()}
+
+
+def routing_cost(app, users, requests):
+    router = app.extensions['shard_router']
+    rng = random.Random(3)
+    keys = [(APP_ID, f'u{rng.randrange(users)}') for _ in range(requests)]
+    with Timer() as timer:
+        for key in keys:
+            router.locate(*key)
+    client = app.test_client()
+    samples = []
+    for app_id, user_id in keys[:2000]:
+        start = time.perf_counter()
+        client.get(f'/apps/{app_id}/users/{user_id}/summary')
+        samples.append(time.perf_counter() - start)
+    return {'locate_us': timer.elapsed / len(keys) * 1e6, 'summary': summarize(samples)}
+
+
+def aggregate(app, rounds):
+    router = app.extensions['shard_router']
+
+    def serial():
+        results = {}
+        for shard in router.shards:
+            with app.app_context():
+                sharding.use(shard)
+                results[shard] = sharding.shard_totals(shard)
+        return results
+
+    timings = {'serial': [], 'parallel': []}
+    for _ in range(rounds):
+        with Timer() as timer:
+            expected = serial()
+        timings['serial'].append(timer.elapsed)
+        with Timer() as timer:
+            result = sharding.totals(router)
+        timings['parallel'].append(timer.elapsed)
+        assert result['shards'] == expected
+    return {name: summarize(samples) for name, samples in timings.items()}
+
+
+def online_move(app, writers):
+    """Taşınan kullanıcıya yazılırken taşıma; hiçbir kabul edilen artış kaybolmamalı."""
+    router = app.extensions['shard_router']
+    user_id = 'u0'
+    source, _ = router.locate(APP_ID, user_id)
+    target = next(shard for shard in router.shards if shard != source)
+    with app.app_context():
+        sharding.use(source)
+        book_id = db.session.scalar(
+            db.select(Book.id).where(Book.app_id == APP_ID, Book.user_id == user_id).limit(1)
+        )
+        before = db.session.get(Book, book_id).pages_read
+    accepted = []
+    rejected = []
+    latencies = []
+    stop = threading.Event()
+
+    def write():
+        client = app.test_client()
+        ok = busy = 0
+        local = []
+        while not stop.is_set():
+            start = time.perf_counter()
+            response = client.post(f'/apps/{APP_ID}/users/{user_id}/books/{book_id}/pages',
+                                   json={'pages': 1})
+            local.append(time.perf_counter() - start)
+            if response.status_code == 200:
+                ok += 1
+            elif response.status_code == 503:
+                busy += 1
+                time.sleep(0.01)
+            else:
+                raise AssertionError(response.get_json())
+        accepted.append(ok)
+        rejected.append(busy)
+        latencies.extend(local)
+
+    threads = [threading.Thread(target=write) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    log = []
+    started = time.perf_counter()
+    with Timer() as timer, app.app_context():
+        sharding.move_user(router, APP_ID, user_id, target,
+                           log=lambda message: log.append((round(time.perf_counter() - started, 3), message)))
+    stop.set()
+    for thread in threads:
+        thread.join()
+    with app.app_context():
+        sharding.use(target)
+        after = db.session.get(Book, book_id).pages_read
+    return {
+        'source': source,
+        'target': target,
+        'move_seconds': timer.elapsed,
+        'phases': log,
+        'writes_accepted': sum(accepted),
+        'writes_rejected_503': sum(rejected),
+        'lost_writes': before + sum(accepted) - after,
+        'write_latency': summarize(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--shards', type=int, default=4)
+    parser.add_argument('--users', type=int, default=400)
+    parser.add_argument('--books', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=100_000)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--refresh', type=float, default=0.5, help='SHARD_REFRESH')
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(tmp, args.shards, SHARD_REFRESH=args.refresh)
+        placement = seed(app, args.users, args.books)
+        result = {
+            'rows_per_shard': placement,
+            'routing': routing_cost(app, args.users, args.requests),
+            'admin_totals': aggregate(app, args.rounds),
+            'online_move': online_move(app, args.writers),
+        }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
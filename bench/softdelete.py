@@ -0,0 +1,172 @@
+"""Geçici silme: çok sayıda mezar taşı birikmişken liste sorgusu gecikmesi ve
+planı, kısmi (WHERE deleted_at IS NULL) ve tam liste indeksleriyle. Ayrıca
+silme/geri alma gecikmesi ve temizleyicinin toplu silme hızı ile her işlemin
+yazma kilidini tuttuğu süre ölçülür.
+
+    python -m bench.softdelete --users 50 --books 200 --ratio 20
+"""
+import argparse
+import json
+import random
+from datetime import timedelta
+
+from sqlalchemy import bindparam, func, insert, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.schema import CreateIndex
+
+from kitaptakip import books, purge
+from kitaptakip.extensions import db
+from kitaptakip.models import LIVE, LIVE_INDEXES, Book, new_id, utcnow
+
+from ._common import Timer, summarize, temp_app
+
+APP_ID = 'bench'
+QUERIES = {
+    'created': {},
+    'title': {'sort': 'title'},
+    'progress_desc': {'sort': 'progress', 'descending': True},
+    'unread_by_created': {'status': 'unread'},
+}
+
+
+def seed(users, live, ratio):
+    # Her (ratio + 1) kitaptan biri yaşar; mezar taşları yaşayanların arasına
+    # serpilir ve geri alma penceresi çoktan geçmiştir
+    rng = random.Random(7)
+    now = utcnow()
+    for u in range(users):
+        rows = []
+        for i in range(live * (ratio + 1)):
+            total = rng.randint(100, 900)
+            pages = rng.choice((0, rng.randint(1, total)))
+            rows.append({
+                'id': new_id(), 'app_id': APP_ID, 'user_id': f'u{u}', 'title': f'Kitap {rng.random():.8f}',
+                'total_pages': total, 'pages_read': pages, 'last_page_read': pages,
+                'created_at': now - timedelta(days=30, seconds=i),
+                'deleted_at': None if i % (ratio + 1) == 0 else now - timedelta(days=7, seconds=i),
+            })
+        db.session.execute(insert(Book.__table__), rows)
+        db.session.commit()
+
+
+def full_indexes():
+    # Aynı sütunlar, WHERE olmadan: mezar taşları da indekstedir
+    connection = db.session.connection()
+    for index in LIVE_INDEXES:
+        ddl = str(CreateIndex(index).compile(dialect=connection.dialect))
+        index.drop(connection)
+        connection.exec_driver_sql(ddl.split(' WHERE ')[0])
+    db.session.commit()
+
+
+def index_bytes():
+    # dbstat sanal tablosu derlemeye bağlıdır; yoksa None
+    stmt = text('SELECT SUM(pgsize) FROM dbstat WHERE name IN :names').bindparams(
+        bindparam('names', expanding=True)
+    )
+    try:
+        return db.session.scalar(stmt, {'names': [index.name for index in LIVE_INDEXES]})
+    except OperationalError:
+        db.session.rollback()
+        return None
+
+
+def plan(stmt):
+    compiled = stmt.compile(db.engine, compile_kwargs={'literal_binds': True})
+    rows = db.session.execute(text(f'EXPLAIN QUERY PLAN {compiled}')).all()
+    return [row[-1] for row in rows]
+
+
+def list_latency(users, rounds, limit):
+    rng = random.Random(11)
+    result = {}
+    for name, options in QUERIES.items():
+        samples = []
+        for _ in range(rounds):
+            user_id = f'u{rng.randrange(users)}'
+            with Timer() as timer:
+                books.list_books(APP_ID, user_id, limit=limit, **options)
+            samples.append(timer.elapsed)
+            db.session.rollback()
+        result[name] = summarize(samples)
+    # Yalnızca kimlikler: satır nesnesi kurulmaz, indeks taramasının payı görünür
+    samples = []
+    for _ in range(rounds):
+        stmt = (
+            select(Book.id).where(Book.app_id == APP_ID, Book.user_id == f'u{rng.randrange(users)}', LIVE)
+            .order_by(Book.created_at, Book.id).limit(limit + 1)
+        )
+        with Timer() as timer:
+            db.session.execute(stmt).all()
+        samples.append(timer.elapsed)
+    result['created_ids_only'] = summarize(samples)
+    result['plan_created'] = plan(stmt.with_only_columns(Book))
+    result['index_bytes'] = index_bytes()
+    return result
+
+
+def delete_undo(client, users, count):
+    rng = random.Random(13)
+    deletes, restores = [], []
+    for _ in range(count):
+        user_id = f'u{rng.randrange(users)}'
+        url = f'/apps/{APP_ID}/users/{user_id}/books'
+        book_id = client.get(f'{url}?limit=1').get_json()['books'][0]['id']
+        with Timer() as timer:
+            assert client.delete(f'{url}/{book_id}').status_code == 204
+        deletes.append(timer.elapsed)
+        with Timer() as timer:
+            assert client.post(f'{url}/{book_id}:restore').status_code == 200
+        restores.append(timer.elapsed)
+    return {'delete': summarize(deletes), 'restore': summarize(restores)}
+
+
+def purge_all(batch_size):
+    before = utcnow() - books.undo_window()
+    samples = []
+    purged = 0
+    with Timer() as total:
+        while True:
+            with Timer() as timer, db.engine.begin() as connection:
+                count = purge.purge_batch(connection, before, batch_size)
+            if not count:
+                break
+            purged += count
+            samples.append(timer.elapsed)
+    return {
+        'batch_size': batch_size,
+        'purged': purged,
+        'rows_per_s': purged / total.elapsed if total.elapsed else 0,
+        # İşlem süresi, yazmaların kilit bekleyebileceği en uzun süredir
+        'batch': summarize(samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--books', type=int, default=200, help='Kullanıcı başına silinmemiş kitap')
+    parser.add_argument('--ratio', type=int, default=20, help='Silinmemiş kitap başına mezar taşı')
+    parser.add_argument('--rounds', type=int, default=200)
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+    with temp_app(METRICS_ENABLED=False, PURGE_ENABLED=False) as app, app.app_context():
+        with Timer() as timer:
+            seed(args.users, args.books, args.ratio)
+        result = {
+            'live': db.session.scalar(select(func.count()).where(LIVE)),
+            'tombstones': db.session.scalar(select(func.count()).where(Book.deleted_at.is_not(None))),
+            'seed_seconds': timer.elapsed,
+            'delete_undo': delete_undo(app.test_client(), args.users, args.rounds),
+            'partial_indexes': list_latency(args.users, args.rounds, args.limit),
+        }
+        full_indexes()
+        result['full_indexes'] = list_latency(args.users, args.rounds, args.limit)
+        result['purge'] = purge_all(args.batch_size)
+        result['full_indexes_after_purge'] = list_latency(args.users, args.rounds, args.limit)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+"""Soğuk başlangıç: içe aktarım süresi (-X importtime) ve gunicorn worker başına
+hazır olma / ilk yanıt süresi, preload_app kapalı ve açıkken. Otomatik
+ölçeklemeyi taklit etmek için çalışan sunucuya TTIN gönderilip yeni worker'ın
+ilk yanıta kadar geçen süresi de ölçülür.
+
+    python -m bench.startup --workers 3
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# İlk yüklemede ertelenmesi beklenen modüller
+DEFERRED = ('sqlalchemy.dialects.postgresql', 'pstats', 'cProfile', 'msgpack', 'brotli')
+
+# Depodaki yapılandırmaya worker olaylarını dosyaya yazan kancalar eklenir
+HOOKS = '''
+exec(open({config!r}).read())
+import os as _os, time as _time
+
+def _log(line):
+    with open({events!r}, 'a') as out:
+        out.write(line + '\\n')
+
+def post_worker_init(worker):
+    _log(f'ready {{_os.getpid()}} {{_time.time()}}')
+
+def pre_request(worker, req):
+    worker._bench_start = (_time.perf_counter(), _time.process_time())
+
+def post_request(worker, req, environ, resp):
+    if not getattr(worker, '_bench_seen', False):
+        worker._bench_seen = True
+        wall, cpu = worker._bench_start
+        _log(f'first {{_os.getpid()}} {{_time.time()}} {{_time.perf_counter() - wall}} {{_time.process_time() - cpu}}')
+'''
+
+
+def import_times():
+    out = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import kitaptakip, kitaptakip.api'],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stderr
+    cumulative = {}
+    for line in out.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, total, name = line[len('import time:'):].split('|')
+        cumulative[name.strip()] = int(total) / 1000
+    return {
+        'total_ms': cumulative.get('kitaptakip', 0) + cumulative.get('kitaptakip.api', 0),
+        'top_level_ms': {name: cumulative[name] for name in ('flask', 'sqlalchemy', 'kitaptakip.models')
+                         if name in cumulative},
+        'deferred_not_loaded': [name for name in DEFERRED if name not in cumulative],
+    }
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _events(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as source:
+        return [line.split() for line in source]
+
+
+def _private_mb(pid):
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as source:
+            private = sum(int(line.split()[1]) for line in source if line.startswith('Private_'))
+        return private / 1024
+    except OSError:
+        return None
+
+
+def _hammer(url, stop):
+    while not stop.is_set():
+        try:
+            urllib.request.urlopen(url, timeout=5).read()
+        except OSError:
+            time.sleep(0.01)
+
+
+def _wait(events, kind, count, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        found = [event for event in _events(events) if event[0] == kind]
+        if len(found) >= count:
+            return found
+        time.sleep(0.01)
+    raise RuntimeError(f'{count} adet {kind} olayı gelmedi')
+
+
+def run_server(preload, workers):
+    with tempfile.TemporaryDirectory() as tmp:
+        events = os.path.join(tmp, 'events')
+        config = os.path.join(tmp, 'gunicorn.conf.py')
+        with open(config, 'w') as out:
+            out.write(HOOKS.format(config=os.path.join(ROOT, 'gunicorn.conf.py'), events=events))
+        port = _free_port()
+        env = dict(
+            os.environ,
+            DATABASE_URL='sqlite:///' + os.path.join(tmp, 'bench.db'),
+            AUTH_ENABLED='0', METRICS_ENABLED='0', ACCESS_LOG='', WORKER_CLASS='sync',
+            BIND=f'127.0.0.1:{port}', WEB_CONCURRENCY=str(workers), PRELOAD_APP='1' if preload else '0',
+        )
+        started = time.time()
+        server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', config, 'wsgi:app'],
+                                  cwd=ROOT, env=env, stderr=subprocess.DEVNULL)
+        url = f'http://127.0.0.1:{port}/apps/bench/users/u1/books'
+        stop = threading.Event()
+        clients = [threading.Thread(target=_hammer, args=(url, stop)) for _ in range(workers * 2)]
+        try:
+            for client in clients:
+                client.start()
+            ready = _wait(events, 'ready', workers)
+            first = _wait(events, 'first', workers)
+            pids = [int(event[1]) for event in ready]
+            boot = {
+                'ready_s': sorted(float(event[2]) - started for event in ready),
+                'first_response_s': sorted(float(event[2]) - started for event in first),
+                'first_request_ms': sorted(float(event[3]) * 1000 for event in first),
+                'first_request_cpu_ms': sorted(float(event[4]) * 1000 for event in first),
+                'worker_private_mb': [_private_mb(pid) for pid in pids],
+            }
+            # Ölçek büyütme: ana sürece TTIN, yeni worker'ın hazır olması ve ilk yanıtı
+            scaled = time.time()
+            server.send_signal(signal.SIGTTIN)
+            ready = _wait(events, 'ready', workers + 1)
+            first = _wait(events, 'first', workers + 1)
+            new_pid = next(event[1] for event in ready if int(event[1]) not in pids)
+            new_first = next(event for event in first if event[1] == new_pid)
+            boot['scale_up'] = {
+                'ready_s': next(float(event[2]) for event in ready if event[1] == new_pid) - scaled,
+                'first_response_s': float(new_first[2]) - scaled,
+                'first_request_ms': float(new_first[3]) * 1000,
+                'first_request_cpu_ms': float(new_first[4]) * 1000,
+            }
+            return boot
+        finally:
+            stop.set()
+            for client in clients:
+                client.join()
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=3)
+    args = parser.parse_args()
+    result = {
+        'imports': import_times(),
+        'per_worker_load': run_server(preload=False, workers=args.workers),
+        'preload_app': run_server(preload=True, workers=args.workers),
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
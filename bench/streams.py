@@ -0,0 +1,157 @@
+"""Worker başına eşzamanlı değişiklik akışı kapasitesi: sync ve gevent worker'ı.
+
+Tek worker'lı gunicorn'a --streams kadar SSE bağlantısı açar; ilk olayı
+(retry) --wait saniye içinde alan akışları sayar, akışlar açıkken özet
+rotasının gecikmesini ve worker'ın bağlantı başına bellek artışını ölçer.
+
+    python -m bench.streams --streams 1000
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import selectors
+import socket
+import tempfile
+import time
+
+from kitaptakip.auth import KeySet, LocalIssuer, parse_keys
+
+from ._common import summarize
+from .load import KEYS, free_port, seed, start_server
+
+
+def worker_rss(master_pid):
+    """gunicorn master'ının çocuk süreçlerinin toplam RSS'i (bayt)."""
+    total = 0
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f'/proc/{pid}/stat') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+            if ppid != master_pid:
+                continue
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1]) * 1024
+        except (OSError, ValueError, IndexError):
+            continue
+    return total
+
+
+def open_streams(port, owners, tokens, count, wait):
+    """Akışları açar; ilk olayı alan soketleri ve ilk olay sürelerini döner."""
+    selector = selectors.DefaultSelector()
+    sockets = []
+    started = {}
+    for i in range(count):
+        owner = owners[i % len(owners)]
+        sock = socket.create_connection(('127.0.0.1', port))
+        sock.sendall(
+            f'GET /apps/{owner[0]}/users/{owner[1]}/changes HTTP/1.1\r\n'
+            f'Host: 127.0.0.1\r\nAuthorization: Bearer {tokens[owner]}\r\n\r\n'.encode()
+        )
+        sock.setblocking(False)
+        selector.register(sock, selectors.EVENT_READ)
+        sockets.append(sock)
+        started[sock] = time.perf_counter()
+    served = []
+    received = {sock: b'' for sock in sockets}
+    deadline = time.monotonic() + wait
+    pending = len(sockets)
+    while pending and time.monotonic() < deadline:
+        for key, _ in selector.select(timeout=0.1):
+            sock = key.fileobj
+            data = sock.recv(4096)
+            received[sock] += data
+            # Başlıklar ve ilk olay ayrı paketlerde gelebilir
+            if b'retry:' in received[sock] or not data:
+                selector.unregister(sock)
+                pending -= 1
+                if received[sock].startswith(b'HTTP/1.1 200'):
+                    served.append(time.perf_counter() - started[sock])
+    selector.close()
+    return sockets, served
+
+
+def probe(port, owner, token, requests, timeout):
+    """Akışlar açıkken özet rotası; art arda üç zaman aşımında durur."""
+    samples = []
+    failures = 0
+    consecutive = 0
+    for _ in range(requests):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=timeout)
+        start = time.perf_counter()
+        try:
+            connection.request('GET', f'/apps/{owner[0]}/users/{owner[1]}/summary',
+                               headers={'Authorization': f'Bearer {token}'})
+            ok = connection.getresponse().status == 200
+        except OSError:
+            ok = False
+        finally:
+            connection.close()
+        if ok:
+            samples.append(time.perf_counter() - start)
+            consecutive = 0
+        else:
+            failures += 1
+            consecutive += 1
+            if consecutive == 3:
+                break
+    return samples, failures
+
+
+def run(worker_class, database_url, owners, tokens, args):
+    port = free_port()
+    server = start_server(database_url, port, 1, worker_class,
+                          WORKER_CONNECTIONS=str(args.worker_connections))
+    try:
+        time.sleep(0.5)
+        rss_before = worker_rss(server.pid)
+        sockets, served = open_streams(port, owners, tokens, args.streams, args.wait)
+        rss_after = worker_rss(server.pid)
+        samples, failures = probe(port, owners[0], tokens[owners[0]], args.probes, args.probe_timeout)
+        for sock in sockets:
+            sock.close()
+    finally:
+        server.terminate()
+        server.wait(10)
+    return {
+        'streams_requested': args.streams,
+        'streams_served': len(served),
+        'first_event': summarize(served),
+        'worker_rss_mb': rss_after / 2**20,
+        'bytes_per_stream': (rss_after - rss_before) / len(served) if served else None,
+        'summary_while_streaming': summarize(samples),
+        'summary_failures': failures,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--streams', type=int, default=1000)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--worker-connections', type=int, default=2000)
+    parser.add_argument('--wait', type=float, default=10, help='İlk olay için bekleme (sn)')
+    parser.add_argument('--probes', type=int, default=200)
+    parser.add_argument('--probe-timeout', type=float, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = 'sqlite:///' + os.path.join(tmp, 'streams.db')
+        library = seed(database_url, 1, args.users, 2, random.Random(1))
+        keys = KeySet(lambda: parse_keys(KEYS))
+        keys.load()
+        issuer = LocalIssuer(keys)
+        owners = list(library)
+        tokens = {owner: issuer.issue(*owner) for owner in owners}
+        results = {worker_class: run(worker_class, database_url, owners, tokens, args)
+                   for worker_class in ('sync', 'gevent')}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Özet uç noktası: önbellek açık ve kapalıyken p50/p99 gecikme.
+
+    python -m bench.summary_cache --users 200 --books 200 --requests 5000 --write-ratio 0.05
+"""
+import argparse
+import json
+import random
+import time
+
+from sqlalchemy import insert
+
+from kitaptakip.extensions import db
+from kitaptakip.models import Book, new_id, utcnow
+
+from ._common import summarize, temp_app
+
+APP_ID = 'bench'
+
+
+def seed(users, books_per_user):
+    now = utcnow()
+    rows = [
+        {'id': new_id(), 'app_id': APP_ID, 'user_id': f'u{u}', 'title': f'Kitap {b}',
+         'total_pages': 300, 'pages_read': (b * 37) % 320, 'last_page_read': 0, 'created_at': now}
+        for u in range(users) for b in range(books_per_user)
+    ]
+    db.session.execute(insert(Book.__table__), rows)
+    db.session.commit()
+    return {f'u{u}': rows[u * books_per_user]['id'] for u in range(users)}
+
+
+def run(enabled, args):
+    with temp_app(SUMMARY_CACHE_ENABLED=enabled) as app:
+        with app.app_context():
+            first_books = seed(args.users, args.books)
+        client = app.test_client()
+        rng = random.Random(3)
+        users = list(first_books)
+        reads = []
+        for _ in range(args.requests):
+            # Az sayıda kullanıcı trafiğin çoğunu üretir
+            user_id = users[min(int(rng.paretovariate(1.2)) - 1, len(users) - 1)]
+            if rng.random() < args.write_ratio:
+                client.post(f'/apps/{APP_ID}/users/{user_id}/books/{first_books[user_id]}/pages',
+                            json={'pages': 1})
+                continue
+            start = time.perf_counter()
+            client.get(f'/apps/{APP_ID}/users/{user_id}/summary')
+            reads.append(time.perf_counter() - start)
+        result = summarize(reads)
+        cache = app.extensions.get('summary_cache')
+        if cache is not None:
+            result['cache'] = cache.stats()
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--books', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--write-ratio', type=float, default=0.05)
+    args = parser.parse_args()
+    print(json.dumps({'cache_off': run(False, args), 'cache_on': run(True, args)}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Akış halinde NDJSON içe aktarım ve sunucu tarafı imleçle dışa aktarım.
+
+    python -m bench.transfer --rows 1000000
+"""
+import argparse
+import json
+import os
+import resource
+import tempfile
+
+from ._common import Timer, temp_app
+
+URL = '/apps/bench/users/u1/books'
+
+
+def write_ndjson(path, rows):
+    with open(path, 'w', encoding='utf-8') as fh:
+        for i in range(rows):
+            fh.write(json.dumps({'title': f'Kitap {i}', 'totalPages': 100 + i % 900,
+                                 'pagesRead': i % 120}) + '\n')
+
+
+def max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--chunk', type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, temp_app(IMPORT_CHUNK_SIZE=args.chunk) as app:
+        source = os.path.join(tmp, 'books.ndjson')
+        write_ndjson(source, args.rows)
+        client = app.test_client()
+
+        with open(source, 'rb') as fh, Timer() as importing:
+            response = client.post(
+                f'{URL}:import',
+                input_stream=fh,
+                content_type='application/x-ndjson',
+                content_length=os.path.getsize(source),
+            )
+        result = response.get_json()
+        rss_before_export = max_rss_mb()
+
+        exported_bytes = 0
+        exported_rows = 0
+        with Timer() as exporting:
+            response = client.get(f'{URL}:export', buffered=False)
+            for chunk in response.response:
+                exported_bytes += len(chunk)
+                exported_rows += chunk.count(b'\n')
+            response.close()
+
+    print(json.dumps({
+        'rows': args.rows,
+        'imported': result['imported'],
+        'rejected': result['rejected'],
+        'import_seconds': importing.elapsed,
+        'import_rows_per_second': result['imported'] / importing.elapsed,
+        'exported_rows': exported_rows,
+        'export_seconds': exporting.elapsed,
+        'export_mb': exported_bytes / 2**20,
+        'max_rss_mb_before_export': rss_before_export,
+        'max_rss_mb_after_export': max_rss_mb(),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""Yazma arkası tampon: patlamalı sayfa artırımlarında veritabanı yazma sayısı,
+uçtan uca gecikme ve çökme sonrası günlük tekrarı.
+
+Her iş parçacığı bir okuru taklit eder: `--burst` kez art arda "Güncelle"
+(aralarında --gap ms) ve her artırımdan sonra kitabı okur, sonra bekler.
+
+    python -m bench.writebehind --users 8 --bursts 10 --burst 10
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import tempfile
+import threading
+import time
+
+from sqlalchemy import event, func, select
+
+from kitaptakip import create_app
+from kitaptakip.extensions import db
+from kitaptakip.models import ReadingSession
+
+from ._common import summarize
+
+APP_ID = 'bench'
+
+
+def make_app(tmp, enabled, **config):
+    settings = {
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tmp, 'bench.db'),
+        'AUTH_ENABLED': False,
+        'METRICS_ENABLED': False,
+        'WRITE_BEHIND_ENABLED': enabled,
+        'WRITE_BEHIND_JOURNAL_DIR': os.path.join(tmp, 'journal'),
+    }
+    settings.update(config)
+    return create_app(settings)
+
+
+def bursty(enabled, users, bursts, burst, gap, pause, window):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(tmp, enabled, WRITE_BEHIND_WINDOW=window)
+        # Yalnızca yazan işlemler sayılır; artırım isteğinin salt okuyan commit'i değil
+        counts = {'book_updates': 0, 'write_commits': 0}
+        with app.app_context():
+            @event.listens_for(db.engine, 'before_cursor_execute')
+            def count_write(conn, cursor, statement, *args):
+                if statement.startswith('UPDATE books'):
+                    counts['book_updates'] += 1
+                if statement.startswith(('INSERT', 'UPDATE', 'DELETE')):
+                    conn.info['wrote'] = True
+
+            @event.listens_for(db.engine, 'commit')
+            def count_commit(conn):
+                if conn.info.pop('wrote', False):
+                    counts['write_commits'] += 1
+
+            @event.listens_for(db.engine, 'rollback')
+            def reset(conn):
+                conn.info.pop('wrote', None)
+
+        client = app.test_client()
+        books = {}
+        for u in range(users):
+            url = f'/apps/{APP_ID}/users/u{u}/books'
+            books[u] = (url, client.post(url, json={'title': 'Bench', 'totalPages': 10**6}).get_json()['id'])
+        counts.update(book_updates=0, write_commits=0)
+        increments = []
+        reads = []
+        stale = []
+        lock = threading.Lock()
+
+        def reader(u):
+            local_client = app.test_client()
+            url, book_id = books[u]
+            local_inc, local_read, local_stale = [], [], 0
+            expected = 0
+            for _ in range(bursts):
+                for _ in range(burst):
+                    start = time.perf_counter()
+                    local_client.post(f'{url}/{book_id}/pages', json={'pages': 1})
+                    local_inc.append(time.perf_counter() - start)
+                    expected += 1
+                    start = time.perf_counter()
+                    book = local_client.get(f'{url}/{book_id}').get_json()
+                    local_read.append(time.perf_counter() - start)
+                    local_stale += book['pagesRead'] != expected
+                    time.sleep(gap)
+                time.sleep(pause)
+            with lock:
+                increments.extend(local_inc)
+                reads.extend(local_read)
+                stale.append(local_stale)
+
+        threads = [threading.Thread(target=reader, args=(u,)) for u in range(users)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        buffer = app.extensions.get('write_behind')
+        # Kalan tampon boşaltılıp veritabanı doğrulanır
+        if buffer is not None:
+            buffer.flush()
+        with app.app_context():
+            sessions = db.session.scalar(select(func.count()).select_from(ReadingSession))
+        total = users * bursts * burst
+        result = {
+            'increments': total,
+            'book_updates': counts['book_updates'],
+            'write_commits': counts['write_commits'],
+            'updates_per_increment': counts['book_updates'] / total,
+            'stale_reads': sum(stale),
+            'reading_sessions': sessions,
+            'increment_latency': summarize(increments),
+            'read_latency': summarize(reads),
+            'elapsed_s': elapsed,
+        }
+        if buffer is not None:
+            result['buffer'] = buffer.stats()
+            buffer.close()
+        return result
+
+
+def _crash_child(tmp, first, second):
+    app = make_app(tmp, True, WRITE_BEHIND_WINDOW=3600)
+    client = app.test_client()
+    url = f'/apps/{APP_ID}/users/u0/books'
+    book_id = client.post(url, json={'title': 'Bench', 'totalPages': 10**6}).get_json()['id']
+    for _ in range(first):
+        client.post(f'{url}/{book_id}/pages', json={'pages': 1})
+    # İlk kısım veritabanında (işaretiyle), ikinci kısım yalnızca günlükte
+    app.extensions['write_behind'].flush()
+    for _ in range(second):
+        client.post(f'{url}/{book_id}/pages', json={'pages': 1})
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+def crash_recovery(first, second):
+    with tempfile.TemporaryDirectory() as tmp:
+        child = multiprocessing.get_context('fork').Process(target=_crash_child, args=(tmp, first, second))
+        child.start()
+        child.join()
+        started = time.perf_counter()
+        app = make_app(tmp, True)
+        replay_seconds = time.perf_counter() - started
+        client = app.test_client()
+        book = client.get(f'/apps/{APP_ID}/users/u0/books').get_json()['books'][0]
+        with app.app_context():
+            sessions = db.session.scalar(select(func.count()).select_from(ReadingSession))
+        return {
+            'child_exit': child.exitcode,
+            'expected_pages_read': first + second,
+            'pages_read': book['pagesRead'],
+            'reading_sessions': sessions,
+            'replayed': app.extensions['write_behind'].replayed,
+            'journals_left': os.listdir(os.path.join(tmp, 'journal')),
+            'startup_with_replay_s': replay_seconds,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=8)
+    parser.add_argument('--bursts', type=int, default=10)
+    parser.add_argument('--burst', type=int, default=10, help='Patlama başına artırım')
+    parser.add_argument('--gap', type=float, default=0.02, help='Artırımlar arası (sn)')
+    parser.add_argument('--pause', type=float, default=0.3, help='Patlamalar arası (sn)')
+    parser.add_argument('--window', type=float, default=0.2, help='WRITE_BEHIND_WINDOW')
+    args = parser.parse_args()
+    result = {
+        name: bursty(enabled, args.users, args.bursts, args.burst, args.gap, args.pause, args.window)
+        for name, enabled in (('direct', False), ('write_behind', True))
+    }
+    result['crash_recovery'] = crash_recovery(first=50, second=70)
+    print(json.dumps(result, indent=2))
+    recovery = result['crash_recovery']
+    if recovery['pages_read'] != recovery['expected_pages_read'] or result['write_behind']['stale_reads']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
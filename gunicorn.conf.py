@@ -0,0 +1,33 @@
+# gunicorn -c gunicorn.conf.py wsgi:app
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+keepalive = 5
+# WORKER_CLASS=gevent: değişiklik akışları worker'ı tutmaz, diğer rotalar aynı
+# worker'da greenlet olarak çalışır; worker başına en fazla WORKER_CONNECTIONS
+# bağlantı (uygulama havuzu ve akış sınırını aynı değişkenden kurar)
+worker_class = os.environ.get('WORKER_CLASS', 'sync')
+worker_connections = int(os.environ.get('WORKER_CONNECTIONS', 1000))
+# ACCESS_LOG='' erişim günlüğünü kapatır (ör. yük testinde)
+accesslog = os.environ.get('ACCESS_LOG', '-') or None
+# Sync worker'larda uygulama ana süreçte bir kez yüklenip ısıtılır (wsgi.py),
+# worker'lar fork ile hazır başlar. gevent'te monkey-patch içe aktarımlardan
+# önce gelmelidir; orada her worker uygulamayı kendisi yükler
+preload_app = os.environ.get('PRELOAD_APP', '1' if worker_class == 'sync' else '0') == '1'
+
+
+def when_ready(server):
+    if preload_app:
+        # Yüklenmiş nesneler çöp toplayıcının dışında tutulur; ortak sayfalar
+        # worker'larda gc taramasıyla kirlenip kopyalanmaz
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from kitaptakip import startup
+        startup.after_fork(server.app.wsgi())
@@ -0,0 +1,104 @@
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from . import concurrency, ratelimit, replicas, schema, sharding, writebehind
+from .config import Config
+from .extensions import db
+
+
+def _engine_options(config):
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    options = {'pool_pre_ping': True}
+    # Bellek içi SQLite tek bağlantı kullanır; havuz ayarları uygulanmaz
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return options
+    if config['ASYNC_WORKER']:
+        # sqlite3 çağrıları hub'ı bloklar; ikinci bağlantı busy_timeout'ta
+        # beklerken kilidi tutan greenlet çalışamaz, bu yüzden tek bağlantı
+        options.update(
+            pool_size=1 if url.get_backend_name() == 'sqlite' else config['ASYNC_DB_POOL_SIZE'],
+            max_overflow=0,
+            pool_timeout=config['ASYNC_DB_POOL_TIMEOUT'],
+            pool_recycle=config['DB_POOL_RECYCLE'],
+        )
+        return options
+    options.update(
+        pool_size=config['DB_POOL_SIZE'],
+        max_overflow=config['DB_MAX_OVERFLOW'],
+        pool_timeout=config['DB_POOL_TIMEOUT'],
+        pool_recycle=config['DB_POOL_RECYCLE'],
+    )
+    return options
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA busy_timeout=5000')
+    cursor.close()
+
+
+# Uygulama fabrikası; gunicorn "wsgi:app" üzerinden çağırır
+def create_app(config=None):
+    app = Flask(__name__, instance_relative_config=True)
+    app.config.from_object(Config)
+    if config:
+        app.config.update(config)
+    if app.config['ASYNC_WORKER'] is None:
+        app.config['ASYNC_WORKER'] = concurrency.cooperative()
+    if app.config['ASYNC_WORKER']:
+        concurrency.patch_driver(app.config['SQLALCHEMY_DATABASE_URI'])
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', _engine_options(app.config))
+    # Parçalar Flask-SQLAlchemy bind'i olarak açılır; aynı motor ayarlarını alır
+    shards = sharding.parse_shards(app.config['SHARDS'])
+    replica_binds = replicas.bind_names(replicas.parse_replicas(app.config['REPLICAS']))
+    if shards or replica_binds:
+        app.config['SQLALCHEMY_BINDS'] = {
+            **(app.config.get('SQLALCHEMY_BINDS') or {}), **shards, **replica_binds,
+        }
+    app.json.ensure_ascii = False
+
+    db.init_app(app)
+
+    from . import models  # noqa: F401
+    from . import auth, books, metrics, purge, search, stats, summary
+    from .api import bp as api_bp
+    from .changes import ChangeBus
+    from .ops import bp as ops_bp
+
+    max_subscribers = app.config['CHANGE_MAX_SUBSCRIBERS']
+    if max_subscribers is None:
+        max_subscribers = app.config['WORKER_CONNECTIONS'] * 3 // 4 if app.config['ASYNC_WORKER'] else 0
+    app.extensions['change_bus'] = ChangeBus(
+        app,
+        poll_interval=app.config['CHANGE_POLL_INTERVAL'],
+        queue_size=app.config['CHANGE_QUEUE_SIZE'],
+        max_subscribers=max_subscribers,
+        shards=list(shards) or None,
+    )
+    summary.init_app(app)
+    auth.init_app(app)
+
+    app.register_blueprint(api_bp)
+    app.register_blueprint(ops_bp)
+
+    with app.app_context():
+        engines = list(db.engines.values())
+        for engine in engines:
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', _sqlite_pragmas)
+        metrics.init_app(app, engines)
+        ratelimit.init_app(app)
+        # Tablo ve sütun ekleme, doldurma adımları aynı anda açılan worker'larda sırayla
+        with schema.migration_lock(app, db.engine):
+            sharding.init_app(app)
+            books.init_app(app)
+            purge.init_app(app)
+            stats.init_app(app)
+            replicas.init_app(app)
+            writebehind.init_app(app)
+            search.init_app(app)
+
+    return app
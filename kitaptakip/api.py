@@ -0,0 +1,347 @@
+from datetime import datetime, timedelta
+
+from flask import Blueprint, Response, abort, current_app, jsonify, request, stream_with_context
+from werkzeug.exceptions import HTTPException
+
+from . import (
+    auth, batch, books, changes, encoding, ratelimit, replicas, search, sharding, stats, summary,
+    transfer, writebehind,
+)
+from .extensions import db
+from .models import STATUSES, utcnow
+
+bp = Blueprint('api', __name__, url_prefix='/apps/<app_id>/users/<user_id>')
+
+
+@bp.before_request
+def authenticate():
+    app_id, user_id = request.view_args['app_id'], request.view_args['user_id']
+    auth.authenticate(app_id, user_id)
+    ratelimit.check(app_id, user_id)
+    write = request.method not in ('GET', 'HEAD')
+    sharding.route(app_id, user_id, write=write)
+    replicas.route(app_id, user_id, write=write)
+    # Tampondaki artırımlar, ardından gelen diğer yazmalardan ve dışa aktarımdan önce uygulanır
+    if (write and request.endpoint != 'api.increment_pages') or request.endpoint == 'api.export_books':
+        writebehind.drain(app_id, user_id)
+
+
+@bp.after_request
+def add_consistency_token(response):
+    return replicas.add_token(response)
+
+
+@bp.errorhandler(books.ValidationError)
+def handle_validation_error(error):
+    return jsonify(error=str(error)), 400
+
+
+@bp.errorhandler(HTTPException)
+def handle_http_error(error):
+    # Retry-After gibi başlıklar korunur, gövde JSON olur
+    headers = [(key, value) for key, value in error.get_headers() if key != 'Content-Type']
+    return jsonify(error=error.description), error.code, headers
+
+
+def _int_arg(name, default, maximum):
+    value = request.args.get(name, default, type=int)
+    if value is None or value < 1:
+        abort(400, description=f'{name} pozitif bir sayı olmalıdır.')
+    return min(value, maximum)
+
+
+def _json_body():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        abort(400, description='Geçersiz istek gövdesi.')
+    return data
+
+
+# Kullanıcının kitaplarını sayfa sayfa listele; version, değişiklik akışının başlangıç noktasıdır.
+# Accept ile JSON, sütunlu JSON ya da MessagePack; ETag değişiklik sürümünden türetilir
+@bp.get('/books')
+def list_books(app_id, user_id):
+    status = request.args.get('status')
+    if status is not None and status not in STATUSES:
+        abort(400, description='Geçersiz durum filtresi.')
+    sort = request.args.get('sort', 'created')
+    if sort not in books.SORTS:
+        abort(400, description='Geçersiz sıralama.')
+    order = request.args.get('order', 'asc')
+    if order not in ('asc', 'desc'):
+        abort(400, description='Geçersiz sıralama yönü.')
+    limit = _int_arg('limit', 100, 500)
+    mimetype = encoding.negotiate([encoding.JSON, encoding.COLUMNS, encoding.MSGPACK])
+
+    generation = writebehind.generation(app_id, user_id)
+    version = changes.current_version(app_id, user_id)
+    # Tampondaki artırımlar sürüme yansımaz; o sırada etiket verilmez
+    etag = None
+    if not writebehind.buffered(app_id, user_id):
+        etag = encoding.make_etag(version, request.query_string, mimetype)
+        response = encoding.not_modified(etag)
+        if response is not None:
+            return response
+    page, next_cursor = books.list_books(
+        app_id,
+        user_id,
+        status=status,
+        sort=sort,
+        descending=order == 'desc',
+        cursor=request.args.get('cursor'),
+        limit=limit,
+    )
+    writebehind.apply_pending(app_id, user_id, page, generation)
+    found = [book.to_dict() for book in page]
+    if mimetype != encoding.JSON:
+        found = encoding.book_columns(found)
+    return encoding.respond({'books': found, 'nextCursor': next_cursor, 'version': version}, mimetype, etag)
+
+
+# Tahmini bitiş günü önümüzdeki `days` gün içinde olan kitaplar (son okuma hızına göre)
+@bp.get('/books:finishing')
+def finishing_books(app_id, user_id):
+    days = _int_arg('days', 7, 366)
+    limit = _int_arg('limit', 50, 500)
+    today = utcnow().date()
+    generation = writebehind.generation(app_id, user_id)
+    found = books.finishing_books(app_id, user_id, today, today + timedelta(days=days - 1), limit)
+    writebehind.apply_pending(app_id, user_id, found, generation)
+    return jsonify(books=[book.to_dict() for book in found])
+
+
+# Yeni kitap ekle (addDoc yerine)
+@bp.post('/books')
+def add_book(app_id, user_id):
+    data = _json_body()
+    book = books.add_book(app_id, user_id, data.get('title'), data.get('totalPages'))
+    db.session.commit()
+    return jsonify(book.to_dict()), 201
+
+
+# Birden çok ekleme/artırma/silme işlemini tek istekte ve tek işlemde uygula
+@bp.post('/books:batch')
+def apply_batch(app_id, user_id):
+    ops = _json_body().get('ops')
+    if not isinstance(ops, list):
+        abort(400, description='ops bir liste olmalıdır.')
+    if len(ops) > current_app.config['BATCH_MAX_OPS']:
+        abort(413, description='Toplu istekte çok fazla işlem var.')
+    results = batch.apply_batch(app_id, user_id, ops)
+    db.session.commit()
+    return jsonify(results=results)
+
+
+# NDJSON veya CSV gövdesini akış halinde içe aktar
+@bp.post('/books:import')
+def import_books(app_id, user_id):
+    if request.mimetype == 'text/csv':
+        records = transfer.parse_csv(request.stream)
+    elif request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        records = transfer.parse_ndjson(request.stream)
+    else:
+        abort(415, description='İçerik türü application/x-ndjson veya text/csv olmalıdır.')
+    result = transfer.import_books(
+        app_id,
+        user_id,
+        records,
+        chunk_size=current_app.config['IMPORT_CHUNK_SIZE'],
+        max_errors=current_app.config['IMPORT_MAX_ERRORS'],
+    )
+    return jsonify(result)
+
+
+# Kütüphaneyi sunucu tarafı imleçle akış halinde dışa aktar
+@bp.get('/books:export')
+def export_books(app_id, user_id):
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in ('ndjson', 'csv'):
+        abort(400, description='Geçersiz dışa aktarım biçimi.')
+    rows = transfer.iter_books(app_id, user_id, yield_per=current_app.config['EXPORT_YIELD_PER'])
+    if fmt == 'csv':
+        body, mimetype = transfer.export_csv(rows), 'text/csv'
+    else:
+        body, mimetype = transfer.export_ndjson(rows), 'application/x-ndjson'
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=books.{fmt}'},
+    )
+
+
+@bp.get('/books/<book_id>')
+def get_book(app_id, user_id, book_id):
+    generation = writebehind.generation(app_id, user_id)
+    book = books.get_book(app_id, user_id, book_id)
+    if book is None:
+        abort(404, description='Kitap bulunamadı.')
+    writebehind.apply_pending(app_id, user_id, [book], generation)
+    return jsonify(book.to_dict())
+
+
+# Bugün okunan sayfaları ekle (handleUpdatePagesRead yerine, atomik artırım)
+@bp.post('/books/<book_id>/pages')
+def increment_pages(app_id, user_id, book_id):
+    data = _json_body()
+    book = books.increment_pages(app_id, user_id, book_id, data.get('pages'))
+    if book is None:
+        abort(404, description='Kitap bulunamadı.')
+    # commit nesneyi bayatlatır; yanıt RETURNING değerlerinden, yeniden okumadan
+    result = book.to_dict()
+    db.session.commit()
+    return jsonify(result)
+
+
+# Kitabı sil (deleteDoc yerine)
+@bp.delete('/books/<book_id>')
+def delete_book(app_id, user_id, book_id):
+    if not books.delete_book(app_id, user_id, book_id):
+        abort(404, description='Kitap bulunamadı.')
+    db.session.commit()
+    return '', 204
+
+
+# Silmeyi geri al; DELETE_UNDO_SECONDS içinde silinmiş kitap listeye döner
+@bp.post('/books/<book_id>:restore')
+def restore_book(app_id, user_id, book_id):
+    book = books.restore_book(app_id, user_id, book_id)
+    if book is None:
+        abort(404, description='Geri alınabilecek silinmiş kitap bulunamadı.')
+    db.session.commit()
+    return jsonify(book.to_dict())
+
+
+# Başlıkta Türkçe kurallı arama; typeahead=1 ile bellek içi öneri ağacından
+@bp.get('/search')
+def search_books(app_id, user_id):
+    query = request.args.get('q', '').strip()
+    limit = _int_arg('limit', 10, 100)
+    if not query:
+        abort(400, description='Arama metni boş bırakılamaz.')
+    if request.args.get('typeahead') == '1':
+        return jsonify(suggestions=search.suggest_titles(app_id, user_id, query, limit))
+    generation = writebehind.generation(app_id, user_id)
+    found = search.search_books(app_id, user_id, query, limit)
+    writebehind.apply_pending(app_id, user_id, found, generation)
+    return jsonify(books=[book.to_dict() for book in found])
+
+
+# Toplam kitap, okunan sayfa ve biten kitap sayısı (önbellekten)
+@bp.get('/summary')
+def user_summary(app_id, user_id):
+    return jsonify(summary.get_summary(app_id, user_id, min_version=replicas.required_version()))
+
+
+# Bugün okunan sayfalar, günlük grafik, okuma serisi ve haftalık toplamlar
+@bp.get('/stats')
+def reading_stats(app_id, user_id):
+    days = _int_arg('days', 30, 366)
+    weeks = _int_arg('weeks', 8, 53)
+    today = utcnow().date()
+    daily = stats.daily_pages(app_id, user_id, today - timedelta(days=days - 1), today)
+    return jsonify(
+        today={
+            'day': today.isoformat(),
+            'pages': daily[-1].pages if daily and daily[-1].day == today else 0,
+        },
+        daily=[
+            {'day': row.day.isoformat(), 'pages': row.pages, 'sessions': row.sessions}
+            for row in daily
+        ],
+        streak=stats.reading_streak(app_id, user_id, today),
+        weekly=stats.weekly_totals(app_id, user_id, today, weeks),
+    )
+
+
+# Uygulamada ayın en çok sayfa okuyanları; month YYYY-MM (varsayılan bu ay). Başka
+# kullanıcıların kimliği dönmez: yalnızca sıra ve sayfa, ayrıca çağıranın kendi sırası
+@bp.get('/leaderboard')
+def leaderboard(app_id, user_id):
+    limit = _int_arg('limit', 10, 100)
+    value = request.args.get('month')
+    if value is None:
+        month = utcnow().date().replace(day=1)
+    else:
+        try:
+            month = datetime.strptime(value, '%Y-%m').date()
+        except ValueError:
+            abort(400, description='Geçersiz ay; YYYY-MM biçiminde olmalıdır.')
+    readers = []
+    for index, row in enumerate(stats.top_readers(app_id, month, limit)):
+        tied = readers and readers[-1]['pages'] == row.pages
+        readers.append({'rank': readers[-1]['rank'] if tied else index + 1, 'pages': row.pages})
+    own = stats.reader_rank(app_id, user_id, month)
+    return jsonify(
+        month=month.strftime('%Y-%m'),
+        readers=readers,
+        me={'rank': own[0], 'pages': own[1]} if own is not None else None,
+    )
+
+
+# Kitap değişikliklerini SSE ile aktar (onSnapshot yerine, yalnızca farklar).
+# Accept sütunlu JSON ya da MessagePack isterse birikmiş farklar tek yanıtta döner
+@bp.get('/changes')
+def stream_changes(app_id, user_id):
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('since'))
+    since = books.parse_int(last_event_id) if last_event_id is not None else None
+    limit = current_app.config['CHANGE_BACKLOG_LIMIT']
+    heartbeat = current_app.config['CHANGE_HEARTBEAT']
+    mimetype = encoding.negotiate([encoding.EVENT_STREAM, encoding.COLUMNS, encoding.MSGPACK])
+    if mimetype != encoding.EVENT_STREAM:
+        return _change_batch(app_id, user_id, since, limit, mimetype)
+
+    bus = current_app.extensions['change_bus']
+    # Önce abone ol, sonra birikmişi oku; aradaki değişiklik kaybolmaz
+    subscription = bus.subscribe(app_id, user_id)
+    if subscription is None:
+        abort(503, description='Çok fazla açık değişiklik akışı.', retry_after=heartbeat)
+    try:
+        backlog = []
+        if since is None or since < 0:
+            since = changes.current_version(app_id, user_id)
+        else:
+            backlog = [c.to_event() for c in changes.changes_since(app_id, user_id, since, limit + 1)]
+            if len(backlog) > limit:
+                # Çok geride kalan istemci listeyi baştan yüklemeli
+                since = changes.current_version(app_id, user_id)
+                backlog = [{'version': since, 'op': changes.RESET}]
+    except Exception:
+        bus.unsubscribe(subscription)
+        raise
+    sent = {change['version'] for change in backlog}
+
+    def generate():
+        try:
+            yield 'retry: 3000\n\n'
+            for change in backlog:
+                yield changes.format_event(change)
+            while not subscription.closed:
+                change = subscription.get(heartbeat)
+                if change is None:
+                    if not subscription.closed:
+                        yield ': ping\n\n'
+                    continue
+                if change['version'] <= since or change['version'] in sent:
+                    continue
+                yield changes.format_event(change)
+        finally:
+            bus.unsubscribe(subscription)
+
+    return Response(
+        generate(),
+        mimetype=encoding.EVENT_STREAM,
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+def _change_batch(app_id, user_id, since, limit, mimetype):
+    events = []
+    if since is None or since < 0:
+        version = changes.current_version(app_id, user_id)
+    else:
+        events = [c.to_event() for c in changes.changes_since(app_id, user_id, since, limit + 1)]
+        version = events[-1]['version'] if events else since
+        if len(events) > limit:
+            version = changes.current_version(app_id, user_id)
+            events = [{'version': version, 'op': changes.RESET, 'bookId': None}]
+    return encoding.respond({'version': version, 'changes': encoding.event_columns(events)}, mimetype)
@@ -0,0 +1,215 @@
+import threading
+import time
+
+from flask import Blueprint, abort, current_app, g, jsonify, request
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+
+from .cache import MISSING, LRUCache
+
+_SALT = 'kitaptakip.auth'
+
+bp = Blueprint('auth', __name__)
+
+
+class AuthError(ValueError):
+    pass
+
+
+# "kid:gizli,kid:gizli" biçimi; ilk anahtar imzalar, diğerleri yalnızca doğrular
+def parse_keys(value):
+    if not value:
+        return []
+    if not isinstance(value, str):
+        return list(value)
+    keys = []
+    for item in value.split(','):
+        kid, sep, secret = item.strip().partition(':')
+        if not sep or not kid or not secret or '.' in kid:
+            raise RuntimeError(f'Geçersiz AUTH_KEYS girdisi: {kid or item!r}')
+        keys.append((kid, secret))
+    return keys
+
+
+class KeySet:
+    """Süreç içi doğrulama anahtarları.
+
+    loader() [(kid, gizli), ...] döner ve en fazla `refresh` saniyede bir
+    çağrılır; bilinmeyen bir kid gelirse (yeni anahtara geçilmiş olabilir)
+    en erken `min_refresh` saniye sonra yeniden yüklenir. Kaldırılan ya da
+    değişen anahtar on_revoke çağrısıyla bildirilir.
+    """
+
+    def __init__(self, loader, refresh=300.0, min_refresh=5.0, logger=None, clock=time.monotonic):
+        self.loader = loader
+        self.refresh = refresh
+        self.min_refresh = min_refresh
+        self.logger = logger
+        self.clock = clock
+        self.on_revoke = None
+        self._secrets = {}
+        self._serializers = {}
+        self._signing_kid = None
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            self._load()
+
+    def _load(self):
+        self._loaded_at = self.clock()
+        try:
+            keys = list(self.loader())
+            if not keys:
+                raise RuntimeError('Kimlik doğrulama anahtarı tanımlı değil (AUTH_KEYS).')
+        except Exception:
+            if not self._serializers:
+                raise
+            # Kaynak geçici olarak erişilemezse eldeki anahtarlarla devam edilir
+            if self.logger is not None:
+                self.logger.exception('Kimlik doğrulama anahtarları yenilenemedi')
+            return
+        secrets = dict(keys)
+        revoked = any(secrets.get(kid) != secret for kid, secret in self._secrets.items())
+        if secrets != self._secrets:
+            self._serializers = {
+                kid: URLSafeTimedSerializer(secret, salt=_SALT) for kid, secret in secrets.items()
+            }
+            self._secrets = secrets
+        self._signing_kid = keys[0][0]
+        if revoked and self.on_revoke is not None:
+            self.on_revoke()
+
+    def _maybe_reload(self, interval):
+        with self._lock:
+            if self._loaded_at is None or self.clock() - self._loaded_at >= interval:
+                self._load()
+
+    # Süresi dolmuşsa anahtarları yeniler; isabet yolunda yalnızca bir saat okuması
+    def check(self):
+        if self._loaded_at is None or self.clock() - self._loaded_at >= self.refresh:
+            self._maybe_reload(self.refresh)
+
+    def serializer(self, kid):
+        self.check()
+        serializer = self._serializers.get(kid)
+        if serializer is None:
+            self._maybe_reload(self.min_refresh)
+            serializer = self._serializers.get(kid)
+        return serializer
+
+    def signing(self):
+        self.check()
+        kid = self._signing_kid
+        return kid, self._serializers[kid]
+
+
+class TokenVerifier:
+    """İmzalı bearer token'ı doğrular ve sonucu token ömrü boyunca hatırlar.
+
+    Token biçimi "kid.<itsdangerous imzalı [app_id, user_id]>"; doğrulama için
+    veritabanına gidilmez, aynı token ikinci kez HMAC hesaplatmaz.
+    """
+
+    def __init__(self, keys, max_age=3600, memo_size=10000, clock=time.time):
+        self.keys = keys
+        self.max_age = max_age
+        self.clock = clock
+        self.memo = LRUCache(maxsize=memo_size, ttl=max_age)
+        keys.on_revoke = self.memo.clear
+
+    def verify(self, token):
+        # Anahtar kaldırılmışsa yenileme hatırlanan token'ları da siler
+        self.keys.check()
+        entry = self.memo.get(token)
+        if entry is not MISSING:
+            identity, expires_at = entry
+            if expires_at > self.clock():
+                return identity
+            self.memo.delete(token)
+        identity, expires_at = self._verify(token)
+        self.memo.set(token, (identity, expires_at))
+        return identity
+
+    def _verify(self, token):
+        kid, sep, signed = token.partition('.')
+        serializer = self.keys.serializer(kid) if sep else None
+        if serializer is None:
+            raise AuthError('Geçersiz oturum anahtarı.')
+        try:
+            payload, issued_at = serializer.loads(signed, max_age=self.max_age, return_timestamp=True)
+        except SignatureExpired:
+            raise AuthError('Oturum süresi doldu.') from None
+        except BadSignature:
+            raise AuthError('Geçersiz oturum anahtarı.') from None
+        if (not isinstance(payload, list) or len(payload) != 2
+                or not all(isinstance(part, str) and part for part in payload)):
+            raise AuthError('Geçersiz oturum anahtarı.')
+        return tuple(payload), issued_at.timestamp() + self.max_age
+
+
+class LocalIssuer:
+    """signInWithCustomToken/signInAnonymously yerine yerel geliştirme ve testler için token üretir."""
+
+    def __init__(self, keys):
+        self.keys = keys
+
+    def issue(self, app_id, user_id):
+        kid, serializer = self.keys.signing()
+        return f'{kid}.{serializer.dumps([app_id, user_id])}'
+
+
+def _bearer_token():
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() == 'bearer' and token.strip():
+        return token.strip()
+    # EventSource başlık gönderemez; değişiklik akışı token'ı sorgu parametresinden alır
+    if request.endpoint == 'api.stream_changes':
+        return request.args.get('access_token') or None
+    return None
+
+
+# URL'deki appId/userId, token'daki kimlikle eşleşmelidir
+def authenticate(app_id, user_id):
+    verifier = current_app.extensions.get('auth')
+    if verifier is None:
+        return
+    token = _bearer_token()
+    if token is None:
+        abort(401, description='Oturum açmanız gerekiyor.')
+    try:
+        identity = verifier.verify(token)
+    except AuthError as error:
+        abort(401, description=str(error))
+    if identity != (app_id, user_id):
+        abort(403, description='Bu kullanıcının verilerine erişim izniniz yok.')
+    g.identity = identity
+
+
+# Yalnızca AUTH_DEV_ISSUER açıkken kaydedilir; üretimde token'ı kimlik sağlayıcı verir
+@bp.post('/auth/token')
+def issue_token():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        abort(400, description='Geçersiz istek gövdesi.')
+    app_id = data.get('appId')
+    user_id = data.get('userId')
+    if not all(isinstance(part, str) and part for part in (app_id, user_id)):
+        abort(400, description='appId ve userId gerekli.')
+    token = current_app.extensions['auth_issuer'].issue(app_id, user_id)
+    return jsonify(token=token, expiresIn=current_app.config['AUTH_TOKEN_TTL'])
+
+
+def init_app(app):
+    if not app.config['AUTH_ENABLED']:
+        return
+    loader = app.config['AUTH_KEY_LOADER'] or (lambda: parse_keys(app.config['AUTH_KEYS']))
+    keys = KeySet(loader, refresh=app.config['AUTH_KEYS_REFRESH'], logger=app.logger)
+    # Anahtar yoksa uygulama başlamaz
+    keys.load()
+    app.extensions['auth'] = TokenVerifier(
+        keys, max_age=app.config['AUTH_TOKEN_TTL'], memo_size=app.config['AUTH_MEMO_SIZE']
+    )
+    app.extensions['auth_issuer'] = LocalIssuer(keys)
+    if app.config['AUTH_DEV_ISSUER']:
+        app.register_blueprint(bp)
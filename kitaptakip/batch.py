@@ -0,0 +1,187 @@
+import importlib
+import re
+from collections import defaultdict
+
+from sqlalchemy import case, insert, update
+from sqlalchemy.exc import IntegrityError
+
+from . import changes, stats
+from .books import ValidationError, increment_values, tombstone, validate_new_book, validate_pages
+from .extensions import db
+from .models import LIVE, Book, new_id, progress_fields, utcnow
+
+_CLIENT_ID = re.compile(r'^[A-Za-z0-9_-]{1,32}$')
+_NOT_FOUND = {'status': 404, 'error': 'Kitap bulunamadı.'}
+_UPSERT_DIALECTS = ('sqlite', 'postgresql')
+
+
+def _book_id(op):
+    book_id = op.get('bookId')
+    if not isinstance(book_id, str) or not book_id:
+        raise ValidationError('bookId gerekli.')
+    return book_id
+
+
+def apply_batch(app_id, user_id, ops):
+    """Ekleme, artırma ve silme işlemlerini tek işlemde, gruplanmış ifadelerle uygular.
+
+    Sonuç, işlemlerin istemcinin sırasıyla tek tek uygulanmasıyla aynıdır:
+    aynı kitaba dokunan işlemlerin sırası korunur, farklı kitaplara dokunanlar
+    aynı türden işlemlerle tek ifadede birleştirilir. Böylece istemci
+    kimliğiyle eklenen kitap sonraki işlemlerde artırılıp silinebilir, silinen
+    kitaba sonradan gelen artırım 404 alır. Geçersiz işlemler atlanır ve
+    sonuçta ayrı ayrı raporlanır. Commit çağıranındır.
+    """
+    results = [None] * len(ops)
+    groups = []
+    # Türün son grubu ve kitaba son dokunan grup
+    latest = {}
+    touched = {}
+    for index, op in enumerate(ops):
+        try:
+            if not isinstance(op, dict):
+                raise ValidationError('Geçersiz işlem.')
+            kind = op.get('op')
+            if kind == 'add':
+                title, total_pages = validate_new_book(op.get('title'), op.get('totalPages'))
+                book_id = op.get('id') or new_id()
+                if not isinstance(book_id, str) or not _CLIENT_ID.match(book_id):
+                    raise ValidationError('Geçersiz kitap kimliği.')
+                item = (index, book_id, title, total_pages)
+            elif kind == 'increment':
+                item = (index, _book_id(op), validate_pages(op.get('pages')))
+            elif kind == 'delete':
+                item = (index, _book_id(op))
+            else:
+                raise ValidationError('Bilinmeyen işlem türü.')
+        except ValidationError as error:
+            results[index] = {'status': 400, 'error': str(error)}
+            continue
+        book_id = item[1]
+        # Kitaba daha sonraki bir grup dokunduysa öne alınamaz; yeni grup açılır
+        group = latest.get(kind)
+        if group is None or touched.get(book_id, -1) > group:
+            group = latest[kind] = len(groups)
+            groups.append((kind, []))
+        groups[group][1].append(item)
+        touched[book_id] = group
+
+    feed = []
+    for kind, items in groups:
+        _APPLY[kind](app_id, user_id, items, results, feed)
+    changes.record_changes(feed)
+    return results
+
+
+def _insert_new(rows):
+    """Kimliği boşta olan satırları ekler; eklenen kimlikleri döner.
+
+    Kimlik başka bir kullanıcının kitabıyla ya da eşzamanlı aynı kimlikli
+    eklemeyle çakışırsa satır sessizce atlanır (IntegrityError yerine 409).
+    """
+    table = Book.__table__
+    dialect = db.session.get_bind(mapper=Book.__mapper__).dialect.name
+    if dialect in _UPSERT_DIALECTS:
+        stmt = (
+            importlib.import_module(f'sqlalchemy.dialects.{dialect}').insert(table)
+            .on_conflict_do_nothing(index_elements=[table.c.id])
+            .returning(table.c.id)
+        )
+        return set(db.session.scalars(stmt, rows))
+    # ON CONFLICT desteği olmayan veritabanları için satır başına kayıt noktası
+    inserted = set()
+    for row in rows:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(table), row)
+        except IntegrityError:
+            continue
+        inserted.add(row['id'])
+    return inserted
+
+
+def _apply_adds(app_id, user_id, adds, results, feed):
+    rows = {}
+    now = utcnow()
+    for _, book_id, title, total_pages in adds:
+        if book_id in rows:
+            continue
+        rows[book_id] = {
+            'id': book_id, 'app_id': app_id, 'user_id': user_id, 'title': title,
+            'total_pages': total_pages, 'pages_read': 0, 'last_page_read': 0, 'created_at': now,
+        }
+    # Varlık ayrıca sorgulanmaz: yalnızca eklenip eklenmediği bilinir, kimliğin
+    # kime ait olduğu sızmaz
+    inserted = _insert_new(list(rows.values()))
+    for index, book_id, _, _ in adds:
+        if book_id not in inserted:
+            results[index] = {'status': 409, 'error': 'Bu kimlikle bir kitap zaten var.'}
+            continue
+        # Aynı toplu istekte aynı kimlik ikinci kez eklenemez
+        inserted.discard(book_id)
+        payload = Book(**rows[book_id]).to_dict()
+        results[index] = {'status': 201, 'book': payload}
+        feed.append((changes.ADDED, app_id, user_id, book_id, payload))
+
+
+def _apply_increments(app_id, user_id, increments, results, feed):
+    totals = defaultdict(int)
+    for _, book_id, pages in increments:
+        totals[book_id] += pages
+    # Tüm kitaplar tek UPDATE ... SET pages_read = pages_read + CASE id WHEN ... END ile
+    stmt = (
+        update(Book)
+        .where(Book.app_id == app_id, Book.user_id == user_id, Book.id.in_(list(totals)), LIVE)
+        .values(**increment_values(case(totals, value=Book.id, else_=0)))
+        .returning(Book)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    updated = {book.id: book.to_dict() for book in db.session.scalars(stmt)}
+
+    # Her işlemin sonucu, o işleme kadar birikmiş değeri gösterir
+    later = defaultdict(int)
+    sessions = []
+    for index, book_id, pages in reversed(increments):
+        final = updated.get(book_id)
+        if final is None:
+            results[index] = dict(_NOT_FOUND)
+            continue
+        pages_read = final['pagesRead'] - later[book_id]
+        later[book_id] += pages
+        results[index] = {
+            'status': 200,
+            'book': dict(final, pagesRead=pages_read,
+                         lastPageRead=min(pages_read, final['totalPages']),
+                         **progress_fields(pages_read, final['totalPages'])),
+        }
+        if pages > 0:
+            sessions.append({'app_id': app_id, 'user_id': user_id, 'book_id': book_id, 'pages': pages})
+    sessions.reverse()
+    stats.record_sessions(sessions)
+    for book_id, payload in updated.items():
+        feed.append((changes.MODIFIED, app_id, user_id, book_id, payload))
+
+
+def _apply_deletes(app_id, user_id, deletes, results, feed):
+    # Silme mezar taşı yazar (books.delete_book)
+    now = utcnow()
+    stmt = (
+        update(Book)
+        .where(
+            Book.app_id == app_id,
+            Book.user_id == user_id,
+            Book.id.in_(sorted({book_id for _, book_id in deletes})),
+            LIVE,
+        )
+        .values(deleted_at=now)
+        .returning(Book.id)
+        .execution_options(synchronize_session=False)
+    )
+    deleted = set(db.session.scalars(stmt))
+    for index, book_id in deletes:
+        results[index] = {'status': 204} if book_id in deleted else dict(_NOT_FOUND)
+    for book_id in deleted:
+        feed.append((changes.REMOVED, app_id, user_id, book_id, tombstone(now)))
+
+
+_APPLY = {'add': _apply_adds, 'increment': _apply_increments, 'delete': _apply_deletes}
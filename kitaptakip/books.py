@@ -0,0 +1,298 @@
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import case, inspect, or_, select, update
+
+from . import changes, sharding, stats
+from .extensions import db
+from .models import LIVE, LIVE_INDEXES, STATUSES, Book, isoformat, utcnow
+
+SORTS = ('created', 'title', 'progress')
+# Bu hızla on yıldan uzun sürecek bitiş tahmin edilmez
+FORECAST_MAX_DAYS = 3650
+
+
+class ValidationError(ValueError):
+    pass
+
+
+def parse_int(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        try:
+            return int(value.strip())
+        except ValueError:
+            return None
+    return None
+
+
+# handleAddBook ile aynı doğrulama kuralları
+def validate_new_book(title, total_pages):
+    if not isinstance(title, str) or not title.strip() or total_pages in (None, ''):
+        raise ValidationError('Kitap başlığı ve toplam sayfa sayısı boş bırakılamaz.')
+    pages = parse_int(total_pages)
+    if pages is None or pages <= 0:
+        raise ValidationError('Toplam sayfa sayısı pozitif bir sayı olmalıdır.')
+    return title.strip(), pages
+
+
+def _sort_column(sort):
+    if sort == 'title':
+        return Book.title
+    if sort == 'progress':
+        return Book.progress
+    return Book.created_at
+
+
+def _sort_value(book, sort):
+    if sort == 'title':
+        return book.title
+    if sort == 'progress':
+        return book.progress
+    return book.created_at.isoformat()
+
+
+def encode_cursor(sort, descending, value, book_id):
+    raw = json.dumps([sort, descending, value, book_id], ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, sort, descending):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, cursor_descending, value, book_id = json.loads(raw)
+        if cursor_sort != sort or cursor_descending != descending:
+            raise ValueError(cursor)
+        if sort == 'created':
+            value = datetime.fromisoformat(value)
+    except (ValueError, TypeError, binascii.Error):
+        raise ValidationError('Geçersiz imleç.') from None
+    return value, book_id
+
+
+# (sıralama anahtarı, id) üzerinde anahtar kümesi sayfalaması; OFFSET kullanılmaz
+def list_books(app_id, user_id, status=None, sort='created', descending=False, cursor=None,
+               limit=100):
+    column = _sort_column(sort)
+    stmt = select(Book).where(Book.app_id == app_id, Book.user_id == user_id, LIVE)
+    if status is not None:
+        if sort == 'progress':
+            # Durum, ilerlemenin bir aralığıdır; ilerleme indeksi filtreyi de karşılar
+            stmt = stmt.where(*_progress_range(status))
+        else:
+            stmt = stmt.where(Book.status == STATUSES[status])
+    if cursor is not None:
+        value, book_id = decode_cursor(cursor, sort, descending)
+        # (column, id) > (value, id) satır karşılaştırması; ifade indeksinde de aralık taraması olsun
+        # diye column >= value sınırı ayrıca yazılır
+        if descending:
+            stmt = stmt.where(column <= value, or_(column < value, Book.id < book_id))
+        else:
+            stmt = stmt.where(column >= value, or_(column > value, Book.id > book_id))
+    if descending:
+        stmt = stmt.order_by(column.desc(), Book.id.desc())
+    else:
+        stmt = stmt.order_by(column, Book.id)
+    rows = db.session.scalars(stmt.limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort, descending, _sort_value(last, sort), last.id)
+    return rows, next_cursor
+
+
+def _progress_range(status):
+    if status == 'unread':
+        return (Book.progress == 0,)
+    if status == 'finished':
+        return (Book.progress >= 1,)
+    return (Book.progress > 0, Book.progress < 1)
+
+
+# Tahmini bitiş günü [start, end] aralığındaki kitaplar, en yakın önce
+def finishing_books(app_id, user_id, start, end, limit):
+    stmt = (
+        select(Book)
+        .where(
+            Book.app_id == app_id,
+            Book.user_id == user_id,
+            Book.finish_day.between(start.toordinal(), end.toordinal()),
+            LIVE,
+        )
+        .order_by(Book.finish_day, Book.id)
+        .limit(limit)
+    )
+    return db.session.scalars(stmt).all()
+
+
+def get_book(app_id, user_id, book_id):
+    stmt = select(Book).where(
+        Book.id == book_id, Book.app_id == app_id, Book.user_id == user_id, LIVE
+    )
+    return db.session.scalars(stmt).one_or_none()
+
+
+def add_book(app_id, user_id, title, total_pages):
+    title, total_pages = validate_new_book(title, total_pages)
+    book = Book(
+        app_id=app_id,
+        user_id=user_id,
+        title=title,
+        total_pages=total_pages,
+        pages_read=0,
+        last_page_read=0,
+    )
+    db.session.add(book)
+    db.session.flush()
+    changes.record_change(changes.ADDED, app_id, user_id, book.id, book.to_dict())
+    return book
+
+
+def validate_pages(pages):
+    pages = parse_int(pages)
+    if pages is None or pages < 0:
+        raise ValidationError('Okunan sayfa sayısı negatif olamaz.')
+    return pages
+
+
+# SET ifadeleri: pages_read + delta ve LEAST(total_pages, pages_read + delta).
+# CASE hem SQLite hem Postgres'te çalışır.
+def increment_values(delta, today=None):
+    pages_read = Book.pages_read + delta
+    return {
+        'pages_read': pages_read,
+        'last_page_read': case((pages_read > Book.total_pages, Book.total_pages), else_=pages_read),
+        **forecast_values(delta, pages_read, today or utcnow().date()),
+    }
+
+
+# Hafta kovaları kaydırılır ve bitiş günü son iki haftanın hızından tahmin edilir:
+# kalan * gün / sayfa, tamsayı bölmeyle yukarı yuvarlanır. Bugün istemciden değil
+# sunucudan gelir; sütunların eski değerleri kullanıldığından tek UPDATE yeter
+def forecast_values(delta, pages_read, today):
+    week = today - timedelta(days=today.weekday())
+    this_week = Book.week_start == week
+    last_week = Book.week_start == week - timedelta(weeks=1)
+    week_pages = case((this_week, Book.week_pages + delta), else_=delta)
+    prev_week_pages = case((this_week, Book.prev_week_pages), (last_week, Book.week_pages), else_=0)
+    recent = week_pages + prev_week_pages
+    elapsed = today.weekday() + 1
+    days = case((prev_week_pages > 0, elapsed + 7), else_=elapsed)
+    remaining = Book.total_pages - pages_read
+    finish_day = case(
+        (remaining <= 0, None),
+        (recent <= 0, None),
+        (remaining * days > recent * FORECAST_MAX_DAYS, None),
+        else_=today.toordinal() + (remaining * days + recent - 1) // recent,
+    )
+    return {
+        'week_start': week,
+        'week_pages': week_pages,
+        'prev_week_pages': prev_week_pages,
+        'finish_day': finish_day,
+    }
+
+
+# pages_read = pages_read + :n tek bir UPDATE ... RETURNING ile; okuma-yazma turu yok
+def increment_pages(app_id, user_id, book_id, pages):
+    pages = validate_pages(pages)
+    buffer = current_app.extensions.get('write_behind')
+    if buffer is not None:
+        # Yazma arkası: artırım günlüğe ve tampona yazılır, veritabanına birleştirilerek gider
+        return buffer.increment(app_id, user_id, book_id, pages)
+    stmt = (
+        update(Book)
+        .where(Book.id == book_id, Book.app_id == app_id, Book.user_id == user_id, LIVE)
+        .values(**increment_values(pages))
+        .returning(Book)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    book = db.session.scalars(stmt).one_or_none()
+    if book is None:
+        return None
+    if pages > 0:
+        stats.record_sessions(
+            [{'app_id': app_id, 'user_id': user_id, 'book_id': book_id, 'pages': pages}]
+        )
+    changes.record_change(changes.MODIFIED, app_id, user_id, book_id, book.to_dict())
+    return book
+
+
+def undo_window():
+    return timedelta(seconds=current_app.config['DELETE_UNDO_SECONDS'])
+
+
+# Silme olayının yükü; istemci geri alma düğmesini undoUntil'e kadar gösterir
+def tombstone(deleted_at):
+    return {'deletedAt': isoformat(deleted_at), 'undoUntil': isoformat(deleted_at + undo_window())}
+
+
+# Satır silinmez, mezar taşı yazılır; purge.Reaper geri alma penceresinden sonra temizler
+def delete_book(app_id, user_id, book_id):
+    now = utcnow()
+    stmt = (
+        update(Book)
+        .where(Book.id == book_id, Book.app_id == app_id, Book.user_id == user_id, LIVE)
+        .values(deleted_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if db.session.execute(stmt).rowcount == 0:
+        return False
+    changes.record_change(changes.REMOVED, app_id, user_id, book_id, tombstone(now))
+    return True
+
+
+# Geri alma penceresindeki silinmiş kitabı geri getirir; yoksa ya da süre geçtiyse None
+def restore_book(app_id, user_id, book_id):
+    stmt = (
+        update(Book)
+        .where(
+            Book.id == book_id, Book.app_id == app_id, Book.user_id == user_id,
+            Book.deleted_at >= utcnow() - undo_window(),
+        )
+        .values(deleted_at=None)
+        .returning(Book)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    book = db.session.scalars(stmt).one_or_none()
+    if book is None:
+        return None
+    changes.record_change(changes.ADDED, app_id, user_id, book_id, book.to_dict())
+    return book
+
+
+_FORECAST_COLUMNS = {
+    'week_start': 'DATE',
+    'week_pages': 'INTEGER NOT NULL DEFAULT 0',
+    'prev_week_pages': 'INTEGER NOT NULL DEFAULT 0',
+    'finish_day': 'INTEGER',
+}
+
+
+# create_all mevcut tabloya sütun ve indeks eklemez; eski veritabanlarında
+# tahmin sütunları boş açılır, ilk artırımda dolar. deleted_at eklenirken liste
+# indeksleri kısmi olarak yeniden kurulur
+def init_app(app):
+    purge = next(index for index in Book.__table__.indexes if index.name == 'ix_books_deleted_at')
+    for engine in sharding.data_engines(app):
+        with engine.begin() as connection:
+            columns = {column['name'] for column in inspect(connection).get_columns('books')}
+            if 'deleted_at' in columns:
+                continue
+            for name, ddl in _FORECAST_COLUMNS.items():
+                if name not in columns:
+                    connection.exec_driver_sql(f'ALTER TABLE books ADD COLUMN {name} {ddl}')
+            deleted_at = Book.__table__.c.deleted_at.type.compile(dialect=connection.dialect)
+            connection.exec_driver_sql(f'ALTER TABLE books ADD COLUMN deleted_at {deleted_at}')
+            for index in LIVE_INDEXES:
+                # İfade indeksleri yansıtılamadığından checkfirst yerine IF EXISTS
+                connection.exec_driver_sql(f'DROP INDEX IF EXISTS {index.name}')
+                index.create(connection)
+            purge.create(connection)
@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class LRUCache:
+    """Boyut sınırlı, TTL'li, iş parçacığı güvenli süreç içi önbellek."""
+
+    def __init__(self, maxsize=10000, ttl=30.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        # Anahtar başına geçersiz kılma damgası; yükleme sırasında gelen
+        # geçersiz kılmadan sonra eski değerin yazılmasını engeller
+        self._stamps = OrderedDict()
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            value, expires_at = entry
+            if expires_at <= self.clock():
+                del self._data[key]
+                self.misses += 1
+                return MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def stamp(self, key):
+        with self._lock:
+            return self._stamps.get(key, 0)
+
+    def set(self, key, value, stamp=None):
+        with self._lock:
+            if stamp is not None and self._stamps.get(key, 0) != stamp:
+                return False
+            self._data[key] = (value, self.clock() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+            self._counter += 1
+            self._stamps[key] = self._counter
+            self._stamps.move_to_end(key)
+            while len(self._stamps) > self.maxsize:
+                self._stamps.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._stamps.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+            }
+
+
+class SharedCache:
+    """Worker'lar arası paylaşılan katman arayüzü (ör. Redis/Memcached istemcisi).
+
+    Değerler JSON'a çevrilebilir olmalıdır; anahtarlar dizedir.
+    """
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value, ttl):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+
+# Testler ve tek süreçli kurulum için paylaşılan katmanın bellek içi karşılığı
+class InMemorySharedCache(SharedCache):
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= self.clock():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, self.clock() + ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class TieredCache:
+    """Önce süreç içi LRU, sonra isteğe bağlı paylaşılan katman."""
+
+    def __init__(self, local, shared=None):
+        self.local = local
+        self.shared = shared
+        self.shared_hits = 0
+        self.shared_misses = 0
+
+    # Paylaşılan katmana yazma sürümsüzdür: başka bir worker'ın geçersiz
+    # kılmasından önce yüklenmiş eski değer sonradan yazılabilir. `fresh`
+    # verilirse paylaşılan katmandan gelen değer onunla doğrulanır
+    def get_or_load(self, key, loader, fresh=None):
+        value = self.local.get(key)
+        if value is not MISSING:
+            return value
+        stamp = self.local.stamp(key)
+        if self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None and (fresh is None or fresh(value)):
+                self.shared_hits += 1
+                self.local.set(key, value, stamp=stamp)
+                return value
+            self.shared_misses += 1
+        return self._store(key, loader(), stamp)
+
+    def _store(self, key, value, stamp):
+        if self.local.set(key, value, stamp=stamp) and self.shared is not None:
+            self.shared.set(key, value, self.local.ttl)
+        return value
+
+    # Eldeki değeri atlayıp yeniden yükler (ör. değer istenenden eskiyse)
+    def reload(self, key, loader):
+        stamp = self.local.stamp(key)
+        return self._store(key, loader(), stamp)
+
+    def delete(self, key):
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(key)
+
+    def stats(self):
+        stats = self.local.stats()
+        if self.shared is not None:
+            stats.update(shared_hits=self.shared_hits, shared_misses=self.shared_misses)
+        return stats
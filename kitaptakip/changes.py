@@ -0,0 +1,251 @@
+import json
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, insert, or_, select
+from sqlalchemy.orm import Session
+
+from .extensions import db
+from .models import BookChange
+
+ADDED = 'added'
+MODIFIED = 'modified'
+REMOVED = 'removed'
+# Toplu değişiklik; istemci listeyi baştan yükler
+RESET = 'reset'
+
+
+# Değişikliği günlüğe yazar; commit sonrası worker'daki veri yolu uyandırılır
+def record_change(op, app_id, user_id, book_id, book=None):
+    record_changes([(op, app_id, user_id, book_id, book)])
+
+
+def record_changes(changes):
+    rows = [
+        {
+            'app_id': app_id,
+            'user_id': user_id,
+            'book_id': book_id,
+            'op': op,
+            'payload': json.dumps(book, ensure_ascii=False) if book is not None else None,
+        }
+        for op, app_id, user_id, book_id, book in changes
+    ]
+    if not rows:
+        return
+    versions = db.session.scalars(insert(BookChange).returning(BookChange.version), rows).all()
+    # Okuma kopyası belirteci (replicas.add_token) işlemin son sürümüdür
+    db.session.info['version'] = max(versions)
+    db.session.info.setdefault('changed', set()).update(
+        (row['app_id'], row['user_id'], row['op']) for row in rows
+    )
+
+
+def current_version(app_id, user_id):
+    stmt = select(func.max(BookChange.version)).where(
+        BookChange.app_id == app_id, BookChange.user_id == user_id
+    )
+    return db.session.scalar(stmt) or 0
+
+
+def changes_since(app_id, user_id, version, limit):
+    stmt = (
+        select(BookChange)
+        .where(
+            BookChange.app_id == app_id,
+            BookChange.user_id == user_id,
+            BookChange.version > version,
+        )
+        .order_by(BookChange.version)
+        .limit(limit)
+    )
+    return db.session.scalars(stmt).all()
+
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session):
+    changed = session.info.pop('changed', None)
+    if changed and has_app_context():
+        bus = current_app.extensions.get('change_bus')
+        if bus is not None:
+            bus.committed(changed)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _after_rollback(session):
+    session.info.pop('changed', None)
+
+
+class Subscription:
+    def __init__(self, key, maxsize):
+        self.key = key
+        self.closed = False
+        self._queue = queue.Queue(maxsize)
+
+    def put(self, change):
+        try:
+            self._queue.put_nowait(change)
+        except queue.Full:
+            # Yetişemeyen istemci düşürülür; Last-Event-ID ile kaldığı yerden bağlanır
+            self.close()
+
+    def get(self, timeout):
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.closed = True
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+
+class ChangeBus:
+    """Worker başına tek değişiklik veri yolu.
+
+    Tek bir arka plan iş parçacığı book_changes tablosunu (parçalıysa her
+    parçadakini) izler ve olayları (app_id, user_id) aboneliklerine dağıtır;
+    bağlantı başına veritabanı sorgusu yapılmaz.
+    """
+
+    def __init__(self, app, poll_interval=0.5, batch_size=500, queue_size=256, gap_timeout=30.0,
+                 max_subscribers=0, shards=None):
+        self.app = app
+        # Sürümler parça başına ayrı sayılır; imleç ve boşluklar da parça başına
+        self.shards = shards or [None]
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.gap_timeout = gap_timeout
+        self.max_subscribers = max_subscribers
+        self._subscribers = defaultdict(set)
+        self._count = 0
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._cursors = {}
+        # Sıra numarası alınmış ama henüz commit edilmemiş sürümler (Postgres)
+        self._gaps = {}
+
+    # listener(app_id, user_id, op): bu worker'daki commit'te hemen, diğer
+    # worker'lardaki commit'te veri yolu yeni değişikliği okuduğunda çağrılır
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def committed(self, changed):
+        for app_id, user_id, op in changed:
+            self._notify(app_id, user_id, op)
+        self._wake.set()
+
+    def _notify(self, app_id, user_id, op):
+        for listener in self._listeners:
+            try:
+                listener(app_id, user_id, op)
+            except Exception:
+                self.app.logger.exception('Değişiklik dinleyicisi başarısız oldu')
+
+    # Sınır doluysa None döner; her abonelik en fazla queue_size olay biriktirir
+    def subscribe(self, app_id, user_id):
+        self.start()
+        subscription = Subscription((app_id, user_id), self.queue_size)
+        with self._lock:
+            if self.max_subscribers and self._count >= self.max_subscribers:
+                return None
+            self._subscribers[subscription.key].add(subscription)
+            self._count += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.key)
+            if subscribers is not None and subscription in subscribers:
+                subscribers.remove(subscription)
+                self._count -= 1
+                if not subscribers:
+                    del self._subscribers[subscription.key]
+
+    def subscriber_count(self):
+        return self._count
+
+    def wake(self):
+        self._wake.set()
+
+    def publish(self, change):
+        self._notify(change.app_id, change.user_id, change.op)
+        with self._lock:
+            subscribers = tuple(self._subscribers.get((change.app_id, change.user_id), ()))
+        if not subscribers:
+            return
+        event_data = change.to_event()
+        for subscription in subscribers:
+            subscription.put(event_data)
+
+    def start(self):
+        # fork sonrası iş parçacığı kopyalanmaz; her worker kendi döngüsünü başlatır
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._subscribers.clear()
+            self._count = 0
+            # İmleç abonelikten önce alınır; başlangıçtaki değişiklikler kaçmaz
+            for shard in self.shards:
+                with self.app.app_context():
+                    db.session.info['shard'] = shard
+                    self._cursors[shard] = db.session.scalar(select(func.max(BookChange.version))) or 0
+                self._gaps[shard] = {}
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='change-bus', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            for shard in self.shards:
+                try:
+                    with self.app.app_context():
+                        db.session.info['shard'] = shard
+                        while self._poll(shard):
+                            pass
+                except Exception:
+                    self.app.logger.exception('Değişiklik akışı okunamadı')
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def _poll(self, shard):
+        now = time.monotonic()
+        cursor = self._cursors[shard]
+        gaps = self._gaps[shard] = {version: seen for version, seen in self._gaps[shard].items()
+                                    if now - seen < self.gap_timeout}
+        condition = BookChange.version > cursor
+        if gaps:
+            condition = or_(condition, BookChange.version.in_(list(gaps)))
+        stmt = select(BookChange).where(condition).order_by(BookChange.version).limit(self.batch_size)
+        changes = db.session.scalars(stmt).all()
+        for change in changes:
+            if change.version in gaps:
+                del gaps[change.version]
+            elif change.version > cursor:
+                if change.version - cursor <= self.batch_size:
+                    for missing in range(cursor + 1, change.version):
+                        gaps[missing] = now
+                cursor = self._cursors[shard] = change.version
+            self.publish(change)
+        return len(changes) == self.batch_size
+
+
+def format_event(change):
+    return 'id: {version}\nevent: {op}\ndata: {data}\n\n'.format(
+        version=change['version'],
+        op=change['op'],
+        data=json.dumps(change, ensure_ascii=False, separators=(',', ':')),
+    )
@@ -0,0 +1,37 @@
+import sys
+
+from sqlalchemy.engine import make_url
+
+
+# gunicorn'un gevent worker'ı uygulamayı yüklemeden önce monkey-patch uygular;
+# gevent hiç içe aktarılmamışsa bağlantı eşzamanlılığı iş parçacığı başına birdir
+def cooperative():
+    if 'gevent' not in sys.modules:
+        return False
+    from gevent import monkey
+    return monkey.is_module_patched('socket')
+
+
+def _gevent_wait_callback(conn, timeout=None):
+    import psycopg2
+    from gevent.socket import wait_read, wait_write
+
+    while True:
+        state = conn.poll()
+        if state == psycopg2.extensions.POLL_OK:
+            return
+        if state == psycopg2.extensions.POLL_READ:
+            wait_read(conn.fileno(), timeout=timeout)
+        elif state == psycopg2.extensions.POLL_WRITE:
+            wait_write(conn.fileno(), timeout=timeout)
+        else:
+            raise psycopg2.OperationalError(f'Beklenmeyen poll sonucu: {state!r}')
+
+
+# psycopg2 soketi C içinden okur; bekleme geri çağrısı olmadan bir sorgu
+# worker'daki tüm greenlet'leri durdurur (psycogreen'in yaptığı)
+def patch_driver(database_uri):
+    if make_url(database_uri).get_driver_name() != 'psycopg2':
+        return
+    import psycopg2.extensions
+    psycopg2.extensions.set_wait_callback(_gevent_wait_callback)
@@ -0,0 +1,158 @@
+import os
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+
+# Varsayılan yapılandırma; her değer ortam değişkeniyle ezilebilir.
+class Config:
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///kitaptakip.db')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Bağlantı havuzu ayarları (gunicorn worker başına bir havuz)
+    DB_POOL_SIZE = _env_int('DB_POOL_SIZE', 10)
+    DB_MAX_OVERFLOW = _env_int('DB_MAX_OVERFLOW', 20)
+    DB_POOL_TIMEOUT = _env_int('DB_POOL_TIMEOUT', 30)
+    DB_POOL_RECYCLE = _env_int('DB_POOL_RECYCLE', 1800)
+
+    # gevent worker'ı (gunicorn.conf.py, WORKER_CLASS=gevent); None ise
+    # monkey-patch'ten anlaşılır. Greenlet'ler worker başına tek havuzu paylaşır:
+    # taşma bağlantısı açılmaz, havuz bekleyen greenlet'i uyutur
+    ASYNC_WORKER = None
+    ASYNC_DB_POOL_SIZE = _env_int('ASYNC_DB_POOL_SIZE', 10)
+    ASYNC_DB_POOL_TIMEOUT = _env_int('ASYNC_DB_POOL_TIMEOUT', 10)
+    WORKER_CONNECTIONS = _env_int('WORKER_CONNECTIONS', 1000)
+
+    # Kullanıcı bazında yatay bölümleme: SHARDS "ad=url,ad=url". Boşsa tüm veri
+    # SQLALCHEMY_DATABASE_URI'dedir; doluysa o veritabanı yalnızca taşıma
+    # kayıtlarını tutar. SHARD_RING halkadaki parçalar (boş: hepsi); yeni parça
+    # önce SHARDS'a eklenip "flask shards rebalance" ile doldurulur
+    SHARDS = os.environ.get('SHARDS', '')
+    SHARD_RING = os.environ.get('SHARD_RING', '')
+    SHARD_VNODES = _env_int('SHARD_VNODES', 64)
+    # Taşıma kayıtlarının worker'larda yenilenme aralığı (sn)
+    SHARD_REFRESH = float(os.environ.get('SHARD_REFRESH', 2))
+    # Taşınırken donmuş kullanıcıya gelen yazmanın 503'ten önce sunucuda
+    # bekleyebileceği en uzun süre (sn); dondurma 2 * SHARD_REFRESH kadar sürer
+    SHARD_FREEZE_WAIT = float(os.environ.get('SHARD_FREEZE_WAIT', 10))
+    SHARD_ADMIN_THREADS = _env_int('SHARD_ADMIN_THREADS', 8)
+
+    # Okuma kopyaları: "birincil=url,birincil=url"; birincil bir parça adı ya da
+    # tek veritabanı için 'default'. GET istekleri kopyaya, yazmalar birincile
+    # gider; yazma yanıtındaki X-Consistency-Token geri gönderilirse yazmayı
+    # henüz görmeyen kopya atlanır
+    REPLICAS = os.environ.get('REPLICAS', '')
+
+    # Yazma arkası tampon: aynı kitaba gelen sayfa artırımları WRITE_BEHIND_WINDOW
+    # saniye ya da WRITE_BEHIND_MAX_OPS artırım boyunca birleştirilip tek
+    # UPDATE ile yazılır. Artırımlar önce worker'ın günlüğüne (varsayılan
+    # instance/write-behind) eklenir; çöken worker'ın günlüğü açılışta (preload_app
+    # ile fork sonrasında) ve WRITE_BEHIND_REPLAY_INTERVAL sn'de bir oynatılır.
+    # WRITE_BEHIND_FSYNC=1 işletim sistemi çökmesine karşı her satırda fsync yapar.
+    # Bekleyen artırımlar yalnızca aynı worker'daki okumalara eklenir: başka
+    # worker'a düşen okuma artırımı en geç WRITE_BEHIND_WINDOW sn sonra görür.
+    # Kesin okuma-kendi-yazması gereken istemci artırım yanıtındaki değeri kullanır
+    WRITE_BEHIND_ENABLED = os.environ.get('WRITE_BEHIND_ENABLED', '0') == '1'
+    WRITE_BEHIND_WINDOW = float(os.environ.get('WRITE_BEHIND_WINDOW', 0.2))
+    WRITE_BEHIND_MAX_OPS = _env_int('WRITE_BEHIND_MAX_OPS', 100)
+    WRITE_BEHIND_JOURNAL_DIR = os.environ.get('WRITE_BEHIND_JOURNAL_DIR') or None
+    WRITE_BEHIND_JOURNAL_MAX_BYTES = _env_int('WRITE_BEHIND_JOURNAL_MAX_BYTES', 16 << 20)
+    WRITE_BEHIND_FSYNC = os.environ.get('WRITE_BEHIND_FSYNC', '0') == '1'
+    WRITE_BEHIND_REPLAY_INTERVAL = float(os.environ.get('WRITE_BEHIND_REPLAY_INTERVAL', 30))
+
+    # Liste ve değişiklik yanıtları bu boyuttan (bayt) büyükse Accept-Encoding'e
+    # göre brotli ya da gzip ile sıkıştırılır
+    COMPRESS_MIN_SIZE = _env_int('COMPRESS_MIN_SIZE', 1024)
+    COMPRESS_GZIP_LEVEL = _env_int('COMPRESS_GZIP_LEVEL', 6)
+    COMPRESS_BROTLI_QUALITY = _env_int('COMPRESS_BROTLI_QUALITY', 4)
+
+    # Değişiklik akışı (SSE)
+    CHANGE_POLL_INTERVAL = float(os.environ.get('CHANGE_POLL_INTERVAL', 0.5))
+    CHANGE_QUEUE_SIZE = _env_int('CHANGE_QUEUE_SIZE', 256)
+    CHANGE_BACKLOG_LIMIT = _env_int('CHANGE_BACKLOG_LIMIT', 1000)
+    CHANGE_HEARTBEAT = _env_int('CHANGE_HEARTBEAT', 15)
+    # Worker başına açık akış sınırı (0: sınırsız); gevent altında varsayılan
+    # WORKER_CONNECTIONS'ın dörtte üçüdür, kalan bağlantılar diğer rotalara kalır
+    CHANGE_MAX_SUBSCRIBERS = _env_int('CHANGE_MAX_SUBSCRIBERS', None)
+
+    # Gösterge paneli özet önbelleği; SUMMARY_SHARED_CACHE bir SharedCache
+    # nesnesi ya da bellek içi karşılığı için 'memory' olabilir
+    SUMMARY_CACHE_ENABLED = os.environ.get('SUMMARY_CACHE_ENABLED', '1') == '1'
+    SUMMARY_CACHE_SIZE = _env_int('SUMMARY_CACHE_SIZE', 10000)
+    SUMMARY_CACHE_TTL = float(os.environ.get('SUMMARY_CACHE_TTL', 30))
+    SUMMARY_SHARED_CACHE = os.environ.get('SUMMARY_SHARED_CACHE') or None
+
+    # Jeton kovası: kullanıcı (appId, userId) başına saniyede RATE_LIMIT_USER_RATE
+    # istek, en çok RATE_LIMIT_USER_BURST birikir; uygulama (appId) başına ayrı
+    # kova (RATE_LIMIT_APP_RATE=0 kapatır). Kovalar worker içinde LRU ile
+    # tutulur; RATE_LIMIT_STORE paylaşılan bir BucketStore nesnesi olabilir
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', '0') == '1'
+    RATE_LIMIT_USER_RATE = float(os.environ.get('RATE_LIMIT_USER_RATE', 20))
+    RATE_LIMIT_USER_BURST = _env_int('RATE_LIMIT_USER_BURST', 60)
+    RATE_LIMIT_APP_RATE = float(os.environ.get('RATE_LIMIT_APP_RATE', 1000))
+    RATE_LIMIT_APP_BURST = _env_int('RATE_LIMIT_APP_BURST', 2000)
+    RATE_LIMIT_MAX_KEYS = _env_int('RATE_LIMIT_MAX_KEYS', 100000)
+    RATE_LIMIT_STORE = None
+
+    # Kabul denetimi: açık istek ADMISSION_MAX_IN_FLIGHT'a ulaşınca ya da son
+    # pencerenin p99'u hedefi aşınca API istekleri 429 + Retry-After ile atılır.
+    # Açık istek sınırı None ise gevent'te WORKER_CONNECTIONS'ın yarısı, sync'te yok
+    ADMISSION_ENABLED = os.environ.get('ADMISSION_ENABLED', '0') == '1'
+    ADMISSION_MAX_IN_FLIGHT = _env_int('ADMISSION_MAX_IN_FLIGHT', None)
+    ADMISSION_P99_TARGET_MS = float(os.environ.get('ADMISSION_P99_TARGET_MS', 500))
+    ADMISSION_WINDOW = float(os.environ.get('ADMISSION_WINDOW', 1))
+    ADMISSION_MAX_SHED = float(os.environ.get('ADMISSION_MAX_SHED', 0.9))
+
+    # Yazarken öneri ağacı tutulan en fazla kullanıcı sayısı (worker başına)
+    SEARCH_TRIE_USERS = _env_int('SEARCH_TRIE_USERS', 1000)
+
+    # wsgi.py'deki startup.warm_up sonrasında app ile çağrılır (ör. önbellek doldurma)
+    WARMUP_HOOKS = ()
+
+    # Silinen kitap DELETE_UNDO_SECONDS boyunca POST .../books/<id>:restore ile
+    # geri alınabilir. Süresi geçen mezar taşlarını sunucu başına tek worker
+    # (instance/purge.lock) PURGE_HOURS saatlerinde (UTC "2-6"; boş: her zaman)
+    # PURGE_BATCH_SIZE satırlık işlemlerle, aralarında PURGE_INTERVAL sn bekleyerek
+    # siler; iş yokken PURGE_IDLE sn uyur. "flask purge" hepsini hemen siler
+    DELETE_UNDO_SECONDS = _env_int('DELETE_UNDO_SECONDS', 86400)
+    PURGE_ENABLED = os.environ.get('PURGE_ENABLED', '1') == '1'
+    PURGE_HOURS = os.environ.get('PURGE_HOURS', '2-6')
+    PURGE_BATCH_SIZE = _env_int('PURGE_BATCH_SIZE', 500)
+    PURGE_INTERVAL = float(os.environ.get('PURGE_INTERVAL', 1))
+    PURGE_IDLE = float(os.environ.get('PURGE_IDLE', 300))
+
+    # Toplu değişiklik isteğindeki en fazla işlem sayısı
+    BATCH_MAX_OPS = _env_int('BATCH_MAX_OPS', 5000)
+
+    # Toplu içe/dışa aktarım
+    IMPORT_CHUNK_SIZE = _env_int('IMPORT_CHUNK_SIZE', 5000)
+    IMPORT_MAX_ERRORS = _env_int('IMPORT_MAX_ERRORS', 1000)
+    EXPORT_YIELD_PER = _env_int('EXPORT_YIELD_PER', 1000)
+
+    # Bearer token doğrulama; AUTH_KEYS "kid:gizli,kid:gizli" (ilki imzalar).
+    # AUTH_KEY_LOADER, anahtarları dış kaynaktan dönen bir çağrılabilir olabilir
+    AUTH_ENABLED = os.environ.get('AUTH_ENABLED', '1') == '1'
+    AUTH_KEYS = os.environ.get('AUTH_KEYS', '')
+    AUTH_KEY_LOADER = None
+    AUTH_KEYS_REFRESH = float(os.environ.get('AUTH_KEYS_REFRESH', 300))
+    AUTH_TOKEN_TTL = _env_int('AUTH_TOKEN_TTL', 3600)
+    AUTH_MEMO_SIZE = _env_int('AUTH_MEMO_SIZE', 10000)
+    # Yerel geliştirme için POST /auth/token
+    AUTH_DEV_ISSUER = os.environ.get('AUTH_DEV_ISSUER', '0') == '1'
+
+    # İstek/sorgu ölçümleri ve GET /metrics (Prometheus metin biçimi)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 100))
+    N_PLUS_ONE_THRESHOLD = _env_int('N_PLUS_ONE_THRESHOLD', 10)
+    # N > 0 ise her N. istek cProfile ile ölçülür; PROFILE_DIR yoksa sonuç loglanır
+    PROFILE_SAMPLE_RATE = _env_int('PROFILE_SAMPLE_RATE', 0)
+    PROFILE_DIR = os.environ.get('PROFILE_DIR') or None
+    # Yanıta Server-Timing başlığı (süre ve sorgu sayısı) eklenir
+    METRICS_SERVER_TIMING = os.environ.get('METRICS_SERVER_TIMING', '0') == '1'
+
+    # İşletim uçları (/_stats, /metrics, /_shards): OPS_TOKEN doluysa
+    # "Authorization: Bearer <OPS_TOKEN>" ister; boşsa yalnızca vekil sunucu
+    # üzerinden gelmeyen (X-Forwarded-For'suz) yerel istekler yanıtlanır
+    OPS_TOKEN = os.environ.get('OPS_TOKEN') or None
@@ -0,0 +1,91 @@
+import hashlib
+import json
+
+from flask import current_app, request
+
+JSON = 'application/json'
+# Alan başına dizi: {"title": [...], "pagesRead": [...]}; anahtarlar bir kez yazılır
+COLUMNS = 'application/vnd.kitaptakip.columns+json'
+MSGPACK = 'application/msgpack'
+_MSGPACK_ALIASES = ('application/x-msgpack',)
+EVENT_STREAM = 'text/event-stream'
+
+# Sıkı biçimlerde kitap alanları; kullanıcı koleksiyonunda userId tekrar edilmez
+BOOK_FIELDS = (
+    'id', 'title', 'totalPages', 'pagesRead', 'lastPageRead', 'progress', 'status',
+    'estimatedFinish', 'createdAt',
+)
+EVENT_FIELDS = ('version', 'op', 'bookId')
+# Silme olayının yükü (books.tombstone)
+TOMBSTONE_FIELDS = ('deletedAt', 'undoUntil')
+
+
+def negotiate(offers):
+    """Accept başlığına en uygun biçim; başlık yoksa ya da */* ise ilk teklif."""
+    if MSGPACK in offers:
+        offers = [*offers, *_MSGPACK_ALIASES]
+    best = request.accept_mimetypes.best_match(offers, default=offers[0])
+    return MSGPACK if best in _MSGPACK_ALIASES else best
+
+
+def book_columns(books):
+    return {field: [book[field] for book in books] for field in BOOK_FIELDS}
+
+
+# Silme olaylarında kitap alanları, diğerlerinde mezar taşı alanları null'dur
+def event_columns(events):
+    columns = {field: [event[field] for event in events] for field in EVENT_FIELDS}
+    for field in BOOK_FIELDS[1:] + TOMBSTONE_FIELDS:
+        columns[field] = [event['book'].get(field) if event.get('book') else None for event in events]
+    return columns
+
+
+def encode(payload, mimetype):
+    if mimetype == MSGPACK:
+        import msgpack
+        return msgpack.packb(payload, use_bin_type=True)
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+# Eşikten büyük gövde Accept-Encoding'e göre br ya da gzip ile sıkıştırılır
+def _content_coding(size):
+    if size < current_app.config['COMPRESS_MIN_SIZE']:
+        return None
+    return request.accept_encodings.best_match(['br', 'gzip'])
+
+
+def compress(body, coding):
+    # Kodlayıcılar ilk sıkıştırmada yüklenir; çoğu worker yalnızca birini kullanır
+    if coding == 'br':
+        import brotli
+        return brotli.compress(body, quality=current_app.config['COMPRESS_BROTLI_QUALITY'])
+    import gzip
+    return gzip.compress(body, compresslevel=current_app.config['COMPRESS_GZIP_LEVEL'], mtime=0)
+
+
+def respond(payload, mimetype, etag=None):
+    body = encode(payload, mimetype)
+    coding = _content_coding(len(body))
+    if coding is not None:
+        body = compress(body, coding)
+    response = current_app.response_class(body, mimetype=mimetype)
+    if coding is not None:
+        response.headers['Content-Encoding'] = coding
+    response.vary.update(('Accept', 'Accept-Encoding'))
+    if etag is not None:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+# Zayıf ETag: sıkıştırılmış ve sıkıştırılmamış gövde aynı etiketi taşır
+def make_etag(*parts):
+    return hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+
+
+def not_modified(etag):
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = current_app.response_class(status=304)
+    response.set_etag(etag, weak=True)
+    response.vary.update(('Accept', 'Accept-Encoding'))
+    return response
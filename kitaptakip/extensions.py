@@ -0,0 +1,15 @@
+from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+
+
+class RoutingSession(Session):
+    """info['shard'] verilmişse tüm sorgular o parçanın motoruna gider (sharding.use)."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        shard = self.info.get('shard')
+        if shard is not None and bind is None:
+            return self._db.engines[shard]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
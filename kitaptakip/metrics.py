@@ -0,0 +1,294 @@
+import io
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from itertools import count
+
+from flask import request
+from sqlalchemy import event
+
+PREFIX = 'kitaptakip'
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# Sorgu olayında g yerine doğrudan okunur; LocalProxy çözümlemesinden ucuzdur
+_current = ContextVar('kitaptakip_request_metrics', default=None)
+
+
+class Histogram:
+    """Prometheus tarzı sabit kovalı histogram; kilidi Metrics tutar."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{_labels(labels, le=_number(bound))} {cumulative}')
+        lines.append(f'{name}_bucket{_labels(labels, le="+Inf")} {self.count}')
+        lines.append(f'{name}_sum{_labels(labels)} {_number(self.sum)}')
+        lines.append(f'{name}_count{_labels(labels)} {self.count}')
+        return lines
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels, **extra):
+    items = list(labels.items()) + list(extra.items())
+    if not items:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in items) + '}'
+
+
+class _RouteStats:
+    __slots__ = ('duration', 'queries', 'query_time')
+
+    def __init__(self):
+        self.duration = Histogram(REQUEST_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.query_time = Histogram(REQUEST_BUCKETS)
+
+    def observe(self, elapsed, queries, query_time):
+        self.duration.observe(elapsed)
+        self.queries.observe(queries)
+        self.query_time.observe(query_time)
+
+
+class _RequestStats:
+    __slots__ = ('start', 'queries', 'query_time', 'statements', 'profiler')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.query_time = 0.0
+        self.statements = {}
+        self.profiler = None
+
+
+class Metrics:
+    """Worker başına istek ve sorgu ölçümleri.
+
+    Rota süreleri ile istek başına sorgu sayısı/süresi histogramlarda tutulur;
+    aynı ifadeyi bir istekte `n_plus_one` kez çalıştıran rota N+1 olarak
+    işaretlenir. `profile_every` > 0 ise her N. istek cProfile ile ölçülür.
+    """
+
+    def __init__(self, slow_query=0.1, n_plus_one=10, profile_every=0, profile_dir=None,
+                 server_timing=False, logger=None):
+        self.slow_query = slow_query
+        self.n_plus_one = n_plus_one
+        self.profile_every = profile_every
+        self.profile_dir = profile_dir
+        self.server_timing = server_timing
+        self.logger = logger
+        self.routes = defaultdict(_RouteStats)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.slow_queries = 0
+        self.n_plus_one_requests = Counter()
+        self.profiled = 0
+        # Aynı rota/ifade çifti için uyarı bir kez yazılır
+        self._reported = set()
+        self._sequence = count(1)
+        self._lock = threading.Lock()
+
+    # Süre WSGI girişinden başlar (yönlendirme dahil); before_request kancası
+    # Flask'ın kanca başına ensure_sync denetimini de ekleyeceği için kullanılmaz
+    def wrap(self, wsgi_app):
+        def middleware(environ, start_response):
+            stats = _RequestStats()
+            _current.set(stats)
+            if self.profile_every and next(self._sequence) % self.profile_every == 0:
+                # Profil modülleri yalnızca örnekleme açıkken yüklenir
+                import cProfile
+                stats.profiler = cProfile.Profile()
+                stats.profiler.enable()
+            try:
+                return wsgi_app(environ, start_response)
+            finally:
+                # Hata Flask dışına taştıysa after_request çalışmamıştır
+                if _current.get() is stats:
+                    _current.set(None)
+                    if stats.profiler is not None:
+                        stats.profiler.disable()
+        return middleware
+
+    # Flask işlenmeyen hatadan üretilen 500 yanıtında da after_request çağırır;
+    # ayrı bir teardown kancası gerekmez
+    def after_request(self, response):
+        stats = _current.get()
+        if stats is None:
+            return response
+        _current.set(None)
+        elapsed = time.perf_counter() - stats.start
+        if stats.profiler is not None:
+            stats.profiler.disable()
+            self._save_profile(stats.profiler, elapsed)
+        route = request.endpoint or 'unmatched'
+        key = (route, request.method, response.status_code)
+        with self._lock:
+            self.routes[key].observe(elapsed, stats.queries, stats.query_time)
+        if stats.queries >= self.n_plus_one:
+            self._check_repeated(route, stats.statements)
+        if self.server_timing:
+            # Yük testi istek başına sorgu sayısını buradan okur
+            response.headers['Server-Timing'] = (
+                f'app;dur={elapsed * 1000:.3f}, db;dur={stats.query_time * 1000:.3f}, '
+                f'db-queries;desc="{stats.queries}"'
+            )
+        return response
+
+    def _check_repeated(self, route, statements):
+        repeated = [(statement, times) for statement, times in statements.items()
+                    if times >= self.n_plus_one]
+        if not repeated:
+            return
+        with self._lock:
+            self.n_plus_one_requests[route] += 1
+            new = [(statement, times) for statement, times in repeated
+                   if (route, statement) not in self._reported]
+            self._reported.update((route, statement) for statement, _ in new)
+        for statement, times in new:
+            self._warn('Olası N+1: %s aynı sorguyu %d kez çalıştırdı: %s', route, times, statement)
+
+    def record_query(self, statement, elapsed):
+        with self._lock:
+            self.queries.observe(elapsed)
+        if elapsed >= self.slow_query:
+            with self._lock:
+                self.slow_queries += 1
+            # Bağlı parametreler kişisel veri içerebilir; yalnızca ifade yazılır
+            self._warn('Yavaş sorgu (%.1f ms, parametreler gizlendi): %s', elapsed * 1000, statement)
+        stats = _current.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.query_time += elapsed
+            stats.statements[statement] = stats.statements.get(statement, 0) + 1
+
+    def _warn(self, message, *args):
+        if self.logger is not None:
+            self.logger.warning(message, *args)
+
+    def _save_profile(self, profiler, elapsed):
+        with self._lock:
+            self.profiled += 1
+        route = request.endpoint or 'unmatched'
+        if self.profile_dir:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            path = os.path.join(self.profile_dir, f'{route}-{os.getpid()}-{time.time_ns()}.prof')
+            profiler.dump_stats(path)
+            return
+        if self.logger is not None:
+            import pstats
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(25)
+            # Örnekleme açıkça istendiği için varsayılan log düzeyinde de görünür
+            self._warn('Profil %s %s (%.1f ms)\n%s',
+                       request.method, request.path, elapsed * 1000, out.getvalue())
+
+    def render(self):
+        """Prometheus metin biçimi (sürüm 0.0.4)."""
+        with self._lock:
+            routes = [
+                ({'route': route, 'method': method, 'status': status}, stats)
+                for (route, method, status), stats in sorted(self.routes.items())
+            ]
+            lines = []
+            for name, attr, description in (
+                ('http_request_duration_seconds', 'duration', 'İstek süresi.'),
+                ('db_queries_per_request', 'queries', 'İstek başına SQL sorgusu.'),
+                ('db_request_query_seconds', 'query_time', 'İstek başına toplam SQL süresi.'),
+            ):
+                lines += [
+                    f'# HELP {PREFIX}_{name} {description}',
+                    f'# TYPE {PREFIX}_{name} histogram',
+                ]
+                for labels, stats in routes:
+                    lines += getattr(stats, attr).render(f'{PREFIX}_{name}', labels)
+            lines += [
+                f'# HELP {PREFIX}_db_query_duration_seconds Tek SQL sorgusunun süresi.',
+                f'# TYPE {PREFIX}_db_query_duration_seconds histogram',
+            ]
+            lines += self.queries.render(f'{PREFIX}_db_query_duration_seconds', {})
+            lines += [
+                f'# HELP {PREFIX}_db_slow_queries_total Eşiği aşan sorgular.',
+                f'# TYPE {PREFIX}_db_slow_queries_total counter',
+                f'{PREFIX}_db_slow_queries_total {self.slow_queries}',
+                f'# HELP {PREFIX}_n_plus_one_requests_total Aynı sorguyu tekrar tekrar çalıştıran istekler.',
+                f'# TYPE {PREFIX}_n_plus_one_requests_total counter',
+            ]
+            for route, total in sorted(self.n_plus_one_requests.items()):
+                lines.append(f'{PREFIX}_n_plus_one_requests_total{_labels({"route": route})} {total}')
+            lines += [
+                f'# HELP {PREFIX}_profiled_requests_total cProfile ile ölçülen istekler.',
+                f'# TYPE {PREFIX}_profiled_requests_total counter',
+                f'{PREFIX}_profiled_requests_total {self.profiled}',
+            ]
+        return '\n'.join(lines) + '\n'
+
+
+# Motor düzeyindeki before/after_cursor_execute olayları her bağlantıda olay
+# nesneleri kurar (istek başına ~%5); lehçe olayları sorguyu kendisi çalıştırıp
+# süreyi ölçer ve True dönerek varsayılan çağrıyı atlatır
+def _listen_engine(engine, metrics):
+    dialect = engine.dialect
+
+    def do_execute(cursor, statement, parameters, context):
+        start = time.perf_counter()
+        dialect.do_execute(cursor, statement, parameters, context)
+        metrics.record_query(statement, time.perf_counter() - start)
+        return True
+
+    def do_executemany(cursor, statement, parameters, context):
+        start = time.perf_counter()
+        dialect.do_executemany(cursor, statement, parameters, context)
+        metrics.record_query(statement, time.perf_counter() - start)
+        return True
+
+    def do_execute_no_params(cursor, statement, context):
+        start = time.perf_counter()
+        dialect.do_execute_no_params(cursor, statement, context)
+        metrics.record_query(statement, time.perf_counter() - start)
+        return True
+
+    event.listen(dialect, 'do_execute', do_execute)
+    event.listen(dialect, 'do_executemany', do_executemany)
+    event.listen(dialect, 'do_execute_no_params', do_execute_no_params)
+
+
+# db.engines gerektirdiği için uygulama bağlamında çağrılır
+def init_app(app, engines):
+    if not app.config['METRICS_ENABLED']:
+        return
+    metrics = Metrics(
+        slow_query=app.config['SLOW_QUERY_MS'] / 1000,
+        n_plus_one=app.config['N_PLUS_ONE_THRESHOLD'],
+        profile_every=app.config['PROFILE_SAMPLE_RATE'],
+        profile_dir=app.config['PROFILE_DIR'],
+        server_timing=app.config['METRICS_SERVER_TIMING'],
+        logger=app.logger,
+    )
+    app.extensions['metrics'] = metrics
+    app.wsgi_app = metrics.wrap(app.wsgi_app)
+    app.after_request(metrics.after_request)
+    for engine in engines:
+        _listen_engine(engine, metrics)
@@ -0,0 +1,245 @@
+import json
+import os
+import time
+from datetime import date, datetime, timezone
+
+from sqlalchemy import (
+    BigInteger, Date, DateTime, Float, Index, Integer, String, Text, case, cast, literal_column,
+)
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .extensions import db
+from .turkish import fold
+
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# Zaman sıralı 32 karakterlik kimlik: 48 bit milisaniye + 80 bit rastgele.
+# Ekler B-ağacının sonuna düştüğü için indeks sayfaları sıcak kalır.
+def new_id():
+    return f'{time.time_ns() // 1_000_000:012x}{os.urandom(10).hex()}'
+
+
+def isoformat(value):
+    return value.isoformat(timespec='milliseconds') + 'Z' if value else None
+
+
+UNREAD = 0
+IN_PROGRESS = 1
+FINISHED = 2
+STATUSES = {'unread': UNREAD, 'in_progress': IN_PROGRESS, 'finished': FINISHED}
+
+
+# Firestore'daki artifacts/{appId}/users/{userId}/books belgesinin karşılığı
+class Book(db.Model):
+    __tablename__ = 'books'
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True, default=new_id)
+    app_id: Mapped[str] = mapped_column(String(128))
+    user_id: Mapped[str] = mapped_column(String(128))
+    title: Mapped[str] = mapped_column(String(512))
+    # Arama için Türkçe kurallı küçük harfli başlık
+    title_folded: Mapped[str] = mapped_column(
+        String(512), default=lambda context: fold(context.get_current_parameters()['title'])
+    )
+    total_pages: Mapped[int] = mapped_column(Integer)
+    pages_read: Mapped[int] = mapped_column(Integer, default=0)
+    last_page_read: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow)
+    # Son iki haftanın okuma hızı: week_start haftasında ve ondan önceki haftada
+    # okunan sayfalar. Her artırımda aynı UPDATE içinde kaydırılır (books.increment_values)
+    week_start: Mapped[date | None] = mapped_column(Date)
+    week_pages: Mapped[int] = mapped_column(Integer, default=0, server_default='0')
+    prev_week_pages: Mapped[int] = mapped_column(Integer, default=0, server_default='0')
+    # Son okumadaki hıza göre tahmini bitiş günü (date.toordinal()); bitmiş ya da
+    # hiç okunmamış kitapta NULL. Tamsayı olduğundan tahmin SQL'de hesaplanır
+    finish_day: Mapped[int | None] = mapped_column(Integer)
+    # Silinen kitap hemen kaldırılmaz: silinme anı yazılır (mezar taşı), geri alma
+    # penceresi boyunca geri yüklenebilir, sonra arka planda temizlenir (purge)
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime)
+
+    # İfade indeksleriyle eşleşmesi için sabitler bağlı parametre değil, SQL metni olarak yazılır
+    @hybrid_property
+    def progress(self):
+        return self.pages_read / self.total_pages
+
+    @progress.inplace.expression
+    @classmethod
+    def _progress_expression(cls):
+        return cast(cls.pages_read, Float) / cls.total_pages
+
+    @hybrid_property
+    def status(self):
+        if self.pages_read == 0:
+            return UNREAD
+        return FINISHED if self.pages_read >= self.total_pages else IN_PROGRESS
+
+    @status.inplace.expression
+    @classmethod
+    def _status_expression(cls):
+        return case(
+            (cls.pages_read == literal_column('0'), literal_column(str(UNREAD))),
+            (cls.pages_read >= cls.total_pages, literal_column(str(FINISHED))),
+            else_=literal_column(str(IN_PROGRESS)),
+        )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'title': self.title,
+            'totalPages': self.total_pages,
+            'pagesRead': self.pages_read,
+            'lastPageRead': self.last_page_read,
+            **progress_fields(self.pages_read, self.total_pages),
+            'estimatedFinish': date.fromordinal(self.finish_day).isoformat() if self.finish_day else None,
+            'createdAt': isoformat(self.created_at),
+            'userId': self.user_id,
+        }
+
+
+STATUS_NAMES = {value: name for name, value in STATUSES.items()}
+
+
+# Kart için ilerleme oranı ve durum; istemci hesaplamaz
+def progress_fields(pages_read, total_pages):
+    if pages_read == 0:
+        status = UNREAD
+    else:
+        status = FINISHED if pages_read >= total_pages else IN_PROGRESS
+    return {'progress': round(min(pages_read / total_pages, 1.0), 4), 'status': STATUS_NAMES[status]}
+
+
+# Silinmemiş kitaplar. Liste indeksleri bu koşulla kısmidir; planlayıcının onları
+# seçmesi için sorgular aynı ifadeyi içermelidir
+LIVE = Book.deleted_at.is_(None)
+
+
+def _live_index(name, *columns):
+    return Index(name, *columns, sqlite_where=LIVE, postgresql_where=LIVE)
+
+
+# Her sıralama/filtre kendi indeksinden okunur; N. sayfa 1. sayfa kadar ucuzdur.
+# Mezar taşları indekslere girmez, birikmeleri liste sorgusunu yavaşlatmaz
+LIVE_INDEXES = [
+    _live_index('ix_books_app_user_created', Book.app_id, Book.user_id, Book.created_at, Book.id),
+    _live_index('ix_books_app_user_title', Book.app_id, Book.user_id, Book.title, Book.id),
+    _live_index('ix_books_app_user_progress', Book.app_id, Book.user_id, Book.progress, Book.id),
+    _live_index(
+        'ix_books_app_user_status_created',
+        Book.app_id, Book.user_id, Book.status, Book.created_at, Book.id,
+    ),
+    _live_index(
+        'ix_books_app_user_status_title',
+        Book.app_id, Book.user_id, Book.status, Book.title, Book.id,
+    ),
+    # "Bu hafta bitireceklerim": tahmini bitiş günü aralığı
+    _live_index('ix_books_app_user_finish', Book.app_id, Book.user_id, Book.finish_day, Book.id),
+]
+# Temizleyici en eski mezar taşlarını bu küçük indeksten okur
+Index(
+    'ix_books_deleted_at', Book.deleted_at,
+    sqlite_where=Book.deleted_at.is_not(None), postgresql_where=Book.deleted_at.is_not(None),
+)
+
+
+# Salt eklenen okuma kaydı; her sayfa artırımı bir satır üretir
+class ReadingSession(db.Model):
+    __tablename__ = 'reading_sessions'
+
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, 'sqlite'), primary_key=True, autoincrement=True
+    )
+    app_id: Mapped[str] = mapped_column(String(128))
+    user_id: Mapped[str] = mapped_column(String(128))
+    book_id: Mapped[str] = mapped_column(String(32))
+    pages: Mapped[int] = mapped_column(Integer)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow)
+
+    __table_args__ = (
+        Index('ix_reading_sessions_app_user_created', 'app_id', 'user_id', 'created_at'),
+    )
+
+
+# Kullanıcı başına günlük özet; oturum eklemeyle aynı işlemde güncellenir
+class DailyUserStats(db.Model):
+    __tablename__ = 'daily_user_stats'
+
+    app_id: Mapped[str] = mapped_column(String(128), primary_key=True)
+    user_id: Mapped[str] = mapped_column(String(128), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    pages: Mapped[int] = mapped_column(Integer, default=0)
+    sessions: Mapped[int] = mapped_column(Integer, default=0)
+
+
+# Kullanıcı başına aylık toplam (month ayın ilk günü); günlük özetle aynı
+# işlemde güncellenir. (app_id, month, pages) indeksi ayın en çok okuyanlarını
+# tablo taramadan verir
+class MonthlyUserStats(db.Model):
+    __tablename__ = 'monthly_user_stats'
+
+    app_id: Mapped[str] = mapped_column(String(128), primary_key=True)
+    user_id: Mapped[str] = mapped_column(String(128), primary_key=True)
+    month: Mapped[date] = mapped_column(Date, primary_key=True)
+    pages: Mapped[int] = mapped_column(Integer, default=0)
+
+    __table_args__ = (
+        Index('ix_monthly_user_stats_app_month_pages', 'app_id', 'month', 'pages', 'user_id'),
+    )
+
+
+# Kitap değişiklik günlüğü; version, değişiklik akışındaki olay kimliğidir
+class BookChange(db.Model):
+    __tablename__ = 'book_changes'
+
+    version: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, 'sqlite'), primary_key=True, autoincrement=True
+    )
+    app_id: Mapped[str] = mapped_column(String(128))
+    user_id: Mapped[str] = mapped_column(String(128))
+    book_id: Mapped[str] = mapped_column(String(32))
+    op: Mapped[str] = mapped_column(String(16))
+    payload: Mapped[str | None] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow)
+
+    __table_args__ = (
+        Index('ix_book_changes_app_user_version', 'app_id', 'user_id', 'version'),
+        # SQLite'ta silinen en büyük rowid'in yeniden kullanılmasını engeller
+        {'sqlite_autoincrement': True},
+    )
+
+    def to_event(self):
+        return {
+            'version': self.version,
+            'op': self.op,
+            'bookId': self.book_id,
+            'book': json.loads(self.payload) if self.payload else None,
+        }
+
+
+# Yazma arkası tamponun (writebehind) günlüğünden kullanıcı için uygulanmış son
+# sıra numarası; artırımlarla aynı işlemde yazılır, günlük tekrarı bunu atlar
+class WriteBehindMark(db.Model):
+    __tablename__ = 'write_behind_marks'
+
+    journal: Mapped[str] = mapped_column(String(32), primary_key=True)
+    app_id: Mapped[str] = mapped_column(String(128), primary_key=True)
+    user_id: Mapped[str] = mapped_column(String(128), primary_key=True)
+    seq: Mapped[int] = mapped_column(BigInteger)
+
+
+# Başka parçaya taşınan ya da taşınmakta olan kullanıcılar; yalnızca dizin
+# veritabanında (SQLALCHEMY_DATABASE_URI) tutulur, halkadaki yerin önüne geçer
+class ShardMove(db.Model):
+    __tablename__ = 'shard_moves'
+
+    app_id: Mapped[str] = mapped_column(String(128), primary_key=True)
+    user_id: Mapped[str] = mapped_column(String(128), primary_key=True)
+    source: Mapped[str] = mapped_column(String(64))
+    target: Mapped[str] = mapped_column(String(64))
+    state: Mapped[str] = mapped_column(String(16))
+    # Hedefe en son eşitlenen değişiklik sürümü; sonraki eşitleme buradan sürer
+    synced_version: Mapped[int] = mapped_column(BigInteger, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=utcnow, onupdate=utcnow)
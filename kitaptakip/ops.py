@@ -0,0 +1,77 @@
+import hmac
+
+from flask import Blueprint, Response, abort, current_app, jsonify, request
+
+from . import sharding
+
+bp = Blueprint('ops', __name__)
+
+_LOOPBACK = {'127.0.0.1', '::1'}
+
+
+# Sayaçlar ve taşınan kullanıcı kimlikleri dışarıya açık değildir
+@bp.before_request
+def authorize():
+    token = current_app.config['OPS_TOKEN']
+    if token is None:
+        # Vekil sunucu arkasında remote_addr yereldir; yönlendirilen istek dışarıdandır
+        if request.remote_addr not in _LOOPBACK or 'X-Forwarded-For' in request.headers:
+            abort(404)
+        return
+    scheme, _, given = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not hmac.compare_digest(given.strip().encode(), token.encode()):
+        abort(401)
+
+
+# Süreç içi önbellek ve değişiklik veri yolu sayaçları (bu worker için)
+@bp.get('/_stats')
+def process_stats():
+    cache = current_app.extensions.get('summary_cache')
+    verifier = current_app.extensions.get('auth')
+    bus = current_app.extensions['change_bus']
+    replicas = current_app.extensions.get('replicas')
+    write_behind = current_app.extensions.get('write_behind')
+    limiter = current_app.extensions.get('rate_limiter')
+    admission = current_app.extensions.get('admission')
+    reaper = current_app.extensions['reaper']
+    return jsonify(
+        summaryCache=cache.stats() if cache is not None else None,
+        authMemo=verifier.memo.stats() if verifier is not None else None,
+        changeBus={
+            'subscribers': bus.subscriber_count(),
+            'maxSubscribers': bus.max_subscribers or None,
+        },
+        asyncWorker=current_app.config['ASYNC_WORKER'],
+        replicas={
+            'replicaReads': replicas.replica_reads,
+            'primaryFallbacks': replicas.primary_fallbacks,
+        } if replicas is not None else None,
+        writeBehind=write_behind.stats() if write_behind is not None else None,
+        rateLimit=limiter.stats() if limiter is not None else None,
+        admission=admission.stats() if admission is not None else None,
+        purge=reaper.stats() if current_app.config['PURGE_ENABLED'] else None,
+    )
+
+
+# Prometheus kazıma ucu; her gunicorn worker'ı kendi sayaçlarını döner
+@bp.get('/metrics')
+def prometheus_metrics():
+    metrics = current_app.extensions.get('metrics')
+    if metrics is None:
+        abort(404)
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+# Parça başına kullanıcı/kitap sayıları (paralel) ve süren taşımalar
+@bp.get('/_shards')
+def shard_stats():
+    router = current_app.extensions.get('shard_router')
+    if router is None:
+        abort(404)
+    result = sharding.totals(router)
+    result['moves'] = [
+        {'appId': move['app_id'], 'userId': move['user_id'], 'source': move['source'],
+         'target': move['target'], 'state': move['state']}
+        for move in router.moves()
+    ]
+    return jsonify(result)
@@ -0,0 +1,154 @@
+import fcntl
+import os
+import threading
+import time
+
+import click
+from flask import current_app
+from sqlalchemy import delete, select
+
+from . import books, sharding
+from .models import Book, utcnow
+
+
+# "2-6" -> (2, 6): UTC saat aralığı, bitiş hariç; "22-4" gece yarısını aşar. Boşsa None
+def parse_hours(value):
+    value = (value or '').strip()
+    if not value:
+        return None
+    start, _, end = value.partition('-')
+    hours = (int(start), int(end or int(start) + 1))
+    if not all(0 <= hour <= 24 for hour in hours):
+        raise ValueError(f'Geçersiz saat aralığı: {value}')
+    return hours
+
+
+def in_hours(hours, hour):
+    if hours is None:
+        return True
+    start, end = hours
+    return start <= hour < end if start <= end else hour >= start or hour < end
+
+
+def purge_batch(connection, before, limit):
+    """deleted_at'i `before`'dan eski en fazla `limit` mezar taşını siler; silinen sayıyı döner."""
+    table = Book.__table__
+    expired = (
+        select(table.c.id)
+        .where(table.c.deleted_at < before)
+        .order_by(table.c.deleted_at)
+        .limit(limit)
+    )
+    return connection.execute(delete(table).where(table.c.id.in_(expired.scalar_subquery()))).rowcount
+
+
+class Reaper:
+    """Geri alma penceresi geçmiş mezar taşlarını arka planda silen iş parçacığı.
+
+    Sunucu başına kilit dosyasını (flock) alan tek worker çalışır; kilidi
+    tutan ölürse bir sonraki turda başka bir worker alır. Silme yalnızca
+    `hours` saatlerinde, parça başına `batch_size` satırlık kısa işlemlerle ve
+    aralarında `interval` saniye beklenerek yapılır. İş kalmayınca ya da saat
+    dışında `idle` saniye uyunur.
+    """
+
+    def __init__(self, app, lock_path, hours=None, batch_size=500, interval=1.0, idle=300):
+        self.app = app
+        self.lock_path = lock_path
+        self.hours = hours
+        self.batch_size = batch_size
+        self.interval = interval
+        self.idle = idle
+        self.purged = 0
+        self.batches = 0
+        self.last_run = None
+        self._fd = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        # fork sonrası iş parçacığı kopyalanmaz; her worker kendi döngüsünü başlatır
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            # Ana süreçten kalan kilit tanımlayıcısı worker'ın değildir
+            self._fd = None
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='purge', daemon=True)
+            self._thread.start()
+
+    def _acquire(self):
+        if self._fd is not None:
+            return True
+        os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+        fd = os.open(self.lock_path, os.O_WRONLY | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def _run(self):
+        while True:
+            purged = 0
+            try:
+                if self._acquire() and in_hours(self.hours, utcnow().hour):
+                    purged = self.run_once()
+            except Exception:
+                self.app.logger.exception('Silinmiş kitaplar temizlenemedi')
+            time.sleep(self.interval if purged else self.idle)
+
+    def run_once(self):
+        """Her parçada bir toplu silme; toplam silinen satır sayısını döner."""
+        total = 0
+        with self.app.app_context():
+            before = utcnow() - books.undo_window()
+            for engine in sharding.data_engines(self.app):
+                with engine.begin() as connection:
+                    purged = purge_batch(connection, before, self.batch_size)
+                total += purged
+                self.batches += 1
+        self.purged += total
+        self.last_run = utcnow()
+        return total
+
+    def stats(self):
+        return {
+            'holder': self._fd is not None and self._pid == os.getpid(),
+            'purged': self.purged,
+            'batches': self.batches,
+            'lastRun': self.last_run.isoformat() if self.last_run else None,
+        }
+
+
+# Saat aralığı beklenmeden tüm süresi geçmiş mezar taşlarını temizler
+@click.command('purge', help='Geri alma süresi geçmiş silinmiş kitapları temizler.')
+def purge_command():
+    reaper = current_app.extensions['reaper']
+    total = 0
+    while True:
+        purged = reaper.run_once()
+        total += purged
+        if not purged:
+            break
+    click.echo(f'{total} kitap silindi')
+
+
+def init_app(app):
+    reaper = Reaper(
+        app,
+        os.path.join(app.instance_path, 'purge.lock'),
+        hours=parse_hours(app.config['PURGE_HOURS']),
+        batch_size=app.config['PURGE_BATCH_SIZE'],
+        interval=app.config['PURGE_INTERVAL'],
+        idle=app.config['PURGE_IDLE'],
+    )
+    app.extensions['reaper'] = reaper
+    app.cli.add_command(purge_command)
+    if app.config['PURGE_ENABLED']:
+        app.before_request(reaper.start)
@@ -0,0 +1,233 @@
+import json
+import math
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+
+from flask import abort, current_app
+from werkzeug.wrappers import Response
+
+# Yük atma yalnızca API rotalarına uygulanır; /_stats, /metrics açık kalır
+SHED_PREFIX = '/apps/'
+
+
+class BucketStore:
+    """Jeton kovalarının tutulduğu katman arayüzü (ör. Redis'te Lua betiği).
+
+    `take`, verilen kovaların hepsinde `cost` jeton varsa hepsinden düşüp 0
+    döner; yoksa hiçbirinden düşmez ve gereken bekleme süresini (sn) döner.
+    Kovalar (anahtar, saniyedeki jeton, kapasite) üçlüleridir.
+    """
+
+    def take(self, buckets, cost=1):
+        raise NotImplementedError
+
+
+class InMemoryBucketStore(BucketStore):
+    """Worker içi kovalar; en uzun süredir kullanılmayan kova atılır.
+
+    Atılan kova yeniden dolu başlar; boşta kalmış kova zaten dolmuş olacağından
+    `maxsize` etkin kullanıcı sayısının üstündeyse sınır gevşemez.
+    """
+
+    def __init__(self, maxsize=100000, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.clock = clock
+        self.evictions = 0
+        # anahtar -> (jeton, son güncelleme)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, buckets, cost=1):
+        with self._lock:
+            now = self.clock()
+            refreshed = []
+            wait = 0.0
+            for key, rate, burst in buckets:
+                state = self._data.get(key)
+                tokens = burst if state is None else min(burst, state[0] + (now - state[1]) * rate)
+                if tokens < cost:
+                    wait = max(wait, (cost - tokens) / rate)
+                refreshed.append((key, tokens))
+            for key, tokens in refreshed:
+                self._data[key] = (tokens if wait else tokens - cost, now)
+                self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+            return wait
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RateLimiter:
+    """Kullanıcı (appId, userId) ve uygulama (appId) başına jeton kovası."""
+
+    def __init__(self, store, user_rate, user_burst, app_rate=0, app_burst=0):
+        self.store = store
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.app_rate = app_rate
+        self.app_burst = app_burst
+        self.allowed = 0
+        self.limited = 0
+
+    def acquire(self, app_id, user_id):
+        buckets = [(f'user:{app_id}:{user_id}', self.user_rate, self.user_burst)]
+        if self.app_rate:
+            buckets.append((f'app:{app_id}', self.app_rate, self.app_burst))
+        wait = self.store.take(buckets)
+        if wait:
+            self.limited += 1
+        else:
+            self.allowed += 1
+        return wait
+
+    def stats(self):
+        stats = {'allowed': self.allowed, 'limited': self.limited}
+        if isinstance(self.store, InMemoryBucketStore):
+            stats.update(buckets=len(self.store), evictions=self.store.evictions)
+        return stats
+
+
+def _queued_since(environ):
+    # Vekil sunucunun damgası (nginx: X-Request-Start "t=<sn>"); sync worker'da
+    # bekleme soket kuyruğunda geçer ve yalnızca bu damgayla görünür
+    value = environ.get('HTTP_X_REQUEST_START', '')
+    if value.startswith('t='):
+        value = value[2:]
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+class Admission:
+    """Worker genelinde kabul denetimi.
+
+    Açık istek sayısı `max_in_flight`'a ulaşınca yeni API istekleri 429 ile
+    geri çevrilir. Ayrıca her `window` saniyede son isteklerin p99 gecikmesine
+    bakılır: hedefin üstündeyse atma oranı `step` artar (en çok `max_shed`),
+    altındaysa azalır; istekler bu oranla rastgele atılır. Pencerede
+    `min_samples`'tan az istek varsa p99 hesaplanmaz, oran azalır.
+    """
+
+    def __init__(self, max_in_flight=0, p99_target=0.5, window=1.0, max_shed=0.9, step=0.1,
+                 samples=1024, min_samples=20, clock=time.monotonic):
+        self.max_in_flight = max_in_flight
+        self.p99_target = p99_target
+        self.window = window
+        self.max_shed = max_shed
+        self.step = step
+        self.min_samples = min_samples
+        self.clock = clock
+        self.in_flight = 0
+        self.p99 = 0.0
+        self.shed_rate = 0.0
+        self.shed = 0
+        self._samples = deque(maxlen=samples)
+        self._window_end = clock() + window
+        self._lock = threading.Lock()
+
+    def wrap(self, wsgi_app):
+        retry_after = str(max(1, math.ceil(self.window)))
+        body = json.dumps({'error': 'Sunucu yoğun; biraz sonra yeniden deneyin.'}, ensure_ascii=False)
+
+        def middleware(environ, start_response):
+            if not environ.get('PATH_INFO', '').startswith(SHED_PREFIX):
+                return wsgi_app(environ, start_response)
+            start = time.perf_counter()
+            if not self._admit():
+                response = Response(body, status=429, mimetype='application/json',
+                                    headers={'Retry-After': retry_after})
+                return response(environ, start_response)
+            try:
+                # Akış yanıtlarında yalnızca kurulum süresi sayılır
+                return wsgi_app(environ, start_response)
+            finally:
+                elapsed = time.perf_counter() - start
+                queued = _queued_since(environ)
+                if queued is not None:
+                    elapsed = max(elapsed, time.time() - queued)
+                self._release(elapsed)
+        return middleware
+
+    def _admit(self):
+        with self._lock:
+            if self.max_in_flight and self.in_flight >= self.max_in_flight:
+                self.shed += 1
+                return False
+            if self.shed_rate and random.random() < self.shed_rate:
+                self.shed += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def _release(self, elapsed):
+        with self._lock:
+            self.in_flight -= 1
+            self._samples.append(elapsed)
+            now = self.clock()
+            if now < self._window_end:
+                return
+            self._window_end = now + self.window
+            if len(self._samples) < self.min_samples:
+                # Yoğun atmada geçen istek azdır: örnekler sonraki pencereye kalır,
+                # eski p99'a bakılmaz ve oran söner; yoksa en yüksek oranda takılır
+                self.shed_rate = max(0.0, self.shed_rate - self.step)
+                return
+            ordered = sorted(self._samples)
+            self.p99 = ordered[int(0.99 * (len(ordered) - 1))]
+            self._samples.clear()
+            if self.p99 > self.p99_target:
+                self.shed_rate = min(self.max_shed, self.shed_rate + self.step)
+            else:
+                self.shed_rate = max(0.0, self.shed_rate - self.step)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'inFlight': self.in_flight,
+                'p99Ms': self.p99 * 1000,
+                'shedRate': self.shed_rate,
+                'shed': self.shed,
+            }
+
+
+# API isteğinin kimliği doğrulandıktan sonra çağrılır; kova boşsa 429
+def check(app_id, user_id):
+    limiter = current_app.extensions.get('rate_limiter')
+    if limiter is None:
+        return
+    wait = limiter.acquire(app_id, user_id)
+    if wait:
+        abort(429, description='Çok fazla istek; biraz sonra yeniden deneyin.', retry_after=math.ceil(wait))
+
+
+def init_app(app):
+    config = app.config
+    if config['RATE_LIMIT_ENABLED']:
+        store = config['RATE_LIMIT_STORE'] or InMemoryBucketStore(maxsize=config['RATE_LIMIT_MAX_KEYS'])
+        app.extensions['rate_limiter'] = RateLimiter(
+            store,
+            user_rate=config['RATE_LIMIT_USER_RATE'],
+            user_burst=config['RATE_LIMIT_USER_BURST'],
+            app_rate=config['RATE_LIMIT_APP_RATE'],
+            app_burst=config['RATE_LIMIT_APP_BURST'],
+        )
+    if config['ADMISSION_ENABLED']:
+        max_in_flight = config['ADMISSION_MAX_IN_FLIGHT']
+        if max_in_flight is None:
+            # Sync worker'da açık istek hep birdir; sınır yalnızca gevent'te anlamlı
+            max_in_flight = config['WORKER_CONNECTIONS'] // 2 if config['ASYNC_WORKER'] else 0
+        admission = Admission(
+            max_in_flight=max_in_flight,
+            p99_target=config['ADMISSION_P99_TARGET_MS'] / 1000,
+            window=config['ADMISSION_WINDOW'],
+            max_shed=config['ADMISSION_MAX_SHED'],
+        )
+        app.extensions['admission'] = admission
+        # En dışta: atılan istek yönlendirme ve ölçüm katmanlarına girmez
+        app.wsgi_app = admission.wrap(app.wsgi_app)
@@ -0,0 +1,110 @@
+import itertools
+
+from flask import current_app, request
+from sqlalchemy import select
+
+from .extensions import db
+from .models import BookChange
+
+TOKEN_HEADER = 'X-Consistency-Token'
+# Tek veritabanının (parçasız) birincil adı
+DEFAULT = 'default'
+# Değişiklik akışı, veri yolunun izlediği birincilden okumalıdır; kopyadaki
+# geride kalan sürüm, akışta olay kaybına yol açar
+PRIMARY_ENDPOINTS = {'api.stream_changes'}
+
+
+# "birincil=url,birincil=url"; birincil bir parça adı ya da 'default'
+def parse_replicas(value):
+    if not value:
+        return {}
+    if not isinstance(value, str):
+        return {primary: list(urls) for primary, urls in dict(value).items()}
+    replicas = {}
+    for item in value.split(','):
+        primary, sep, url = item.strip().partition('=')
+        if not sep or not primary or not url:
+            raise RuntimeError(f'Geçersiz REPLICAS girdisi: {primary or item!r}')
+        replicas.setdefault(primary, []).append(url)
+    return replicas
+
+
+def bind_names(replicas):
+    """Kopyalar Flask-SQLAlchemy bind'i olarak açılır: {bind adı: url}."""
+    return {
+        f'{primary}.replica{i}': url
+        for primary, urls in replicas.items()
+        for i, url in enumerate(urls)
+    }
+
+
+class ReplicaSet:
+    """Birincil başına okuma kopyaları; sırayla dağıtılır."""
+
+    def __init__(self, replicas):
+        self.binds = {
+            None if primary == DEFAULT else primary: [f'{primary}.replica{i}' for i in range(len(urls))]
+            for primary, urls in replicas.items()
+        }
+        self._counter = itertools.count()
+        self.replica_reads = 0
+        self.primary_fallbacks = 0
+
+    def candidates(self, primary):
+        names = self.binds.get(primary)
+        if not names:
+            return []
+        start = next(self._counter) % len(names)
+        return names[start:] + names[:start]
+
+
+def required_version():
+    """İstemcinin son yazmasının sürümü; belirteç yoksa ya da geçersizse None."""
+    value = request.headers.get(TOKEN_HEADER, '')
+    return int(value) if value.isdigit() else None
+
+
+def _caught_up(app_id, user_id, version):
+    # Sürüm, yazma işleminin son değişiklik satırıdır; kopyada varsa işlemin tamamı vardır
+    stmt = select(BookChange.version).where(
+        BookChange.version == version, BookChange.app_id == app_id, BookChange.user_id == user_id
+    )
+    return db.session.scalar(stmt) is not None
+
+
+# Okumayı kopyaya yönlendirir; sharding.route'tan sonra çağrılır
+def route(app_id, user_id, write=False):
+    replicas = current_app.extensions.get('replicas')
+    if replicas is None or write or request.endpoint in PRIMARY_ENDPOINTS:
+        return
+    primary = db.session.info.get('shard')
+    version = required_version()
+    for bind in replicas.candidates(primary):
+        db.session.info['shard'] = bind
+        if version is None or _caught_up(app_id, user_id, version):
+            replicas.replica_reads += 1
+            return
+    # Yazmasını henüz görmeyen kopyalar atlanır
+    db.session.info['shard'] = primary
+    if version is not None:
+        replicas.primary_fallbacks += 1
+
+
+# Yazma yanıtına, bir sonraki okumada geri gönderilecek belirteç eklenir
+def add_token(response):
+    version = db.session.info.get('version')
+    if version is not None and response.status_code < 400:
+        response.headers[TOKEN_HEADER] = str(version)
+    return response
+
+
+def init_app(app):
+    replicas = parse_replicas(app.config['REPLICAS'])
+    if not replicas:
+        return
+    router = app.extensions.get('shard_router')
+    primaries = set(router.engines) if router is not None else {DEFAULT}
+    unknown = set(replicas) - primaries
+    if unknown:
+        raise RuntimeError(f'REPLICAS bilinmeyen birincil içeriyor: {", ".join(sorted(unknown))}')
+    app.extensions['replicas'] = ReplicaSet(replicas)
@@ -0,0 +1,37 @@
+import contextlib
+import fcntl
+import os
+
+from sqlalchemy import text
+
+# Postgres danışma kilidi anahtarı; başka uygulamalarla çakışmaması için sabit
+ADVISORY_KEY = 0x6B746B70
+
+
+@contextlib.contextmanager
+def migration_lock(app, engine):
+    """Başlangıçtaki şema denetimi ve değişikliklerini worker'lar arasında sıraya koyar.
+
+    create_all, ALTER TABLE ve doldurma adımları önce şemayı okuyup sonra
+    değiştirir; preload_app olmadan aynı anda açılan worker'lar aynı sütunu
+    iki kez eklemeye çalışır ve kaybeden çöker. Sunucu içinde örnek
+    dizinindeki kilit dosyası (flock), Postgres'te ayrıca danışma kilidi
+    tutulur; kilidi alan worker şemayı yeniden okur ve işi yapılmış bulur.
+    """
+    os.makedirs(app.instance_path, exist_ok=True)
+    fd = os.open(os.path.join(app.instance_path, 'schema.lock'), os.O_WRONLY | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        if engine.dialect.name != 'postgresql':
+            yield
+            return
+        with engine.connect() as connection:
+            connection.execute(text('SELECT pg_advisory_lock(:key)'), {'key': ADVISORY_KEY})
+            connection.commit()
+            try:
+                yield
+            finally:
+                connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': ADVISORY_KEY})
+                connection.commit()
+    finally:
+        os.close(fd)
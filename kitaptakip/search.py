@@ -0,0 +1,365 @@
+import bisect
+import threading
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy import bindparam, inspect, select, text, update
+
+from . import sharding
+from .changes import MODIFIED
+from .extensions import db
+from .models import LIVE, Book
+from .turkish import fold, words
+
+# Kullanıcı kimliği FTS içinde tek bir belirteç olarak saklanır; sorgu
+# yalnızca o kullanıcının belge listesiyle kesişir
+_OWNER_SQL = "'o' || hex({row}.app_id || char(31) || {row}.user_id)"
+
+# Dizinde yalnızca silinmemiş kitaplar vardır: mezar taşı yazılınca satır
+# dizinden çıkar, geri alınınca yeniden girer
+_FTS5_DDL = [
+    """CREATE VIRTUAL TABLE books_fts USING fts5(
+        owner, title_folded, content='', prefix='1 2 3',
+        tokenize='unicode61 remove_diacritics 0'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS books_fts_ai AFTER INSERT ON books
+    WHEN new.deleted_at IS NULL BEGIN
+        INSERT INTO books_fts(rowid, owner, title_folded)
+        VALUES (new.rowid, {_OWNER_SQL.format(row='new')}, new.title_folded);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS books_fts_ad AFTER DELETE ON books
+    WHEN old.deleted_at IS NULL BEGIN
+        INSERT INTO books_fts(books_fts, rowid, owner, title_folded)
+        VALUES ('delete', old.rowid, {_OWNER_SQL.format(row='old')}, old.title_folded);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS books_fts_au AFTER UPDATE OF title_folded, deleted_at ON books BEGIN
+        INSERT INTO books_fts(books_fts, rowid, owner, title_folded)
+        SELECT 'delete', old.rowid, {_OWNER_SQL.format(row='old')}, old.title_folded
+        WHERE old.deleted_at IS NULL;
+        INSERT INTO books_fts(rowid, owner, title_folded)
+        SELECT new.rowid, {_OWNER_SQL.format(row='new')}, new.title_folded
+        WHERE new.deleted_at IS NULL;
+    END""",
+]
+_FTS5_TRIGGERS = ('books_fts_ai', 'books_fts_ad', 'books_fts_au')
+
+
+# Eski veritabanlarında title_folded sonradan eklendiği için sütun sırası değişebilir
+_BOOK_COLUMNS = ', '.join(f'books.{column.name}' for column in Book.__table__.columns)
+
+
+def _fts5_phrase(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+class Fts5Search:
+    """SQLite FTS5; son terim önek olarak eşleşir."""
+
+    name = 'fts5'
+
+    def create(self, connection):
+        exists = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts'"
+        ).first()
+        if exists and _stale_triggers(connection):
+            # deleted_at öncesi tetikleyiciler; o sırada mezar taşı olmadığından dizin geçerlidir
+            for trigger in _FTS5_TRIGGERS:
+                connection.exec_driver_sql(f'DROP TRIGGER {trigger}')
+        for ddl in _FTS5_DDL[0 if not exists else 1:]:
+            connection.exec_driver_sql(ddl)
+        if not exists:
+            self.rebuild(connection)
+
+    def drop(self, connection):
+        for trigger in _FTS5_TRIGGERS:
+            connection.exec_driver_sql(f'DROP TRIGGER IF EXISTS {trigger}')
+        connection.exec_driver_sql('DROP TABLE IF EXISTS books_fts')
+
+    # VACUUM rowid'leri değiştirebilir; sonrasında dizin yeniden kurulmalıdır
+    def rebuild(self, connection):
+        connection.exec_driver_sql("INSERT INTO books_fts(books_fts) VALUES ('delete-all')")
+        connection.exec_driver_sql(
+            'INSERT INTO books_fts(rowid, owner, title_folded) '
+            f"SELECT rowid, {_OWNER_SQL.format(row='books')}, title_folded FROM books "
+            'WHERE deleted_at IS NULL'
+        )
+
+    def search(self, app_id, user_id, query, limit):
+        terms = words(query)
+        if not terms:
+            return []
+        owner = 'o' + (app_id + '\x1f' + user_id).encode().hex().upper()
+        match = ' AND '.join(
+            [f'owner : {_fts5_phrase(owner)}']
+            + [f'title_folded : {_fts5_phrase(term)}' for term in terms[:-1]]
+            + [f'title_folded : {_fts5_phrase(terms[-1])} *']
+        )
+        # bm25 sıralaması kısa öneklerde tüm eşleşmeleri puanlar (1M başlıkta
+        # yüzlerce ms); ilk eşleşmeler alınır ve Postgres'teki gibi başlığa göre sıralanır
+        stmt = text(
+            f'SELECT {_BOOK_COLUMNS} FROM ('
+            'SELECT rowid FROM books_fts WHERE books_fts MATCH :match LIMIT :limit) AS hits '
+            'CROSS JOIN books ON books.rowid = hits.rowid '
+            'WHERE books.app_id = :app_id AND books.user_id = :user_id '
+            'ORDER BY books.title_folded'
+        ).columns(*Book.__table__.columns)
+        params = {'match': match, 'app_id': app_id, 'user_id': user_id, 'limit': limit}
+        return db.session.scalars(select(Book).from_statement(stmt), params).all()
+
+
+class PostgresTrigramSearch:
+    """Postgres pg_trgm; önek için text_pattern_ops, kelime içi için GIN trigram indeksi."""
+
+    name = 'pg_trgm'
+
+    def create(self, connection):
+        connection.exec_driver_sql('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        connection.exec_driver_sql(
+            'CREATE INDEX IF NOT EXISTS ix_books_title_folded_trgm '
+            'ON books USING gin (title_folded gin_trgm_ops) WHERE deleted_at IS NULL'
+        )
+        connection.exec_driver_sql(
+            'CREATE INDEX IF NOT EXISTS ix_books_app_user_title_folded '
+            'ON books (app_id, user_id, title_folded text_pattern_ops) WHERE deleted_at IS NULL'
+        )
+
+    def drop(self, connection):
+        pass
+
+    def search(self, app_id, user_id, query, limit):
+        terms = words(query)
+        if not terms:
+            return []
+        stmt = select(Book).where(Book.app_id == app_id, Book.user_id == user_id, LIVE)
+        for term in terms[:-1]:
+            stmt = stmt.where(Book.title_folded.contains(term, autoescape=True))
+        last = terms[-1]
+        stmt = stmt.where(
+            Book.title_folded.startswith(last, autoescape=True)
+            | Book.title_folded.contains(' ' + last, autoescape=True)
+        )
+        return db.session.scalars(stmt.order_by(Book.title_folded).limit(limit)).all()
+
+
+class _Node:
+    __slots__ = ('children', 'top', 'full')
+
+    def __init__(self):
+        self.children = {}
+        self.top = []
+        # Sığmayan kitap oldu: top bu önekin tüm eşleşmeleri değil
+        self.full = False
+
+
+def _matches(title_folded, terms):
+    title_words = words(title_folded)
+    return all(any(word.startswith(term) for word in title_words) for term in terms)
+
+
+class TitleTrie:
+    """Bir kullanıcının başlıkları için kelime öneki ağacı.
+
+    Her düğüm, o önekle başlayan bir kelimesi olan kitaplardan başlık
+    sırasıyla ilk `fanout` tanesini sıralı tutar; sorgu maliyeti kütüphane
+    boyutundan bağımsız, önek uzunluğuyla orantılıdır. Dolu düğümde süzme
+    `limit`'i dolduramazsa search None döner, çağıran veritabanına başvurur.
+    """
+
+    def __init__(self, fanout=50):
+        self.fanout = fanout
+        self.root = _Node()
+
+    def add(self, book_id, title, title_folded):
+        entry = (title_folded, book_id, title)
+        # Aynı öneki paylaşan iki kelime kitabı düğüme iki kez eklemez
+        seen = set()
+        for word in set(words(title_folded)):
+            node = self.root
+            for ch in word:
+                node = node.children.setdefault(ch, _Node())
+                if node in seen:
+                    continue
+                seen.add(node)
+                top = node.top
+                if len(top) < self.fanout:
+                    bisect.insort(top, entry)
+                    continue
+                node.full = True
+                if entry < top[-1]:
+                    bisect.insort(top, entry)
+                    top.pop()
+
+    def search(self, query, limit):
+        terms = words(query)
+        if not terms:
+            return []
+        # En seçici (en uzun) terimle aday bul, diğer terimlerle süz
+        anchor = max(terms, key=len)
+        node = self.root
+        for ch in anchor:
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        others = [term for term in terms if term != anchor]
+        results = []
+        for title_folded, book_id, title in node.top:
+            if _matches(title_folded, others):
+                results.append({'id': book_id, 'title': title})
+                if len(results) == limit:
+                    return results
+        return None if node.full else results
+
+
+class TrieSearch:
+    """Yazarken öneri için süreç içi, kullanıcı başına ağaç önbelleği."""
+
+    name = 'trie'
+
+    def __init__(self, max_users=1000, fanout=50):
+        self.max_users = max_users
+        self.fanout = fanout
+        self._tries = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def create(self, connection):
+        pass
+
+    def drop(self, connection):
+        pass
+
+    def invalidate(self, app_id, user_id, op):
+        # Sayfa artırımı başlıkları değiştirmez; ağaç korunur
+        if op == MODIFIED:
+            return
+        with self._lock:
+            self._generation += 1
+            self._tries.pop((app_id, user_id), None)
+
+    def _trie(self, app_id, user_id):
+        key = (app_id, user_id)
+        with self._lock:
+            trie = self._tries.get(key)
+            if trie is not None:
+                self._tries.move_to_end(key)
+                return trie
+            generation = self._generation
+        # Diğer worker ve sunuculardaki yazmalar ağacı veri yolu üzerinden geçersiz
+        # kılar; yüklemeden önce başlar ki aradaki değişiklik de görülsün
+        current_app.extensions['change_bus'].start()
+        trie = TitleTrie(self.fanout)
+        stmt = (
+            select(Book.id, Book.title, Book.title_folded)
+            .where(Book.app_id == app_id, Book.user_id == user_id, LIVE)
+            .execution_options(yield_per=5000)
+        )
+        for book_id, title, title_folded in db.session.execute(stmt):
+            trie.add(book_id, title, title_folded)
+        with self._lock:
+            # Kurulum sırasında gelen bir geçersiz kılma eski ağacın saklanmasını engeller
+            if generation != self._generation:
+                return trie
+            self._tries[key] = trie
+            while len(self._tries) > self.max_users:
+                self._tries.popitem(last=False)
+        return trie
+
+    def suggest(self, app_id, user_id, query, limit):
+        results = self._trie(app_id, user_id).search(query, limit)
+        if results is None:
+            results = self._scan(app_id, user_id, words(query), limit)
+        return results
+
+    # Ağacın dolu düğümünde kalmayan eşleşmeler için başlık sırasıyla tarama;
+    # LIKE adayları daraltır, kelime öneki kuralı ağaçtaki gibi uygulanır
+    def _scan(self, app_id, user_id, terms, limit):
+        stmt = (
+            select(Book.id, Book.title, Book.title_folded)
+            .where(Book.app_id == app_id, Book.user_id == user_id, LIVE,
+                   *(Book.title_folded.contains(term, autoescape=True) for term in terms))
+            .order_by(Book.title_folded, Book.id)
+            .execution_options(yield_per=500)
+        )
+        results = []
+        with db.session.execute(stmt) as rows:
+            for book_id, title, title_folded in rows:
+                if _matches(title_folded, terms):
+                    results.append({'id': book_id, 'title': title})
+                    if len(results) == limit:
+                        break
+        return results
+
+    def search(self, app_id, user_id, query, limit):
+        ids = [hit['id'] for hit in self.suggest(app_id, user_id, query, limit)]
+        if not ids:
+            return []
+        # Başka worker'daki silme bu ağaca henüz ulaşmamış olabilir
+        found = {book.id: book for book in db.session.scalars(select(Book).where(Book.id.in_(ids), LIVE))}
+        return [found[book_id] for book_id in ids if book_id in found]
+
+
+def _stale_triggers(connection):
+    sql = connection.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'books_fts_au'"
+    ).scalar()
+    return sql is not None and 'deleted_at' not in sql
+
+
+def _has_fts5(connection):
+    options = connection.exec_driver_sql('PRAGMA compile_options').scalars().all()
+    return 'ENABLE_FTS5' in options
+
+
+def _choose_backend(connection, trie):
+    dialect = connection.dialect.name
+    if dialect == 'sqlite' and _has_fts5(connection):
+        return Fts5Search()
+    if dialect == 'postgresql':
+        return PostgresTrigramSearch()
+    return trie
+
+
+def search_books(app_id, user_id, query, limit):
+    return current_app.extensions['search'].search(app_id, user_id, query, limit)
+
+
+def suggest_titles(app_id, user_id, query, limit):
+    return current_app.extensions['search_trie'].suggest(app_id, user_id, query, limit)
+
+
+# create_all mevcut tabloya sütun eklemez; eski veritabanları bir kez doldurulur
+def _missing_title_folded(connection):
+    columns = {column['name'] for column in inspect(connection).get_columns('books')}
+    return 'title_folded' not in columns
+
+
+def _backfill_title_folded(connection):
+    connection.exec_driver_sql('ALTER TABLE books ADD COLUMN title_folded VARCHAR(512)')
+    rows = connection.execute(select(Book.id, Book.title)).all()
+    if rows:
+        connection.execute(
+            update(Book.__table__)
+            .where(Book.__table__.c.id == bindparam('book_id'))
+            .values(title_folded=bindparam('folded')),
+            [{'book_id': book_id, 'folded': fold(title)} for book_id, title in rows],
+        )
+
+
+# Arama arka ucu başlangıçta veritabanına göre seçilir; create_all'dan sonra çağrılır
+def init_app(app):
+    trie = TrieSearch(max_users=app.config['SEARCH_TRIE_USERS'])
+    backend = None
+    # Parçalar aynı veritabanı türündedir; arka uç ilkinden seçilir
+    for engine in sharding.data_engines(app):
+        with engine.begin() as connection:
+            backend = backend or _choose_backend(connection, trie)
+            if _missing_title_folded(connection):
+                # Dizin doldurma sırasında tetiklenmesin; create onu baştan kurar
+                backend.drop(connection)
+                _backfill_title_folded(connection)
+            backend.create(connection)
+    app.extensions['search'] = backend
+    app.extensions['search_trie'] = trie
+    app.extensions['change_bus'].add_listener(trie.invalidate)
+    app.logger.debug('Arama arka ucu: %s', backend.name)
+
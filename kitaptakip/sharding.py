@@ -0,0 +1,541 @@
+import atexit
+import bisect
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import click
+from flask import abort, current_app, has_app_context
+from sqlalchemy import delete, event, func, insert, select, text, update
+from sqlalchemy.orm import Session
+
+from .changes import RESET
+from .extensions import db
+from .models import (
+    LIVE, Book, BookChange, DailyUserStats, MonthlyUserStats, ReadingSession, ShardMove,
+    WriteBehindMark, utcnow,
+)
+
+# Taşıma aşamaları: COPY ve DUAL'da okuma/yazma kaynakta (DUAL'da yazmalar
+# commit sonrası hedefe de uygulanır), FROZEN'da yazmalar sunucuda bekler
+# (SHARD_FREEZE_WAIT aşılırsa 503), MOVED'da her şey hedefte
+COPY = 'copy'
+DUAL = 'dual'
+FROZEN = 'frozen'
+MOVED = 'moved'
+# Donmuş kullanıcıya gelen yazmanın taşıma kaydını yeniden okuma aralığı (sn)
+FREEZE_POLL = 0.05
+
+# Kullanıcı verisi; her parçada aynı şema, dizin veritabanında yalnızca shard_moves
+SHARDED_TABLES = [Book.__table__, ReadingSession.__table__, DailyUserStats.__table__,
+                  MonthlyUserStats.__table__, BookChange.__table__, WriteBehindMark.__table__]
+
+_CHUNK = 500
+
+
+# "ad=url,ad=url" biçimi; ad halkadaki konumu belirler, url değişebilir
+def parse_shards(value):
+    if not value:
+        return {}
+    if not isinstance(value, str):
+        return dict(value)
+    shards = {}
+    for item in value.split(','):
+        name, sep, url = item.strip().partition('=')
+        if not sep or not name or not url:
+            raise RuntimeError(f'Geçersiz SHARDS girdisi: {name or item!r}')
+        shards[name] = url
+    return shards
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """Tutarlı karma halkası; parça eklemek anahtarların yalnızca ~1/N'ini yer değiştirir."""
+
+    def __init__(self, names, vnodes=64):
+        points = sorted((_hash(f'{name}#{i}'), name) for name in names for i in range(vnodes))
+        self._points = [point for point, _ in points]
+        self._names = [name for _, name in points]
+
+    def node(self, app_id, user_id):
+        index = bisect.bisect(self._points, _hash(f'{app_id}\x1f{user_id}'))
+        return self._names[index % len(self._names)]
+
+
+class ShardRouter:
+    """(app_id, user_id) -> parça adı.
+
+    Yer halkadan hesaplanır; shard_moves kayıtları (taşınan kullanıcılar) en
+    fazla `refresh` saniyede bir dizin veritabanından okunup halkanın önüne
+    geçer. Taşıma her aşama arasında 2 * refresh bekler, böylece tüm
+    worker'lar yeni aşamayı görmüş olur.
+    """
+
+    def __init__(self, app, directory, engines, ring, refresh=2.0, threads=8, clock=time.monotonic):
+        self.app = app
+        self.directory = directory
+        self.engines = engines
+        self.ring = ring
+        self.refresh = refresh
+        self.threads = threads
+        self.clock = clock
+        self._moves = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pool_pid = None
+
+    @property
+    def shards(self):
+        return list(self.engines)
+
+    def load(self):
+        with self._lock:
+            self._load()
+
+    def _load(self):
+        self._loaded_at = self.clock()
+        try:
+            with self.directory.connect() as connection:
+                rows = connection.execute(select(ShardMove)).mappings().all()
+        except Exception:
+            # Dizin geçici olarak erişilemezse bilinen taşımalarla devam edilir
+            self.app.logger.exception('Parça taşıma kayıtları okunamadı')
+            return
+        self._moves = {(row['app_id'], row['user_id']): row for row in rows}
+
+    def check(self):
+        if self._loaded_at is None or self.clock() - self._loaded_at >= self.refresh:
+            with self._lock:
+                if self._loaded_at is None or self.clock() - self._loaded_at >= self.refresh:
+                    self._load()
+
+    def moves(self):
+        self.check()
+        return list(self._moves.values())
+
+    # (parça, taşıma kaydı ya da None)
+    def locate(self, app_id, user_id):
+        self.check()
+        move = self._moves.get((app_id, user_id))
+        if move is None:
+            return self.ring.node(app_id, user_id), None
+        return (move['target'] if move['state'] == MOVED else move['source']), move
+
+    def confirm(self, app_id, user_id, shard):
+        """COPY ya da DUAL'da `shard`'a yönlendirilmiş yazmayı commit öncesi denetler.
+
+        Taşıma kaydı yeniden okunur. move_user dondurmadan sonra son eşitlemeye
+        kadar 2 * refresh bekler; yazma ancak dondurmanın ilk 1.5 * refresh'i
+        içinde commit edilirse son eşitlemeye yetişir. Daha geç commit kaynakta
+        kalır ve kaynakla birlikte silinirdi, bu yüzden reddedilir.
+        """
+        self.load()
+        current, move = self.locate(app_id, user_id)
+        if current != shard:
+            return False
+        if move is None or move['state'] in (COPY, DUAL):
+            return True
+        grace = timedelta(seconds=1.5 * self.refresh)
+        return move['state'] == FROZEN and utcnow() - move['updated_at'] < grace
+
+    def replicate(self, app_id, user_id):
+        """DUAL aşamasında commit edilen yazmayı hedefe de uygular."""
+        move = self._moves.get((app_id, user_id))
+        if move is None or move['state'] not in (DUAL, FROZEN):
+            return
+        try:
+            version = sync_user(self.engines[move['source']], self.engines[move['target']],
+                                app_id, user_id, since=move['synced_version'])
+        except Exception:
+            # Kaçan yazmayı dondurma sonrası son eşitleme taşır
+            self.app.logger.exception('Çift yazma başarısız: %s/%s', app_id, user_id)
+            return
+        # Sonraki çift yazmalar yalnızca bu sürümden sonrasını kopyalar
+        moves = ShardMove.__table__
+        with self.directory.begin() as connection:
+            connection.execute(
+                update(moves)
+                .where(_owner(moves, app_id, user_id), moves.c.state == move['state'],
+                       moves.c.synced_version < version)
+                .values(synced_version=version, updated_at=moves.c.updated_at)
+            )
+        with self._lock:
+            current = self._moves.get((app_id, user_id))
+            if current is not None and current['synced_version'] < version:
+                self._moves[(app_id, user_id)] = {**current, 'synced_version': version}
+
+    def map_shards(self, fn):
+        """fn(shard) her parçada ayrı iş parçacığında ve uygulama bağlamında çalışır."""
+        def run(shard):
+            with self.app.app_context():
+                use(shard)
+                return fn(shard)
+
+        return dict(zip(self.engines, self._executor().map(run, self.engines)))
+
+    # Havuz süreç başına bir kez kurulur; fork'tan önce açılmış havuzun iş
+    # parçacıkları worker'a geçmediğinden süreç değişince yenisi açılır
+    def _executor(self):
+        if self._pool is None or self._pool_pid != os.getpid():
+            with self._lock:
+                if self._pool is None or self._pool_pid != os.getpid():
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=max(1, min(self.threads, len(self.engines))),
+                        thread_name_prefix='shards',
+                    )
+                    self._pool_pid = os.getpid()
+                    atexit.register(self._pool.shutdown)
+        return self._pool
+
+
+def use(shard):
+    db.session.info['shard'] = shard
+
+
+# Oturumu kullanıcının parçasına bağlar; taşınan kullanıcıya yazılamıyorsa False
+def bind(app_id, user_id, write=False):
+    router = current_app.extensions.get('shard_router')
+    if router is None:
+        return True
+    shard, move = router.locate(app_id, user_id)
+    if move is not None and write:
+        if move['state'] == FROZEN:
+            return False
+        if move['state'] in (COPY, DUAL):
+            # Commit öncesi aşama yeniden denetlenir; DUAL'da hedefe de uygulanır
+            db.session.info['replicate'] = (app_id, user_id)
+    use(shard)
+    return True
+
+
+# İstek oturumunu kullanıcının parçasına bağlar; api.before_request çağırır.
+# Donmuş kullanıcıya yazma, taşıma kaydı sık okunarak geçiş beklenir; istemci
+# yalnızca taşıma SHARD_FREEZE_WAIT saniyede bitmezse 503 görür
+def route(app_id, user_id, write=False):
+    if bind(app_id, user_id, write=write):
+        return
+    router = current_app.extensions['shard_router']
+    deadline = time.monotonic() + current_app.config['SHARD_FREEZE_WAIT']
+    while time.monotonic() < deadline:
+        time.sleep(FREEZE_POLL)
+        router.load()
+        if bind(app_id, user_id, write=write):
+            return
+    abort(503, description='Veriler taşınıyor, biraz sonra tekrar deneyin.',
+          retry_after=max(1, int(router.refresh)))
+
+
+# COPY ya da DUAL'da yönlendirilip son eşitlemeye yetişemeyecek kadar geç commit
+# edilen yazma geri alınır; istemci 503 ile yeniden dener ve hedefe yazar
+@event.listens_for(Session, 'before_commit')
+def _before_commit(session):
+    key = session.info.get('replicate')
+    if key is not None and has_app_context():
+        router = current_app.extensions.get('shard_router')
+        if router is not None and not router.confirm(*key, session.info.get('shard')):
+            abort(503, description='Veriler taşınıyor, biraz sonra tekrar deneyin.',
+                  retry_after=max(1, int(router.refresh)))
+
+
+@event.listens_for(Session, 'after_commit')
+def _after_commit(session):
+    key = session.info.get('replicate')
+    if key is not None and has_app_context():
+        router = current_app.extensions.get('shard_router')
+        if router is not None:
+            router.replicate(*key)
+
+
+def _chunks(items):
+    items = list(items)
+    for start in range(0, len(items), _CHUNK):
+        yield items[start:start + _CHUNK]
+
+
+def _owner(table, app_id, user_id):
+    return (table.c.app_id == app_id) & (table.c.user_id == user_id)
+
+
+# since=None tüm kullanıcı verisini kopyalar; aksi halde yalnızca since'ten sonra
+# değişen kitaplar ve günlük özet yazılır. Tekrar çalıştırılabilir; kaynaktaki
+# son sürümü döner. Okuma oturumları (kimlikleri parçaya özgü) yalnızca
+# sessions=True iken baştan kopyalanır
+def sync_user(source, target, app_id, user_id, since=None, sessions=False):
+    books = Book.__table__
+    log = BookChange.__table__
+    daily = DailyUserStats.__table__
+    monthly = MonthlyUserStats.__table__
+    reading = ReadingSession.__table__
+    marks = WriteBehindMark.__table__
+    with source.connect() as src:
+        # Sürüm önce okunur; Postgres'te sonraki satırlar ondan yeni olabilir, eski olamaz
+        version = src.scalar(select(func.max(log.c.version)).where(_owner(log, app_id, user_id))) or 0
+        if since is not None:
+            changed = src.execute(
+                select(log.c.book_id, log.c.op)
+                .where(_owner(log, app_id, user_id), log.c.version > since)
+            ).all()
+            # Toplu içe aktarma tüm listeyi değiştirir
+            if any(op == RESET for _, op in changed):
+                since = None
+        if since is None:
+            book_rows = src.execute(select(books).where(_owner(books, app_id, user_id))).mappings().all()
+            book_ids = None
+        else:
+            book_ids = {book_id for book_id, _ in changed}
+            book_rows = []
+            for chunk in _chunks(book_ids):
+                book_rows += src.execute(select(books).where(books.c.id.in_(chunk))).mappings().all()
+        daily_rows = src.execute(select(daily).where(_owner(daily, app_id, user_id))).mappings().all()
+        monthly_rows = src.execute(select(monthly).where(_owner(monthly, app_id, user_id))).mappings().all()
+        # Günlük tekrarının çift uygulamaması için işaretler de kullanıcıyla taşınır
+        mark_rows = src.execute(select(marks).where(_owner(marks, app_id, user_id))).mappings().all()
+        reading_rows = []
+        if sessions:
+            columns = [column for column in reading.c if column.name != 'id']
+            reading_rows = src.execute(
+                select(*columns).where(_owner(reading, app_id, user_id)).order_by(reading.c.id)
+            ).mappings().all()
+
+    with target.begin() as dst:
+        if book_ids is None:
+            dst.execute(delete(books).where(_owner(books, app_id, user_id)))
+        else:
+            for chunk in _chunks(book_ids):
+                dst.execute(delete(books).where(books.c.id.in_(chunk)))
+        if book_rows:
+            dst.execute(insert(books), [dict(row) for row in book_rows])
+        dst.execute(delete(daily).where(_owner(daily, app_id, user_id)))
+        if daily_rows:
+            dst.execute(insert(daily), [dict(row) for row in daily_rows])
+        dst.execute(delete(monthly).where(_owner(monthly, app_id, user_id)))
+        if monthly_rows:
+            dst.execute(insert(monthly), [dict(row) for row in monthly_rows])
+        dst.execute(delete(marks).where(_owner(marks, app_id, user_id)))
+        if mark_rows:
+            dst.execute(insert(marks), [dict(row) for row in mark_rows])
+        if sessions:
+            dst.execute(delete(reading).where(_owner(reading, app_id, user_id)))
+            if reading_rows:
+                dst.execute(insert(reading), [dict(row) for row in reading_rows])
+    return version
+
+
+# Eski parçadaki sürümler taşınmaz; hedefte hepsinden büyük bir RESET kaydı
+# açılır, eski Last-Event-ID ile bağlanan istemci listeyi baştan yükler
+def _mark_reset(target, app_id, user_id, source_version):
+    log = BookChange.__table__
+    with target.begin() as dst:
+        version = max(source_version, dst.scalar(select(func.max(log.c.version))) or 0) + 1
+        dst.execute(insert(log).values(
+            version=version, app_id=app_id, user_id=user_id, book_id='', op=RESET, payload=None,
+            created_at=utcnow(),
+        ))
+        if dst.dialect.name == 'postgresql':
+            dst.execute(text(
+                "SELECT setval(pg_get_serial_sequence('book_changes', 'version'), :version)"
+            ), {'version': version})
+
+
+def _purge(engine, app_id, user_id):
+    with engine.begin() as connection:
+        for table in SHARDED_TABLES:
+            connection.execute(delete(table).where(_owner(table, app_id, user_id)))
+
+
+def _set_move(router, app_id, user_id, **values):
+    moves = ShardMove.__table__
+    with router.directory.begin() as connection:
+        connection.execute(update(moves).where(_owner(moves, app_id, user_id)).values(**values))
+    router.load()
+
+
+def move_user(router, app_id, user_id, target, wait=None, log=None):
+    """Kullanıcıyı çevrimiçi taşır: kopyala, çift yaz, dondur ve son eşitle, geçiş yap.
+
+    Her aşama arasında `wait` (varsayılan 2 * refresh) saniye beklenir. Hata
+    olursa yönlendirme kaynağa döner; hedefteki yarım kopya bir sonraki
+    denemede baştan yazılır.
+    """
+    wait = 2 * router.refresh if wait is None else wait
+    log = log or (lambda message: None)
+    router.load()
+    source, move = router.locate(app_id, user_id)
+    if move is not None and move['state'] != MOVED:
+        raise RuntimeError(f'{app_id}/{user_id} zaten taşınıyor.')
+    if source == target:
+        return False
+    source_engine, target_engine = router.engines[source], router.engines[target]
+    moves = ShardMove.__table__
+    with router.directory.begin() as connection:
+        connection.execute(delete(moves).where(_owner(moves, app_id, user_id)))
+        connection.execute(insert(moves).values(
+            app_id=app_id, user_id=user_id, source=source, target=target, state=COPY,
+            synced_version=0, updated_at=utcnow(),
+        ))
+    router.load()
+    try:
+        log(f'{source} -> {target}: kopyalanıyor')
+        version = sync_user(source_engine, target_engine, app_id, user_id)
+        _set_move(router, app_id, user_id, state=DUAL, synced_version=version)
+        log(f'{source} -> {target}: çift yazılıyor')
+        time.sleep(wait)
+        # Tüm worker'lar çift yazarken arada kalan yazmalar kapatılır
+        version = sync_user(source_engine, target_engine, app_id, user_id, since=version)
+        _set_move(router, app_id, user_id, state=FROZEN, synced_version=version)
+        log(f'{source} -> {target}: yazmalar donduruldu')
+        time.sleep(wait)
+        frozen_at = time.monotonic()
+        version = sync_user(source_engine, target_engine, app_id, user_id, since=version,
+                            sessions=True)
+        _mark_reset(target_engine, app_id, user_id, version)
+        _set_move(router, app_id, user_id, state=MOVED, synced_version=version)
+        log(f'{source} -> {target}: geçildi (son eşitleme {time.monotonic() - frozen_at:.3f} sn)')
+    except BaseException:
+        with router.directory.begin() as connection:
+            connection.execute(delete(moves).where(_owner(moves, app_id, user_id)))
+        router.load()
+        raise
+    time.sleep(wait)
+    _purge(source_engine, app_id, user_id)
+    # Halka zaten hedefi gösteriyorsa (SHARD_RING güncellendiyse) kayda gerek kalmaz
+    if router.ring.node(app_id, user_id) == target:
+        with router.directory.begin() as connection:
+            connection.execute(delete(moves).where(_owner(moves, app_id, user_id)))
+        router.load()
+    return True
+
+
+def _owners(shard):
+    return db.session.execute(select(Book.app_id, Book.user_id).distinct()).all()
+
+
+def plan_rebalance(router, ring):
+    """Yeni halkaya göre yeri değişen kullanıcılar: [(app_id, user_id, kaynak, hedef)]."""
+    moves = []
+    for shard, owners in router.map_shards(_owners).items():
+        for app_id, user_id in owners:
+            current, _ = router.locate(app_id, user_id)
+            wanted = ring.node(app_id, user_id)
+            if current == shard and wanted != shard:
+                moves.append((app_id, user_id, shard, wanted))
+    return moves
+
+
+def shard_totals(shard):
+    users, books, pages = db.session.execute(select(
+        func.count(func.distinct(Book.app_id + '\x1f' + Book.user_id)),
+        func.count(),
+        func.coalesce(func.sum(Book.pages_read), 0),
+    ).where(LIVE)).one()
+    return {'users': users, 'books': books, 'pagesRead': pages}
+
+
+# Parçalar arası yönetim özeti; parçalar iş parçacığı havuzunda paralel sorgulanır
+def totals(router):
+    shards = router.map_shards(shard_totals)
+    total = {key: sum(shard[key] for shard in shards.values()) for key in ('users', 'books', 'pagesRead')}
+    return {'shards': shards, 'total': total}
+
+
+def data_engines(app):
+    """Kullanıcı verisini tutan motorlar: parçalar ya da tek veritabanı."""
+    router = app.extensions.get('shard_router')
+    return list(router.engines.values()) if router is not None else [db.engine]
+
+
+def _ring(app, names):
+    return HashRing(names, vnodes=app.config['SHARD_VNODES'])
+
+
+shards_cli = click.Group('shards', help='Parça yönetimi.')
+
+
+@shards_cli.command('status')
+def status_command():
+    router = current_app.extensions['shard_router']
+    router.load()
+    for name, values in totals(router)['shards'].items():
+        click.echo(f'{name}: {values}')
+    for move in router.moves():
+        click.echo(f"{move['app_id']}/{move['user_id']}: {move['source']} -> {move['target']} ({move['state']})")
+
+
+@shards_cli.command('move')
+@click.argument('app_id')
+@click.argument('user_id')
+@click.argument('target')
+def move_command(app_id, user_id, target):
+    router = current_app.extensions['shard_router']
+    if target not in router.engines:
+        raise click.BadParameter(f'Bilinmeyen parça: {target}')
+    move_user(router, app_id, user_id, target, log=click.echo)
+
+
+# Yeni parça önce SHARDS'a eklenir (halkaya girmeden), kullanıcılar taşınır,
+# sonra SHARD_RING güncellenerek yayına alınır
+@shards_cli.command('rebalance')
+@click.option('--ring', 'ring_names', required=True, help='Hedef halka: "s0,s1,s2"')
+@click.option('--dry-run', is_flag=True)
+def rebalance_command(ring_names, dry_run):
+    router = current_app.extensions['shard_router']
+    names = [name.strip() for name in ring_names.split(',') if name.strip()]
+    unknown = set(names) - set(router.engines)
+    if unknown:
+        raise click.BadParameter(f'Bilinmeyen parça: {", ".join(sorted(unknown))}')
+    planned = plan_rebalance(router, _ring(current_app, names))
+    click.echo(f'{len(planned)} kullanıcı taşınacak')
+    if dry_run:
+        return
+    for app_id, user_id, _, target in planned:
+        move_user(router, app_id, user_id, target, log=click.echo)
+
+
+# SHARD_RING yayına alındıktan sonra halkayla aynı yeri gösteren kayıtlar silinir
+@shards_cli.command('prune')
+def prune_command():
+    router = current_app.extensions['shard_router']
+    moves = ShardMove.__table__
+    redundant = [move for move in router.moves()
+                 if move['state'] == MOVED and router.ring.node(move['app_id'], move['user_id']) == move['target']]
+    with router.directory.begin() as connection:
+        for move in redundant:
+            connection.execute(delete(moves).where(_owner(moves, move['app_id'], move['user_id'])))
+    router.load()
+    click.echo(f'{len(redundant)} kayıt silindi')
+
+
+# db.engines gerektirdiği için uygulama bağlamında, create_all yerine çağrılır
+def init_app(app):
+    shards = parse_shards(app.config['SHARDS'])
+    if not shards:
+        # Modeller varsayılan metadata'dadır; bind'ler db nesnesinde süreç boyu
+        # birikir, "__all__" başka bir uygulamanın kopya bind'ini de arar
+        db.create_all(bind_key=None)
+        return
+    engines = {name: db.engines[name] for name in shards}
+    ring_names = [name.strip() for name in (app.config['SHARD_RING'] or '').split(',') if name.strip()]
+    unknown = set(ring_names) - set(engines)
+    if unknown:
+        raise RuntimeError(f'SHARD_RING bilinmeyen parça içeriyor: {", ".join(sorted(unknown))}')
+    db.metadata.create_all(db.engine, tables=[ShardMove.__table__])
+    for engine in engines.values():
+        db.metadata.create_all(engine, tables=SHARDED_TABLES)
+    router = ShardRouter(
+        app,
+        db.engine,
+        engines,
+        _ring(app, ring_names or list(engines)),
+        refresh=app.config['SHARD_REFRESH'],
+        threads=app.config['SHARD_ADMIN_THREADS'],
+    )
+    router.load()
+    app.extensions['shard_router'] = router
+    app.cli.add_command(shards_cli)
@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from . import books, changes, sharding, summary
+from .extensions import db
+from .models import utcnow
+
+# Isınma sorguları var olmayan bir kullanıcıya gider; veri okunmaz, yazılmaz
+WARMUP_APP = '_warmup'
+WARMUP_USER = '_warmup'
+
+
+def _warm_queries():
+    today = utcnow().date()
+    books.list_books(WARMUP_APP, WARMUP_USER, limit=1)
+    books.get_book(WARMUP_APP, WARMUP_USER, WARMUP_USER)
+    books.finishing_books(WARMUP_APP, WARMUP_USER, today, today + timedelta(days=6), 1)
+    summary.compute_summary(WARMUP_APP, WARMUP_USER)
+    changes.changes_since(WARMUP_APP, WARMUP_USER, changes.current_version(WARMUP_APP, WARMUP_USER), 1)
+
+
+def warm_up(app):
+    """İlk istekten önce sık sorguları derler ve havuzlara bağlantı açar.
+
+    SQLAlchemy'nin derlenmiş ifade önbelleği motor başınadır; gunicorn
+    preload_app ile ana süreçte çalışırsa worker'lar ısınmış önbelleği fork
+    ile paylaşır. Ardından WARMUP_HOOKS'taki çağrılabilirler (app alır) çalışır.
+    """
+    _warm_engines(app)
+    # Yönlendirme tablosu ilk eşleşmede sıralanır; önceden kurulur
+    app.url_map.update()
+    for hook in app.config['WARMUP_HOOKS']:
+        hook(app)
+
+
+def _warm_engines(app):
+    with app.app_context():
+        router = app.extensions.get('shard_router')
+        for shard in router.shards if router is not None else [None]:
+            sharding.use(shard)
+            _warm_queries()
+            db.session.rollback()
+        db.session.info.pop('shard', None)
+
+
+def after_fork(app):
+    """gunicorn post_fork kancası: ana süreçten kalan havuz bağlantıları bırakılır.
+
+    close=False, ana sürecin soketlerini kapatmadan unutur. Isınma sorguları
+    worker istek almadan önce yeniden çalışır: kendi bağlantıları açılır ve
+    ortak sayfaların yazmada kopyalanması (copy-on-write) ilk isteğe kalmaz.
+    Ana süreç yazma arkası günlüklerini yalnızca bir kez oynatır; çöken
+    worker'ın yerine gelen worker onun günlüğünü burada oynatır ve tamponun
+    iş parçacığını başlatır (sahipsiz günlükleri aralıklarla yeniden arar).
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    buffer = app.extensions.get('write_behind')
+    if buffer is not None:
+        buffer.replay()
+        buffer.start()
+    _warm_engines(app)
@@ -0,0 +1,215 @@
+import importlib
+from collections import defaultdict
+from datetime import timedelta
+
+from flask import current_app
+from sqlalchemy import Date, cast, delete, func, insert, select, update
+
+from .extensions import db
+from .models import DailyUserStats, MonthlyUserStats, ReadingSession, utcnow
+
+# Lehçe modülü ilk upsert'te yüklenir; postgresql paketi içe aktarımda ~25 ms tutar
+_UPSERT_DIALECTS = ('sqlite', 'postgresql')
+
+
+def _dialect_name(model):
+    return db.session.get_bind(mapper=model.__mapper__).dialect.name
+
+
+# Okuma oturumlarını toplu olarak yazar ve günlük özeti aynı işlemde günceller.
+# entries: app_id, user_id, book_id, pages ve isteğe bağlı created_at içeren sözlükler
+def record_sessions(entries):
+    rows = []
+    deltas = defaultdict(lambda: [0, 0])
+    for entry in entries:
+        created_at = entry.get('created_at') or utcnow()
+        rows.append({
+            'app_id': entry['app_id'],
+            'user_id': entry['user_id'],
+            'book_id': entry['book_id'],
+            'pages': entry['pages'],
+            'created_at': created_at,
+        })
+        delta = deltas[(entry['app_id'], entry['user_id'], created_at.date())]
+        delta[0] += entry['pages']
+        delta[1] += 1
+    if not rows:
+        return
+    db.session.execute(insert(ReadingSession), rows)
+    _apply_rollup(deltas)
+
+
+def _apply_rollup(deltas):
+    rows = [
+        {'app_id': app_id, 'user_id': user_id, 'day': day, 'pages': pages, 'sessions': sessions}
+        for (app_id, user_id, day), (pages, sessions) in deltas.items()
+    ]
+    months = defaultdict(int)
+    for (app_id, user_id, day), (pages, _) in deltas.items():
+        months[(app_id, user_id, day.replace(day=1))] += pages
+    _upsert_add(DailyUserStats, ['app_id', 'user_id', 'day'], rows)
+    _upsert_add(MonthlyUserStats, ['app_id', 'user_id', 'month'], [
+        {'app_id': app_id, 'user_id': user_id, 'month': month, 'pages': pages}
+        for (app_id, user_id, month), pages in months.items()
+    ])
+
+
+# Anahtar sütunlar dışındaki sayaçlar mevcut satıra eklenir, satır yoksa açılır
+def _upsert_add(model, keys, rows):
+    table = model.__table__
+    counters = [name for name in rows[0] if name not in keys]
+    dialect = _dialect_name(model)
+    if dialect in _UPSERT_DIALECTS:
+        stmt = importlib.import_module(f'sqlalchemy.dialects.{dialect}').insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c[name] for name in keys],
+            set_={name: table.c[name] + stmt.excluded[name] for name in counters},
+        )
+        db.session.execute(stmt, rows)
+        return
+    # ON CONFLICT desteği olmayan veritabanları için önce güncelle, yoksa ekle
+    for row in rows:
+        result = db.session.execute(
+            update(table)
+            .where(*(table.c[name] == row[name] for name in keys))
+            .values({name: table.c[name] + row[name] for name in counters})
+        )
+        if result.rowcount == 0:
+            db.session.execute(insert(table), row)
+
+
+# Günlük özeti ham oturumlardan yeniden kurar (toplu yükleme sonrası sıkıştırıcı)
+def rebuild_daily_stats():
+    if _dialect_name(ReadingSession) == 'sqlite':
+        day = func.date(ReadingSession.created_at)
+    else:
+        day = cast(ReadingSession.created_at, Date)
+    source = select(
+        ReadingSession.app_id,
+        ReadingSession.user_id,
+        day,
+        func.sum(ReadingSession.pages),
+        func.count(),
+    ).group_by(ReadingSession.app_id, ReadingSession.user_id, day)
+    db.session.execute(delete(DailyUserStats))
+    db.session.execute(
+        insert(DailyUserStats).from_select(
+            ['app_id', 'user_id', 'day', 'pages', 'sessions'], source
+        )
+    )
+    rebuild_monthly_stats()
+
+
+def _month(day, dialect):
+    if dialect == 'sqlite':
+        return func.date(day, 'start of month')
+    return cast(func.date_trunc('month', day), Date)
+
+
+# Aylık toplamları günlük özetten kurar
+def rebuild_monthly_stats():
+    month = _month(DailyUserStats.day, _dialect_name(DailyUserStats))
+    source = select(
+        DailyUserStats.app_id, DailyUserStats.user_id, month, func.sum(DailyUserStats.pages),
+    ).group_by(DailyUserStats.app_id, DailyUserStats.user_id, month)
+    db.session.execute(delete(MonthlyUserStats))
+    db.session.execute(
+        insert(MonthlyUserStats).from_select(['app_id', 'user_id', 'month', 'pages'], source)
+    )
+
+
+def daily_pages(app_id, user_id, start, end):
+    stmt = (
+        select(DailyUserStats.day, DailyUserStats.pages, DailyUserStats.sessions)
+        .where(
+            DailyUserStats.app_id == app_id,
+            DailyUserStats.user_id == user_id,
+            DailyUserStats.day.between(start, end),
+        )
+        .order_by(DailyUserStats.day)
+    )
+    return db.session.execute(stmt).all()
+
+
+# Bugün (henüz okunmadıysa dün) biten ardışık okuma günleri
+def reading_streak(app_id, user_id, today):
+    stmt = (
+        select(DailyUserStats.day)
+        .where(
+            DailyUserStats.app_id == app_id,
+            DailyUserStats.user_id == user_id,
+            DailyUserStats.day <= today,
+            DailyUserStats.pages > 0,
+        )
+        .order_by(DailyUserStats.day.desc())
+        .execution_options(yield_per=64)
+    )
+    streak = 0
+    expected = today
+    for day in db.session.scalars(stmt):
+        if streak == 0 and day == today - timedelta(days=1):
+            expected = day
+        if day != expected:
+            break
+        streak += 1
+        expected = day - timedelta(days=1)
+    return streak
+
+
+# Pazartesi başlangıçlı haftalık toplamlar, eskiden yeniye
+def weekly_totals(app_id, user_id, today, weeks):
+    first_week = today - timedelta(days=today.weekday(), weeks=weeks - 1)
+    totals = {first_week + timedelta(weeks=i): 0 for i in range(weeks)}
+    for row in daily_pages(app_id, user_id, first_week, today):
+        totals[row.day - timedelta(days=row.day.weekday())] += row.pages
+    return [{'weekStart': week.isoformat(), 'pages': pages} for week, pages in totals.items()]
+
+
+# Ayın en çok okuyanları; (app_id, month, pages, user_id) indeksinde ters aralık taraması.
+# Parçalıysa her parçanın ilk `limit`'i paralel okunup birleştirilir
+def top_readers(app_id, month, limit):
+    stmt = (
+        select(MonthlyUserStats.user_id, MonthlyUserStats.pages)
+        .where(MonthlyUserStats.app_id == app_id, MonthlyUserStats.month == month)
+        .order_by(MonthlyUserStats.pages.desc(), MonthlyUserStats.user_id.desc())
+        .limit(limit)
+    )
+    router = current_app.extensions.get('shard_router')
+    if router is None:
+        return db.session.execute(stmt).all()
+    results = router.map_shards(lambda shard: db.session.execute(stmt).all())
+    rows = [row for shard_rows in results.values() for row in shard_rows]
+    return sorted(rows, key=lambda row: (row.pages, row.user_id), reverse=True)[:limit]
+
+
+# Kullanıcının aydaki sırası ve sayfası; okumamışsa None. Eşit sayfalılar aynı sırayı
+# paylaşır: sıra, daha çok okuyan kullanıcı sayısının bir fazlasıdır
+def reader_rank(app_id, user_id, month):
+    pages = db.session.scalar(select(MonthlyUserStats.pages).where(
+        MonthlyUserStats.app_id == app_id, MonthlyUserStats.user_id == user_id,
+        MonthlyUserStats.month == month,
+    ))
+    if pages is None:
+        return None
+    stmt = select(func.count()).where(
+        MonthlyUserStats.app_id == app_id, MonthlyUserStats.month == month,
+        MonthlyUserStats.pages > pages,
+    )
+    router = current_app.extensions.get('shard_router')
+    if router is None:
+        ahead = db.session.scalar(stmt)
+    else:
+        ahead = sum(router.map_shards(lambda shard: db.session.scalar(stmt)).values())
+    return ahead + 1, pages
+
+
+# Aylık tablo sonradan eklendi; boşsa mevcut günlük özetten bir kez doldurulur
+def init_app(app):
+    router = app.extensions.get('shard_router')
+    for shard in router.shards if router is not None else [None]:
+        with app.app_context():
+            db.session.info['shard'] = shard
+            empty = db.session.scalar(select(MonthlyUserStats.app_id).limit(1)) is None
+            if empty and db.session.scalar(select(DailyUserStats.app_id).limit(1)) is not None:
+                rebuild_monthly_stats()
+                db.session.commit()
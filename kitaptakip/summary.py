@@ -0,0 +1,76 @@
+from flask import current_app
+from sqlalchemy import case, func, select
+
+from . import changes
+from .cache import InMemorySharedCache, LRUCache, TieredCache
+from .extensions import db
+from .models import LIVE, Book, BookChange
+
+
+def _key(app_id, user_id):
+    return f'summary:{app_id}:{user_id}'
+
+
+def compute_summary(app_id, user_id):
+    return _load(app_id, user_id)[0]
+
+
+# Özet, okunduğu andaki değişiklik sürümüyle birlikte; tek sorgu
+def _load(app_id, user_id):
+    version = (
+        select(func.max(BookChange.version))
+        .where(BookChange.app_id == app_id, BookChange.user_id == user_id)
+        .scalar_subquery()
+    )
+    stmt = select(
+        func.count(),
+        func.coalesce(func.sum(Book.pages_read), 0),
+        func.coalesce(func.sum(case((Book.pages_read >= Book.total_pages, 1), else_=0)), 0),
+        version,
+    ).where(Book.app_id == app_id, Book.user_id == user_id, LIVE)
+    total_books, pages_read, finished, version = db.session.execute(stmt).one()
+    return {'totalBooks': total_books, 'pagesRead': pages_read, 'finishedBooks': finished}, version or 0
+
+
+# Gösterge paneli toplamları; önbellek kapalıysa doğrudan hesaplanır. min_version
+# (okuma kopyası belirteci) verilmişse daha eski sürümden hesaplanmış değer kullanılmaz
+def get_summary(app_id, user_id, min_version=None):
+    buffer = current_app.extensions.get('write_behind')
+    if buffer is not None and buffer.has_pending(app_id, user_id):
+        # Tampondaki artırımlar önbelleğe girmez; özet her okumada üzerine eklenir
+        return buffer.summary(app_id, user_id, compute_summary)
+    cache = current_app.extensions.get('summary_cache')
+    if cache is None:
+        return compute_summary(app_id, user_id)
+    # Diğer worker'lardaki yazmalar değişiklik veri yolu üzerinden geçersiz kılınır
+    current_app.extensions['change_bus'].start()
+    key = _key(app_id, user_id)
+    # Paylaşılan katmandaki değer, kullanıcının son değişikliğinden eskiyse yeniden yüklenir
+    result, version = cache.get_or_load(
+        key, lambda: _load(app_id, user_id),
+        fresh=lambda entry: entry[1] >= changes.current_version(app_id, user_id),
+    )
+    if min_version is not None and version < min_version:
+        # Geride kalmış bir kopyadan dolmuş; istek artık yazmayı gören motorda
+        result, version = cache.reload(key, lambda: _load(app_id, user_id))
+    return result
+
+
+def invalidate(cache, app_id, user_id):
+    cache.delete(_key(app_id, user_id))
+
+
+def init_app(app):
+    if not app.config['SUMMARY_CACHE_ENABLED']:
+        return
+    shared = app.config['SUMMARY_SHARED_CACHE']
+    if shared == 'memory':
+        shared = InMemorySharedCache()
+    cache = TieredCache(
+        LRUCache(maxsize=app.config['SUMMARY_CACHE_SIZE'], ttl=app.config['SUMMARY_CACHE_TTL']),
+        shared,
+    )
+    app.extensions['summary_cache'] = cache
+    app.extensions['change_bus'].add_listener(
+        lambda app_id, user_id, op: invalidate(cache, app_id, user_id)
+    )
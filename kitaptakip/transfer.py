@@ -0,0 +1,183 @@
+import codecs
+import csv
+import io
+import json
+from datetime import datetime, timezone
+
+from sqlalchemy import insert, select
+
+from . import changes
+from .books import ValidationError, parse_int, validate_new_book
+from .extensions import db
+from .models import LIVE, Book, isoformat, new_id, utcnow
+
+FIELDS = ('id', 'title', 'totalPages', 'pagesRead', 'lastPageRead', 'createdAt')
+
+
+def _decoded_lines(stream, chunk_size=1 << 16):
+    # Gövde büyük parçalarla okunur; ilk satırdaki BOM atılır ve çok baytlı
+    # karakterler parça sınırında bölünmez
+    decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+    pending = ''
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        lines = (pending + decoder.decode(chunk)).split('\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line + '\n'
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+# (satır numarası, kayıt veya hata) çiftleri üretir
+def parse_ndjson(stream):
+    for number, line in enumerate(_decoded_lines(stream), 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield number, ValidationError('Geçersiz JSON satırı.')
+            continue
+        if not isinstance(record, dict):
+            yield number, ValidationError('Her satır bir JSON nesnesi olmalıdır.')
+            continue
+        yield number, record
+
+
+def parse_csv(stream):
+    reader = csv.DictReader(_decoded_lines(stream))
+    for record in reader:
+        yield reader.line_num, record
+
+
+def _book_row(app_id, user_id, record):
+    title, total_pages = validate_new_book(record.get('title'), record.get('totalPages'))
+    pages_read = parse_int(record.get('pagesRead') or 0)
+    if pages_read is None or pages_read < 0:
+        raise ValidationError('Okunan sayfa sayısı negatif olamaz.')
+    last_page_read = record.get('lastPageRead')
+    if last_page_read in (None, ''):
+        last_page_read = min(pages_read, total_pages)
+    else:
+        last_page_read = parse_int(last_page_read)
+    if last_page_read is None or last_page_read < 0:
+        raise ValidationError('Son okunan sayfa negatif olamaz.')
+    # Artırımdaki gibi son okunan sayfa kitabın sayfa sayısını aşmaz
+    last_page_read = min(last_page_read, total_pages)
+    created_at = record.get('createdAt')
+    if created_at:
+        try:
+            created_at = datetime.fromisoformat(str(created_at).replace('Z', '+00:00'))
+        except ValueError:
+            raise ValidationError('Geçersiz createdAt değeri.') from None
+        if created_at.tzinfo is not None:
+            created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    else:
+        created_at = utcnow()
+    return {
+        'id': new_id(),
+        'app_id': app_id,
+        'user_id': user_id,
+        'title': title,
+        'total_pages': total_pages,
+        'pages_read': pages_read,
+        'last_page_read': last_page_read,
+        'created_at': created_at,
+    }
+
+
+def import_books(app_id, user_id, records, chunk_size=5000, max_errors=1000):
+    """Kayıtları parçalar halinde executemany ile ekler; her parça ayrı bir işlemdir.
+
+    Hatalı satırlar akışı durdurmaz, satır numarasıyla raporlanır. Binlerce
+    tek tek fark yerine, son parçadan sonra (yarıda kesilirse o ana kadar
+    eklenenler için) istemcilere listeyi yenilemesini söyleyen tek RESET yazılır.
+    """
+    imported = 0
+    rejected = 0
+    errors = []
+    chunk = []
+
+    def flush():
+        nonlocal imported
+        db.session.execute(insert(Book.__table__), chunk)
+        db.session.commit()
+        imported += len(chunk)
+        chunk.clear()
+
+    try:
+        for number, record in records:
+            try:
+                if isinstance(record, Exception):
+                    raise record
+                chunk.append(_book_row(app_id, user_id, record))
+            except ValidationError as error:
+                rejected += 1
+                if len(errors) < max_errors:
+                    errors.append({'line': number, 'error': str(error)})
+                continue
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+    finally:
+        if imported:
+            # Yarıda kesildiyse oturumda geri alınmamış parça kalmış olabilir
+            db.session.rollback()
+            changes.record_change(changes.RESET, app_id, user_id, '')
+            db.session.commit()
+    return {'imported': imported, 'rejected': rejected, 'errors': errors}
+
+
+def iter_books(app_id, user_id, yield_per=1000):
+    table = Book.__table__
+    stmt = (
+        select(
+            table.c.id, table.c.title, table.c.total_pages, table.c.pages_read,
+            table.c.last_page_read, table.c.created_at,
+        )
+        .where(table.c.app_id == app_id, table.c.user_id == user_id, LIVE)
+        .order_by(table.c.created_at, table.c.id)
+        .execution_options(yield_per=yield_per)
+    )
+    for book_id, title, total_pages, pages_read, last_page_read, created_at in db.session.execute(stmt):
+        yield book_id, title, total_pages, pages_read, last_page_read, isoformat(created_at)
+
+
+def _batched(lines, size=1000):
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) == size:
+            yield ''.join(batch)
+            batch.clear()
+    if batch:
+        yield ''.join(batch)
+
+
+def export_ndjson(rows):
+    return _batched(json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False) + '\n' for row in rows)
+
+
+def export_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def lines():
+        for row in rows:
+            writer.writerow(row)
+            line = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            yield line
+
+    writer.writerow(FIELDS)
+    header = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    yield header
+    yield from _batched(lines())
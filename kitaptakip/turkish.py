@@ -0,0 +1,12 @@
+import unicodedata
+
+_UPPER_TO_LOWER = str.maketrans({'I': 'ı', 'İ': 'i'})
+
+
+# Türkçe kurallı küçük harfe çevirme: I -> ı, İ -> i (str.lower() İ'yi "i̇" yapar)
+def fold(text):
+    return unicodedata.normalize('NFC', text).translate(_UPPER_TO_LOWER).lower()
+
+
+def words(text):
+    return ''.join(ch if ch.isalnum() else ' ' for ch in fold(text)).split()
@@ -0,0 +1,451 @@
+import atexit
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import delete, insert, select, update
+
+from . import books, changes, sharding, stats
+from .extensions import db
+from .models import LIVE, Book, WriteBehindMark, utcnow
+
+SUFFIX = '.journal'
+
+
+class WriteBehind:
+    """Sayfa artırımlarını kısa bir süre bellekte birleştiren worker tamponu.
+
+    Her artırım önce yerel, yalnızca eklenen bir günlüğe yazılır; tampon
+    `window` saniyede bir ya da `max_ops` artırımda bir boşaltılır: kullanıcı
+    başına tek işlem, kitap başına tek UPDATE. Günlük, worker yaşadıkça
+    flock ile kilitlidir; sahibi ölmüş günlükler açılışta ve ardından her
+    `replay_interval` saniyede bir oynatılır, write_behind_marks işaretleri
+    uygulanmış girdileri atlatır.
+
+    Bekleyen artırımlar yalnızca aynı worker'daki okumalara eklenir: kendi
+    yazmasını okuma worker içinde geçerlidir, diğer worker'lar artırımı
+    boşaltmadan sonra görür. Kilit yalnızca bellekteki tamponu korur;
+    veritabanı işi kilit dışında yapılır. Okuma, başlarken kullanıcının
+    boşaltma kuşağını alır ve arada bir boşaltma commit edildiyse okuduğu
+    kitapları yeniden okur.
+    """
+
+    def __init__(self, app, directory, window=0.2, max_ops=100, fsync=False, max_bytes=16 << 20,
+                 replay_interval=30.0):
+        self.app = app
+        self.directory = directory
+        self.window = window
+        self.replay_interval = replay_interval
+        self.max_ops = max_ops
+        self.fsync = fsync
+        self.max_bytes = max_bytes
+        # Yalnızca bellekteki tamponlar ve günlük yazımı için
+        self.lock = threading.Lock()
+        # Kullanıcının boşaltması bittiğinde bekleyen okumaları uyandırır
+        self._idle = threading.Condition(self.lock)
+        self.name = None
+        self.buffered = 0
+        self.updates = 0
+        self.commits = 0
+        self.replayed = 0
+        # (app_id, user_id) -> {book_id: [(seq, pages, created_at)]}; boşaltılmakta
+        # olanlar commit edilene kadar _inflight'tadır
+        self._pending = {}
+        self._inflight = {}
+        # Kullanıcı başına commit edilmiş boşaltma sayısı
+        self._generations = {}
+        self._ops = 0
+        self._seq = 0
+        self._fd = None
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def _path(self, name):
+        return os.path.join(self.directory, name + SUFFIX)
+
+    def start(self):
+        # Günlük ve iş parçacığı worker'a özgüdür; fork sonrası yeniden açılır
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self.lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pending.clear()
+            self._inflight.clear()
+            self._open()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.name = uuid.uuid4().hex
+        self._fd = os.open(self._path(self.name), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+    def _run(self):
+        next_replay = time.monotonic() + self.replay_interval
+        while True:
+            self._wake.wait(self.window)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                self.app.logger.exception('Yazma arkası tampon boşaltılamadı')
+            # Çalışırken ölen komşu worker'ların günlükleri
+            if time.monotonic() >= next_replay:
+                next_replay = time.monotonic() + self.replay_interval
+                try:
+                    self.replay()
+                except Exception:
+                    self.app.logger.exception('Yazma arkası günlükleri oynatılamadı')
+
+    def has_pending(self, app_id, user_id):
+        return (app_id, user_id) in self._pending or (app_id, user_id) in self._inflight
+
+    def _deltas(self, key):
+        return {
+            book_id: sum(pages for _, pages, _ in entries)
+            for book_id, entries in self._pending.get(key, {}).items()
+        }
+
+    def generation(self, app_id, user_id):
+        """Okumadan önce alınır; kullanıcının süren boşaltması varsa bitmesi beklenir."""
+        key = (app_id, user_id)
+        with self.lock:
+            while key in self._inflight:
+                self._idle.wait()
+            return self._generations.get(key, 0)
+
+    # Okumadan beri boşaltma başlamadıysa veritabanı ile tampon birbirini tamamlar
+    def _unflushed(self, key, generation):
+        if key in self._inflight or self._generations.get(key, 0) != generation:
+            return None
+        return self._deltas(key)
+
+    def apply(self, app_id, user_id, found, generation):
+        """`generation` alındıktan sonra okunan kitaplara bekleyen artırımları ekler."""
+        key = (app_id, user_id)
+        while True:
+            with self.lock:
+                deltas = self._unflushed(key, generation)
+            if deltas is not None:
+                break
+            # Okuma ile boşaltma çakıştı; kitaplar boşaltmadan sonraki haliyle yeniden okunur
+            generation = self.generation(app_id, user_id)
+            ids = [book.id for book in found]
+            if ids:
+                db.session.scalars(
+                    select(Book).where(Book.id.in_(ids)).execution_options(populate_existing=True)
+                ).all()
+        self.overlay(deltas, found)
+
+    # Kitap nesnelerine bekleyen artırımlar eklenir; nesne oturumdan ayrılır ki yazılmasın
+    @staticmethod
+    def overlay(deltas, found):
+        for book in found:
+            delta = deltas.get(book.id)
+            if delta:
+                db.session.expunge(book)
+                book.pages_read += delta
+                book.last_page_read = min(book.pages_read, book.total_pages)
+
+    def increment(self, app_id, user_id, book_id, pages):
+        self.start()
+        generation = self.generation(app_id, user_id)
+        book = books.get_book(app_id, user_id, book_id)
+        if book is None:
+            return None
+        if pages > 0:
+            with self.lock:
+                self._append(app_id, user_id, book_id, pages)
+        self.apply(app_id, user_id, [book], generation)
+        return book
+
+    def _append(self, app_id, user_id, book_id, pages):
+        self._seq += 1
+        created_at = utcnow()
+        line = json.dumps({
+            'seq': self._seq, 'app': app_id, 'user': user_id, 'book': book_id, 'pages': pages,
+            'at': created_at.isoformat(),
+        }, ensure_ascii=False)
+        # O_APPEND ile tek write; süreç çökse de satır çekirdekte kalır, fsync
+        # yalnızca işletim sistemi çökmesine karşı gerekir
+        os.write(self._fd, (line + '\n').encode())
+        if self.fsync:
+            os.fsync(self._fd)
+        user = self._pending.setdefault((app_id, user_id), {})
+        user.setdefault(book_id, []).append((self._seq, pages, created_at))
+        self.buffered += 1
+        self._ops += 1
+        if self._ops >= self.max_ops:
+            self._wake.set()
+
+    def summary(self, app_id, user_id, compute):
+        key = (app_id, user_id)
+        while True:
+            generation = self.generation(app_id, user_id)
+            with self.lock:
+                deltas = self._deltas(key)
+            result = compute(app_id, user_id)
+            rows = db.session.execute(
+                select(Book.id, Book.pages_read, Book.total_pages)
+                .where(Book.app_id == app_id, Book.user_id == user_id, Book.id.in_(list(deltas)), LIVE)
+            ).all() if deltas else []
+            with self.lock:
+                # Arada boşaltma commit edildiyse yeniden hesaplanır
+                if self._unflushed(key, generation) is not None:
+                    break
+        result = dict(result)
+        for book_id, pages_read, total_pages in rows:
+            delta = deltas[book_id]
+            result['pagesRead'] += delta
+            if pages_read < total_pages <= pages_read + delta:
+                result['finishedBooks'] += 1
+        return result
+
+    # key verilirse yalnızca o kullanıcı boşaltılır (drain)
+    def flush(self, key=None):
+        with self.lock:
+            if key is None:
+                keys = list(self._pending)
+                self._ops = 0
+            else:
+                keys = [key]
+        if keys:
+            with self.app.app_context():
+                for app_id, user_id in keys:
+                    self._flush_user(app_id, user_id)
+        if key is None:
+            self._rotate()
+
+    def _flush_user(self, app_id, user_id):
+        key = (app_id, user_id)
+        with self.lock:
+            # Aynı kullanıcının boşaltmaları sırayla; işaretler artarak yazılır
+            while key in self._inflight:
+                self._idle.wait()
+            entries = self._pending.pop(key, None)
+            if entries is None:
+                return
+            self._inflight[key] = entries
+            journal = self.name
+        updates = None
+        db.session.info.pop('replicate', None)
+        # Dondurulmuş taşımada bekler; taşıma bitince hedef parçaya yazılır
+        if sharding.bind(app_id, user_id, write=True):
+            try:
+                updates, _ = _apply(journal, app_id, user_id, entries)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                updates = None
+                self.app.logger.exception('Yazma arkası tampon boşaltılamadı: %s/%s', app_id, user_id)
+        with self.lock:
+            del self._inflight[key]
+            if updates is None:
+                # Sonraki turda yeniden denenir; arada gelenler arkaya eklenir
+                for book_id, book_entries in self._pending.pop(key, {}).items():
+                    entries.setdefault(book_id, []).extend(book_entries)
+                self._pending[key] = entries
+            else:
+                self.updates += updates
+                self.commits += 1
+                self._generations[key] = self._generations.get(key, 0) + 1
+            self._idle.notify_all()
+
+    # Tampon boşken büyüyen günlük yenisiyle değiştirilir
+    def _rotate(self):
+        with self.lock:
+            if (self._fd is None or self._pending or self._inflight
+                    or os.fstat(self._fd).st_size < self.max_bytes):
+                return
+            old_fd, old_name = self._fd, self.name
+            self._open()
+        os.remove(self._path(old_name))
+        os.close(old_fd)
+        with self.app.app_context():
+            _forget(self.app, old_name)
+
+    def close(self):
+        if self._fd is None or self._pid != os.getpid():
+            return
+        self.flush()
+        with self.lock:
+            if self._pending or self._inflight:
+                # Boşaltılamayanlar günlükte kalır, sonraki açılışta oynatılır
+                return
+            fd, name = self._fd, self.name
+            self._fd = None
+        os.remove(self._path(name))
+        os.close(fd)
+        with self.app.app_context():
+            _forget(self.app, name)
+
+    def replay(self):
+        """Kilidi alınabilen, yani sahibi yaşamayan günlükleri uygular ve siler."""
+        for path in sorted(glob.glob(os.path.join(self.directory, '*' + SUFFIX))):
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                continue
+            try:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                # Kilit beklenirken sahibi günlüğü kapatıp silmiş olabilir
+                if os.fstat(fd).st_nlink:
+                    self._replay(path, fd)
+            finally:
+                os.close(fd)
+
+    def _replay(self, path, fd):
+        name = os.path.basename(path)[:-len(SUFFIX)]
+        pending = {}
+        with os.fdopen(os.dup(fd), encoding='utf-8') as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Çökme anında yarım kalmış son satır
+                    continue
+                user = pending.setdefault((entry['app'], entry['user']), {})
+                user.setdefault(entry['book'], []).append(
+                    (entry['seq'], entry['pages'], datetime.fromisoformat(entry['at']))
+                )
+        complete = True
+        with self.app.app_context():
+            for (app_id, user_id), entries in pending.items():
+                db.session.info.pop('replicate', None)
+                if not sharding.bind(app_id, user_id, write=True):
+                    complete = False
+                    continue
+                try:
+                    _, applied = _apply(name, app_id, user_id, entries)
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    self.app.logger.exception('Günlük oynatılamadı: %s (%s/%s)', name, app_id, user_id)
+                    complete = False
+                    continue
+                self.replayed += applied
+            if not complete:
+                self.app.logger.warning('Günlük %s kısmen oynatıldı; sonraki açılışta sürecek', name)
+                return
+            # Önce dosya silinir; işaretler kalırsa zararsızdır, tersi çift uygulama olur
+            os.remove(path)
+            _forget(self.app, name)
+
+    def stats(self):
+        with self.lock:
+            pending = sum(len(entries) for buffer in (self._pending, self._inflight)
+                          for user in buffer.values() for entries in user.values())
+        return {
+            'pending': pending,
+            'buffered': self.buffered,
+            'updates': self.updates,
+            'commits': self.commits,
+            'replayed': self.replayed,
+        }
+
+
+# Girdileri oturumun işlemine yazar; işaretten eski (uygulanmış) girdiler atlanır.
+# (UPDATE sayısı, uygulanan girdi sayısı) döner
+def _apply(journal, app_id, user_id, entries):
+    mark = (WriteBehindMark.journal == journal) & (WriteBehindMark.app_id == app_id) \
+        & (WriteBehindMark.user_id == user_id)
+    applied = db.session.scalar(select(WriteBehindMark.seq).where(mark)) or 0
+    last = applied
+    updates = count = 0
+    sessions = []
+    records = []
+    for book_id, book_entries in entries.items():
+        book_entries = [entry for entry in book_entries if entry[0] > applied]
+        if not book_entries:
+            continue
+        last = max(last, max(seq for seq, _, _ in book_entries))
+        count += len(book_entries)
+        stmt = (
+            update(Book)
+            .where(Book.id == book_id, Book.app_id == app_id, Book.user_id == user_id, LIVE)
+            .values(**books.increment_values(sum(pages for _, pages, _ in book_entries)))
+            .returning(Book)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        book = db.session.scalars(stmt).one_or_none()
+        updates += 1
+        if book is None:
+            # Arada silinmiş
+            continue
+        sessions.extend(
+            {'app_id': app_id, 'user_id': user_id, 'book_id': book_id, 'pages': pages,
+             'created_at': created_at}
+            for _, pages, created_at in book_entries
+        )
+        records.append((changes.MODIFIED, app_id, user_id, book_id, book.to_dict()))
+    if last == applied:
+        return 0, 0
+    stats.record_sessions(sessions)
+    changes.record_changes(records)
+    if db.session.execute(update(WriteBehindMark).where(mark).values(seq=last)).rowcount == 0:
+        db.session.execute(
+            insert(WriteBehindMark).values(journal=journal, app_id=app_id, user_id=user_id, seq=last)
+        )
+    return updates, count
+
+
+def _forget(app, journal):
+    table = WriteBehindMark.__table__
+    for engine in sharding.data_engines(app):
+        with engine.begin() as connection:
+            connection.execute(delete(table).where(table.c.journal == journal))
+
+
+def generation(app_id, user_id):
+    """Okumadan önce çağrılır; apply_pending'e verilir (tampon kapalıysa None)."""
+    buffer = current_app.extensions.get('write_behind')
+    return buffer.generation(app_id, user_id) if buffer is not None else None
+
+
+# Okunan kitaplara bu worker'da bekleyen artırımları ekler
+def apply_pending(app_id, user_id, found, generation):
+    buffer = current_app.extensions.get('write_behind')
+    if buffer is not None:
+        buffer.apply(app_id, user_id, found, generation)
+
+
+def buffered(app_id, user_id):
+    buffer = current_app.extensions.get('write_behind')
+    return buffer is not None and buffer.has_pending(app_id, user_id)
+
+
+# Artırım dışındaki yazmalardan (silme, toplu işlem, içe aktarma) önce; sıra korunur
+def drain(app_id, user_id):
+    if buffered(app_id, user_id):
+        current_app.extensions['write_behind'].flush((app_id, user_id))
+
+
+def init_app(app):
+    if not app.config['WRITE_BEHIND_ENABLED']:
+        return
+    directory = app.config['WRITE_BEHIND_JOURNAL_DIR'] or os.path.join(app.instance_path, 'write-behind')
+    buffer = WriteBehind(
+        app,
+        directory,
+        window=app.config['WRITE_BEHIND_WINDOW'],
+        max_ops=app.config['WRITE_BEHIND_MAX_OPS'],
+        fsync=app.config['WRITE_BEHIND_FSYNC'],
+        max_bytes=app.config['WRITE_BEHIND_JOURNAL_MAX_BYTES'],
+        replay_interval=app.config['WRITE_BEHIND_REPLAY_INTERVAL'],
+    )
+    buffer.replay()
+    app.extensions['write_behind'] = buffer
@@ -0,0 +1,28 @@
+import pytest
+
+from kitaptakip import create_app
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Geçici SQLite dosyası üzerinde uygulama kurar; ayarlar üzerine yazılabilir."""
+    def make(**config):
+        settings = {
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path / "test.db"}',
+            'AUTH_ENABLED': False,
+            'METRICS_ENABLED': False,
+            'PURGE_ENABLED': False,
+        }
+        settings.update(config)
+        return create_app(settings)
+    return make
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,83 @@
+import pytest
+
+from kitaptakip.auth import AuthError, KeySet, LocalIssuer, TokenVerifier, parse_keys
+
+URL = '/apps/a/users/u/books'
+
+
+@pytest.fixture
+def auth_client(make_app):
+    return make_app(AUTH_ENABLED=True, AUTH_KEYS='k1:birinci-gizli', AUTH_DEV_ISSUER=True).test_client()
+
+
+def _token(client, app_id='a', user_id='u'):
+    response = client.post('/auth/token', json={'appId': app_id, 'userId': user_id})
+    assert response.status_code == 200
+    return response.get_json()['token']
+
+
+def test_issued_token_grants_only_its_own_user(auth_client):
+    token = _token(auth_client)
+    assert token.startswith('k1.')
+    headers = {'Authorization': f'Bearer {token}'}
+    assert auth_client.get(URL, headers=headers).status_code == 200
+    assert auth_client.get('/apps/a/users/v/books', headers=headers).status_code == 403
+    assert auth_client.get(URL).status_code == 401
+    forged = token[:-2] + ('AA' if not token.endswith('AA') else 'BB')
+    assert auth_client.get(URL, headers={'Authorization': f'Bearer {forged}'}).status_code == 401
+    assert auth_client.get(URL, headers={'Authorization': 'Bearer x9.abc'}).status_code == 401
+
+
+def test_issuer_rejects_bad_body(auth_client):
+    assert auth_client.post('/auth/token', json={'appId': 'a'}).status_code == 400
+    assert auth_client.post('/auth/token', data='x').status_code == 400
+
+
+def test_key_rotation_and_revocation():
+    now = [0.0]
+    keys = [('k1', 'birinci')]
+    keyset = KeySet(lambda: keys, refresh=60, min_refresh=5, clock=lambda: now[0])
+    keyset.load()
+    verifier = TokenVerifier(keyset)
+    issuer = LocalIssuer(keyset)
+    old = issuer.issue('a', 'u')
+    assert verifier.verify(old) == ('a', 'u')
+
+    # Yeni anahtar başa eklenir: eski token'lar geçerli kalır, yenileri k2 ile imzalanır
+    keys[:] = [('k2', 'ikinci'), ('k1', 'birinci')]
+    now[0] = 60
+    new = issuer.issue('a', 'u')
+    assert new.startswith('k2.')
+    assert verifier.verify(new) == ('a', 'u')
+    assert verifier.verify(old) == ('a', 'u')
+
+    # Kaldırılan anahtarla imzalanmış ve hatırlanan token da reddedilir
+    keys[:] = [('k2', 'ikinci')]
+    now[0] = 120
+    with pytest.raises(AuthError):
+        verifier.verify(old)
+    assert verifier.verify(new) == ('a', 'u')
+
+
+def test_unknown_kid_reloads_keys_early():
+    now = [0.0]
+    keys = [('k1', 'birinci')]
+    keyset = KeySet(lambda: keys, refresh=300, min_refresh=5, clock=lambda: now[0])
+    keyset.load()
+    verifier = TokenVerifier(keyset)
+    # Başka bir worker k2'ye geçmiş ve token imzalamış
+    other = LocalIssuer(KeySet(lambda: [('k2', 'ikinci')]))
+    token = other.issue('a', 'u')
+    keys[:] = [('k2', 'ikinci'), ('k1', 'birinci')]
+    now[0] = 1
+    with pytest.raises(AuthError):
+        verifier.verify(token)
+    now[0] = 5
+    assert verifier.verify(token) == ('a', 'u')
+
+
+def test_parse_keys_rejects_malformed_entries():
+    assert parse_keys('k1:a, k2:b') == [('k1', 'a'), ('k2', 'b')]
+    for value in ('k1', ':gizli', 'k.1:gizli'):
+        with pytest.raises(RuntimeError):
+            parse_keys(value)
@@ -0,0 +1,43 @@
+URL = '/apps/a/users/u/books:batch'
+
+
+def _batch(client, ops, url=URL):
+    response = client.post(url, json={'ops': ops})
+    assert response.status_code == 200
+    return [result['status'] for result in response.get_json()['results']]
+
+
+def test_ops_apply_in_client_order(client):
+    client.post('/apps/a/users/u/books', json={'title': 'Huzur', 'totalPages': 400})
+    assert _batch(client, [
+        {'op': 'add', 'id': 'k1', 'title': 'Kuyucaklı Yusuf', 'totalPages': 200},
+        {'op': 'increment', 'bookId': 'k1', 'pages': 10},
+        {'op': 'delete', 'bookId': 'k1'},
+        # Silindikten sonra gelen artırım uygulanmaz
+        {'op': 'increment', 'bookId': 'k1', 'pages': 5},
+        {'op': 'add', 'id': 'k2', 'title': 'Sinekli Bakkal', 'totalPages': 300},
+        {'op': 'increment', 'bookId': 'k2', 'pages': 7},
+    ]) == [201, 200, 204, 404, 201, 200]
+    books = client.get('/apps/a/users/u/books').get_json()['books']
+    assert {book['id']: book['pagesRead'] for book in books if book['id'].startswith('k')} == {'k2': 7}
+
+
+def test_duplicate_ids_are_per_op_conflicts(client):
+    assert _batch(client, [
+        {'op': 'add', 'id': 'ortak', 'title': 'Çalıkuşu', 'totalPages': 500},
+        {'op': 'add', 'id': 'ortak', 'title': 'Çalıkuşu', 'totalPages': 500},
+    ]) == [201, 409]
+    assert _batch(client, [{'op': 'add', 'id': 'ortak', 'title': 'Çalıkuşu', 'totalPages': 500}]) == [409]
+
+
+def test_other_tenants_ids_are_not_exposed(client):
+    _batch(client, [{'op': 'add', 'id': 'gizli', 'title': 'Aylak Adam', 'totalPages': 200}])
+    other = '/apps/a/users/v/books:batch'
+    # Çakışma 500 değil işlem başına 409'dur; başka kullanıcının kitabına dokunulmaz
+    assert _batch(client, [
+        {'op': 'add', 'id': 'gizli', 'title': 'Başka', 'totalPages': 10},
+        {'op': 'increment', 'bookId': 'gizli', 'pages': 1},
+        {'op': 'delete', 'bookId': 'gizli'},
+    ], url=other) == [409, 404, 404]
+    book = client.get('/apps/a/users/u/books/gizli').get_json()
+    assert (book['title'], book['pagesRead']) == ('Aylak Adam', 0)
@@ -0,0 +1,93 @@
+import time
+
+from kitaptakip import summary
+from kitaptakip.cache import MISSING, InMemorySharedCache, LRUCache, TieredCache
+
+URL = '/apps/a/users/u'
+
+
+def test_lru_evicts_oldest_and_expires():
+    now = [0.0]
+    cache = LRUCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    # En son kullanılan 'a' kalır, 'b' çıkar
+    assert cache.get('b') is MISSING
+    assert cache.get('a') == 1
+    now[0] = 10
+    assert cache.get('c') is MISSING
+    assert cache.stats() == {'hits': 2, 'misses': 2, 'evictions': 1, 'size': 1, 'maxsize': 2}
+
+
+def test_invalidation_during_load_is_not_overwritten():
+    cache = TieredCache(LRUCache(), InMemorySharedCache())
+
+    def load():
+        # Yükleme sürerken gelen yazma eski değerin önbelleğe girmesini engeller
+        cache.delete('k')
+        return 'eski'
+
+    assert cache.get_or_load('k', load) == 'eski'
+    assert cache.local.get('k') is MISSING
+    assert cache.shared.get('k') is None
+    assert cache.get_or_load('k', lambda: 'yeni') == 'yeni'
+    assert cache.get_or_load('k', lambda: 'kullanılmaz') == 'yeni'
+
+
+def test_shared_tier_fills_local_and_delete_clears_both():
+    shared = InMemorySharedCache()
+    first = TieredCache(LRUCache(), shared)
+    second = TieredCache(LRUCache(), shared)
+    assert first.get_or_load('k', lambda: 1) == 1
+    assert second.get_or_load('k', lambda: 2) == 1
+    assert second.stats()['shared_hits'] == 1
+    second.delete('k')
+    assert shared.get('k') is None
+    assert second.get_or_load('k', lambda: 3) == 3
+
+
+def test_summary_is_invalidated_by_writes(client):
+    book = client.post(f'{URL}/books', json={'title': 'Tutunamayanlar', 'totalPages': 724}).get_json()
+    assert client.get(f'{URL}/summary').get_json() == {'totalBooks': 1, 'pagesRead': 0, 'finishedBooks': 0}
+    client.post(f"{URL}/books/{book['id']}/pages", json={'pages': 724})
+    assert client.get(f'{URL}/summary').get_json() == {'totalBooks': 1, 'pagesRead': 724, 'finishedBooks': 1}
+    client.delete(f"{URL}/books/{book['id']}")
+    assert client.get(f'{URL}/summary').get_json() == {'totalBooks': 0, 'pagesRead': 0, 'finishedBooks': 0}
+
+
+def test_summary_sees_writes_from_another_instance(make_app):
+    writer = make_app(CHANGE_POLL_INTERVAL=0.05).test_client()
+    reader = make_app(CHANGE_POLL_INTERVAL=0.05).test_client()
+    book = writer.post(f'{URL}/books', json={'title': 'Saatleri Ayarlama Enstitüsü', 'totalPages': 400}).get_json()
+    assert reader.get(f'{URL}/summary').get_json()['pagesRead'] == 0
+
+    # Okuyucunun önbelleğindeki özet, TTL beklenmeden veri yolu üzerinden silinir
+    writer.post(f"{URL}/books/{book['id']}/pages", json={'pages': 50})
+    deadline = time.monotonic() + 5
+    while reader.get(f'{URL}/summary').get_json()['pagesRead'] == 0 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert reader.get(f'{URL}/summary').get_json()['pagesRead'] == 50
+
+
+def test_stale_shared_write_is_not_served_to_the_writer(make_app):
+    shared = InMemorySharedCache()
+    writer_app = make_app(SUMMARY_SHARED_CACHE=shared)
+    reader_app = make_app(SUMMARY_SHARED_CACHE=shared)
+    writer, reader = writer_app.test_client(), reader_app.test_client()
+    book = writer.post(f'{URL}/books', json={'title': 'Kuyucaklı Yusuf', 'totalPages': 300}).get_json()
+
+    # Okuyucu yüklemeye başlar; yazıcı artırıp paylaşılan değeri siler; okuyucunun
+    # eski sonucu silmeden sonra paylaşılan katmana yazılır
+    cache = reader_app.extensions['summary_cache']
+    with reader_app.app_context():
+        stamp = cache.local.stamp(summary._key('a', 'u'))
+        stale = summary._load('a', 'u')
+    writer.post(f"{URL}/books/{book['id']}/pages", json={'pages': 7})
+    cache._store(summary._key('a', 'u'), stale, stamp)
+    assert shared.get(summary._key('a', 'u'))[0]['pagesRead'] == 0
+
+    # Yazıcı kendi yazmasını TTL beklemeden görür
+    assert writer.get(f'{URL}/summary').get_json()['pagesRead'] == 7
+    assert shared.get(summary._key('a', 'u'))[0]['pagesRead'] == 7
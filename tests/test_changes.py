@@ -0,0 +1,104 @@
+import json
+import time
+
+import pytest
+
+from kitaptakip import changes, encoding
+
+URL = '/apps/a/users/u'
+
+
+@pytest.fixture
+def feed_app(make_app):
+    return make_app(CHANGE_POLL_INTERVAL=0.05, CHANGE_HEARTBEAT=0.1, CHANGE_BACKLOG_LIMIT=3)
+
+
+def _add(client, title='Kürk Mantolu Madonna'):
+    return client.post(f'{URL}/books', json={'title': title, 'totalPages': 160}).get_json()['id']
+
+
+def _version(client):
+    return client.get(f'{URL}/changes', headers={'Accept': encoding.COLUMNS}).get_json()['version']
+
+
+def _open(client, **headers):
+    response = client.get(f'{URL}/changes', headers={'Accept': encoding.EVENT_STREAM, **headers},
+                          buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == encoding.EVENT_STREAM
+    return response, iter(response.response)
+
+
+# Akıştan `count` olay okur; retry ve ping satırları atlanır
+def _events(chunks, count, timeout=5):
+    events = []
+    deadline = time.monotonic() + timeout
+    while len(events) < count and time.monotonic() < deadline:
+        chunk = next(chunks)
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if chunk.startswith(('retry:', ':')):
+            continue
+        fields = dict(line.split(': ', 1) for line in chunk.strip().split('\n'))
+        event = json.loads(fields['data'])
+        assert (fields['id'], fields['event']) == (str(event['version']), event['op'])
+        events.append(event)
+    assert len(events) == count
+    return events
+
+
+def test_stream_resumes_from_last_event_id(feed_app):
+    client = feed_app.test_client()
+    book_id = _add(client)
+    since = _version(client)
+    client.post(f'{URL}/books/{book_id}/pages', json={'pages': 10})
+    client.post(f'{URL}/books/{book_id}/pages', json={'pages': 5})
+
+    response, chunks = _open(client, **{'Last-Event-ID': str(since)})
+    try:
+        backlog = _events(chunks, 2)
+        assert [event['op'] for event in backlog] == [changes.MODIFIED, changes.MODIFIED]
+        assert [event['book']['pagesRead'] for event in backlog] == [10, 15]
+        assert backlog[0]['version'] > since
+
+        # Bağlıyken gelen değişiklik canlı akar; birikmiştekiler yinelenmez
+        other = _add(feed_app.test_client(), 'Sevgili Arsız Ölüm')
+        live = _events(chunks, 1)
+        assert [(event['op'], event['bookId']) for event in live] == [(changes.ADDED, other)]
+        assert live[0]['version'] > backlog[-1]['version']
+    finally:
+        response.close()
+    assert feed_app.extensions['change_bus'].subscriber_count() == 0
+
+
+def test_stream_without_cursor_starts_at_current_version(feed_app):
+    client = feed_app.test_client()
+    _add(client)
+    response, chunks = _open(client)
+    try:
+        book_id = _add(feed_app.test_client(), 'Eylül')
+        assert [event['bookId'] for event in _events(chunks, 1)] == [book_id]
+    finally:
+        response.close()
+
+
+def test_gap_beyond_backlog_sends_reset(feed_app):
+    client = feed_app.test_client()
+    since = _version(client)
+    for i in range(4):
+        _add(client, f'Kitap {i}')
+    current = _version(client)
+
+    response, chunks = _open(client, **{'Last-Event-ID': str(since)})
+    try:
+        assert _events(chunks, 1) == [{'version': current, 'op': changes.RESET}]
+    finally:
+        response.close()
+
+    # Toplu yanıtta da birikmiş fazlaysa tek RESET döner
+    body = client.get(f'{URL}/changes', query_string={'since': since},
+                      headers={'Accept': encoding.COLUMNS}).get_json()
+    assert body['version'] == current
+    assert body['changes']['op'] == [changes.RESET]
+    body = client.get(f'{URL}/changes', query_string={'since': current - 3},
+                      headers={'Accept': encoding.COLUMNS}).get_json()
+    assert body['changes']['op'] == [changes.ADDED] * 3
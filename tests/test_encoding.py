@@ -0,0 +1,90 @@
+import gzip
+import json
+
+import brotli
+import msgpack
+import pytest
+
+from kitaptakip import encoding
+
+URL = '/apps/a/users/u/books'
+
+
+@pytest.mark.parametrize('accept, expected', [
+    (None, encoding.JSON),
+    ('*/*', encoding.JSON),
+    (encoding.COLUMNS, encoding.COLUMNS),
+    ('application/x-msgpack', encoding.MSGPACK),
+    (f'{encoding.JSON};q=0.5, {encoding.MSGPACK}', encoding.MSGPACK),
+    (f'{encoding.COLUMNS};q=0.2, {encoding.JSON};q=0.9', encoding.JSON),
+])
+def test_negotiate(app, accept, expected):
+    headers = {'Accept': accept} if accept else {}
+    with app.test_request_context(headers=headers):
+        assert encoding.negotiate([encoding.JSON, encoding.COLUMNS, encoding.MSGPACK]) == expected
+
+
+def test_compact_formats_carry_the_same_books(client):
+    client.post(URL, json={'title': 'Saatleri Ayarlama Enstitüsü', 'totalPages': 400})
+    client.post(URL, json={'title': 'Huzur', 'totalPages': 300})
+    books = client.get(URL).get_json()['books']
+
+    columns = client.get(URL, headers={'Accept': encoding.COLUMNS})
+    assert columns.mimetype == encoding.COLUMNS
+    assert columns.get_json(force=True)['books'] == encoding.book_columns(books)
+
+    packed = client.get(URL, headers={'Accept': encoding.MSGPACK})
+    assert packed.mimetype == encoding.MSGPACK
+    assert msgpack.unpackb(packed.data)['books'] == encoding.book_columns(books)
+    assert 'Accept' in packed.headers['Vary']
+
+
+@pytest.mark.parametrize('accept_encoding, expected', [
+    ('gzip', 'gzip'),
+    ('br, gzip', 'br'),
+    ('br;q=0.5, gzip', 'gzip'),
+    ('identity', None),
+    (None, None),
+])
+def test_large_bodies_are_compressed(make_app, accept_encoding, expected):
+    client = make_app(COMPRESS_MIN_SIZE=512).test_client()
+    for i in range(10):
+        client.post(URL, json={'title': f'Kitap {i}', 'totalPages': 100})
+    headers = {'Accept-Encoding': accept_encoding} if accept_encoding else {}
+    response = client.get(URL, headers=headers)
+    assert response.headers.get('Content-Encoding') == expected
+    body = response.data
+    if expected == 'gzip':
+        body = gzip.decompress(body)
+    elif expected == 'br':
+        body = brotli.decompress(body)
+    assert len(json.loads(body)['books']) == 10
+    assert 'Accept-Encoding' in response.headers['Vary']
+
+
+def test_small_bodies_are_not_compressed(client):
+    client.post(URL, json={'title': 'Kar', 'totalPages': 100})
+    assert 'Content-Encoding' not in client.get(URL, headers={'Accept-Encoding': 'br, gzip'}).headers
+
+
+def test_weak_etag_revalidates_until_a_write(client):
+    book = client.post(URL, json={'title': 'Kar', 'totalPages': 100}).get_json()
+    first = client.get(URL)
+    etag = first.headers['ETag']
+    assert etag.startswith('W/')
+
+    # Sıkıştırılmış gövde de aynı zayıf etiketi taşır
+    compressed = client.get(URL, headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert compressed.status_code == 304
+    assert compressed.headers['ETag'] == etag
+    assert compressed.data == b''
+    # Biçim ve sorgu etikete girer
+    assert client.get(URL, headers={'Accept': encoding.MSGPACK, 'If-None-Match': etag}).status_code == 200
+    assert client.get(URL, query_string={'limit': 1}, headers={'If-None-Match': etag}).status_code == 200
+
+    client.post(f"{URL}/{book['id']}/pages", json={'pages': 10})
+    changed = client.get(URL, headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert changed.get_json()['books'][0]['pagesRead'] == 10
+    assert client.get(URL, headers={'If-None-Match': changed.headers['ETag']}).status_code == 304
@@ -0,0 +1,70 @@
+from datetime import date, timedelta
+
+from sqlalchemy import update
+
+from kitaptakip import books
+from kitaptakip.extensions import db
+from kitaptakip.models import Book, utcnow
+
+URL = '/apps/a/users/u'
+
+
+def _add(client, total_pages, url=URL):
+    return client.post(f'{url}/books', json={'title': 'Kitap', 'totalPages': total_pages}).get_json()['id']
+
+
+def test_forecast_columns_follow_weekly_buckets(app, client):
+    book_id = _add(client, 300)
+
+    def increment(pages, today):
+        with app.app_context():
+            db.session.execute(
+                update(Book).where(Book.id == book_id).values(**books.increment_values(pages, today))
+            )
+            db.session.commit()
+            book = db.session.get(Book, book_id)
+            return book.week_start, book.week_pages, book.prev_week_pages, book.to_dict()['estimatedFinish']
+
+    # Pazartesi 30 sayfa: kalan 270, günde 30 sayfa
+    assert increment(30, date(2026, 10, 12)) == (date(2026, 10, 12), 30, 0, '2026-10-21')
+    # Ertesi hafta çarşamba: geçen hafta kovaya kayar, hız on günden hesaplanır
+    assert increment(20, date(2026, 10, 21)) == (date(2026, 10, 19), 20, 30, '2026-12-10')
+    # Bir hafta ara: eski kova düşer
+    assert increment(10, date(2026, 11, 9)) == (date(2026, 11, 9), 10, 0, '2026-12-03')
+    # Bitince tahmin kalkar
+    assert increment(240, date(2026, 11, 9))[3] is None
+
+
+def test_finishing_lists_books_due_within_days(client):
+    soon = _add(client, 100)
+    slow = _add(client, 10**6)
+    _add(client, 100)
+    client.post(f'{URL}/books/{soon}/pages', json={'pages': 50})
+    client.post(f'{URL}/books/{slow}/pages', json={'pages': 1})
+    today = utcnow().date()
+    # Geçen hafta okuma yok: kalan 50 sayfa, bu haftanın gün sayısı kadar sürer
+    due = today + timedelta(days=today.weekday() + 1)
+
+    found = client.get(f'{URL}/books:finishing', query_string={'days': 8}).get_json()['books']
+    assert [(book['id'], book['estimatedFinish']) for book in found] == [(soon, due.isoformat())]
+    assert client.get(f'{URL}/books:finishing', query_string={'days': 1}).get_json()['books'] == []
+    assert client.get(f'{URL}/books:finishing', query_string={'days': 0}).status_code == 400
+
+
+def test_leaderboard_hides_other_users(client):
+    for user_id, pages in (('u', 30), ('v', 50), ('w', 30)):
+        url = f'/apps/a/users/{user_id}'
+        client.post(f'{url}/books/{_add(client, 1000, url)}/pages', json={'pages': pages})
+
+    body = client.get(f'{URL}/leaderboard').get_json()
+    assert body['month'] == utcnow().strftime('%Y-%m')
+    # Eşit sayfalılar aynı sırada; başka kullanıcının kimliği dönmez
+    assert body['readers'] == [{'rank': 1, 'pages': 50}, {'rank': 2, 'pages': 30}, {'rank': 2, 'pages': 30}]
+    assert body['me'] == {'rank': 2, 'pages': 30}
+    assert 'userId' not in client.get(f'{URL}/leaderboard').get_data(as_text=True)
+
+    assert client.get('/apps/a/users/v/leaderboard', query_string={'limit': 1}).get_json() == {
+        'month': body['month'], 'readers': [{'rank': 1, 'pages': 50}], 'me': {'rank': 1, 'pages': 50},
+    }
+    assert client.get('/apps/a/users/x/leaderboard').get_json()['me'] is None
+    assert client.get(f'{URL}/leaderboard', query_string={'month': '2026-13'}).status_code == 400
@@ -0,0 +1,71 @@
+import threading
+
+from sqlalchemy import event
+
+from kitaptakip.extensions import db
+
+URL = '/apps/a/users/u/books'
+
+
+def _book(client, total_pages=100):
+    return client.post(URL, json={'title': 'Bereketli Topraklar Üzerinde', 'totalPages': total_pages}).get_json()['id']
+
+
+def _increment(client, book_id, pages, url=URL):
+    return client.post(f'{url}/{book_id}/pages', json={'pages': pages})
+
+
+def test_increment_clamps_last_page_and_finishes(client):
+    book_id = _book(client)
+    book = _increment(client, book_id, 60).get_json()
+    assert (book['pagesRead'], book['lastPageRead'], book['status']) == (60, 60, 'in_progress')
+    # Toplam okunan sayfa tutulur, son sayfa kitabın sonunda kalır
+    book = _increment(client, book_id, 60).get_json()
+    assert (book['pagesRead'], book['lastPageRead'], book['status'], book['progress']) == (120, 100, 'finished', 1.0)
+    assert client.get(f'{URL}/{book_id}').get_json()['lastPageRead'] == 100
+
+
+def test_increment_is_one_update_returning(app, client):
+    book_id = _book(client)
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        assert _increment(client, book_id, 5).get_json()['pagesRead'] == 5
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    books = [statement for statement in statements if 'books' in statement.split('(')[0]]
+    # Okuma-yazma turu yok: kitap satırına tek UPDATE ... RETURNING
+    assert len(books) == 1
+    assert books[0].startswith('UPDATE books') and 'RETURNING' in books[0]
+
+
+def test_concurrent_increments_are_not_lost(app):
+    book_id = _book(app.test_client(), total_pages=1000)
+
+    def write():
+        client = app.test_client()
+        for _ in range(25):
+            assert _increment(client, book_id, 1).status_code == 200
+
+    threads = [threading.Thread(target=write) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert app.test_client().get(f'{URL}/{book_id}').get_json()['pagesRead'] == 100
+
+
+def test_invalid_increments_are_rejected(client):
+    book_id = _book(client)
+    for pages in (-1, 'abc', None, True, 1.5):
+        assert _increment(client, book_id, pages).status_code == 400, pages
+    assert _increment(client, 'yok', 1).status_code == 404
+    # Başka kullanıcının kitabına dokunulmaz
+    assert _increment(client, book_id, 1, url='/apps/a/users/v/books').status_code == 404
+    assert client.get(f'{URL}/{book_id}').get_json()['pagesRead'] == 0
@@ -0,0 +1,84 @@
+import logging
+import re
+
+import pytest
+from sqlalchemy import event, select
+
+from kitaptakip.extensions import db
+from kitaptakip.models import Book
+
+URL = '/apps/a/users/u/books'
+
+
+@pytest.fixture
+def metrics_app(make_app):
+    app = make_app(METRICS_ENABLED=True, METRICS_SERVER_TIMING=True, N_PLUS_ONE_THRESHOLD=5)
+
+    # Kitap başına ayrı sorgu: tipik N+1
+    @app.get('/_n_plus_one')
+    def n_plus_one():
+        ids = db.session.scalars(select(Book.id)).all()
+        return {'titles': [db.session.scalar(select(Book.title).where(Book.id == book_id)) for book_id in ids]}
+
+    return app
+
+
+def _sample(text, name, **labels):
+    selector = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    match = re.search(rf'^{re.escape(name)}{{{re.escape(selector)}}} (\S+)$', text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+def test_queries_are_counted_per_request(metrics_app):
+    client = metrics_app.test_client()
+    for i in range(3):
+        client.post(URL, json={'title': f'Kitap {i}', 'totalPages': 100})
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    with metrics_app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.get(URL)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    assert response.status_code == 200
+    timing = response.headers['Server-Timing']
+    assert f'db-queries;desc="{len(executed)}"' in timing
+
+    text = client.get('/metrics').get_data(as_text=True)
+    labels = {'route': 'api.list_books', 'method': 'GET', 'status': '200'}
+    assert _sample(text, 'kitaptakip_db_queries_per_request_count', **labels) == 1
+    assert _sample(text, 'kitaptakip_db_queries_per_request_sum', **labels) == len(executed)
+    assert _sample(text, 'kitaptakip_http_request_duration_seconds_count',
+                   route='api.add_book', method='POST', status='201') == 3
+    # Liste rotası aynı ifadeyi tekrarlamaz
+    assert _sample(text, 'kitaptakip_n_plus_one_requests_total', route='api.list_books') is None
+
+
+def test_repeated_statement_is_flagged_as_n_plus_one(metrics_app, caplog):
+    client = metrics_app.test_client()
+    for i in range(6):
+        client.post(URL, json={'title': f'Kitap {i}', 'totalPages': 100})
+    with caplog.at_level(logging.WARNING):
+        for _ in range(2):
+            assert len(client.get('/_n_plus_one').get_json()['titles']) == 6
+    metrics = metrics_app.extensions['metrics']
+    assert metrics.n_plus_one_requests == {'n_plus_one': 2}
+    # Aynı rota/ifade için uyarı bir kez yazılır
+    assert len([record for record in caplog.records if 'N+1' in record.getMessage()]) == 1
+    text = client.get('/metrics').get_data(as_text=True)
+    assert _sample(text, 'kitaptakip_n_plus_one_requests_total', route='n_plus_one') == 2
+
+
+def test_slow_queries_are_counted_without_parameters(make_app, caplog):
+    client = make_app(METRICS_ENABLED=True, SLOW_QUERY_MS=0).test_client()
+    with caplog.at_level(logging.WARNING):
+        client.post(URL, json={'title': 'Gizli Başlık', 'totalPages': 100})
+    assert client.application.extensions['metrics'].slow_queries > 0
+    messages = [record.getMessage() for record in caplog.records if 'Yavaş sorgu' in record.getMessage()]
+    assert messages
+    assert not any('Gizli Başlık' in message for message in messages)
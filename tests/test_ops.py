@@ -0,0 +1,27 @@
+import pytest
+
+REMOTE = {'REMOTE_ADDR': '203.0.113.7'}
+
+
+@pytest.mark.parametrize('path', ['/_stats', '/metrics'])
+def test_ops_endpoints_are_local_only_without_token(make_app, path):
+    client = make_app(METRICS_ENABLED=True).test_client()
+    assert client.get(path).status_code == 200
+    assert client.get(path, environ_base=REMOTE).status_code == 404
+    # Aynı sunucudaki vekilden gelen istek de dışarıdandır
+    assert client.get(path, headers={'X-Forwarded-For': '203.0.113.7'}).status_code == 404
+
+
+def test_ops_token_is_required_when_set(make_app):
+    client = make_app(OPS_TOKEN='gizli').test_client()
+    assert client.get('/_stats').status_code == 401
+    assert client.get('/_stats', headers={'Authorization': 'Bearer baska'}).status_code == 401
+    response = client.get('/_stats', headers={'Authorization': 'Bearer gizli'}, environ_base=REMOTE)
+    assert response.status_code == 200
+    assert 'summaryCache' in response.get_json()
+
+
+def test_shard_moves_are_not_public(make_app, tmp_path):
+    client = make_app(SHARDS=f's0=sqlite:///{tmp_path / "s0.db"}').test_client()
+    assert client.get('/_shards', environ_base=REMOTE).status_code == 404
+    assert client.get('/_shards').get_json()['moves'] == []
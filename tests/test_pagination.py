@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from kitaptakip.extensions import db
+from kitaptakip.models import Book
+
+URL = '/apps/a/users/u/books'
+
+# (başlık, toplam sayfa, okunan): eşit başlık, eşit ilerleme ve eşit oluşturma anı var
+BOOKS = [
+    ('Tutunamayanlar', 724, 0),
+    ('Aylak Adam', 200, 50),
+    ('Aylak Adam', 400, 100),
+    ('Kar', 100, 100),
+    ('Huzur', 400, 0),
+    ('Beyaz Kale', 160, 160),
+    ('Sessiz Ev', 300, 75),
+]
+SAME_MOMENT = datetime(2026, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def library(app, client):
+    ids = []
+    for title, total_pages, pages in BOOKS:
+        book = client.post(URL, json={'title': title, 'totalPages': total_pages}).get_json()
+        if pages:
+            client.post(f"{URL}/{book['id']}/pages", json={'pages': pages})
+        ids.append(book['id'])
+    with app.app_context():
+        # İlk üçü aynı anda; diğerleri milisaniye altı sıralama farkına kalmasın diye ayrık
+        for i, book_id in enumerate(ids):
+            created_at = SAME_MOMENT + timedelta(seconds=max(0, i - 2))
+            db.session.execute(update(Book).where(Book.id == book_id).values(created_at=created_at))
+        db.session.commit()
+    return {book['id']: book for book in client.get(URL).get_json()['books']}
+
+
+def _key(book, sort):
+    if sort == 'title':
+        return book['title']
+    if sort == 'progress':
+        return book['pagesRead'] / book['totalPages']
+    return book['createdAt']
+
+
+def _walk(client, **params):
+    ids, cursor = [], None
+    while True:
+        query = {**params, 'limit': 2, **({'cursor': cursor} if cursor else {})}
+        body = client.get(URL, query_string=query).get_json()
+        assert len(body['books']) <= 2
+        ids += [book['id'] for book in body['books']]
+        cursor = body['nextCursor']
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize('sort', ['created', 'title', 'progress'])
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+def test_cursor_walk_matches_full_order(client, library, sort, order):
+    expected = sorted(library, key=lambda book_id: (_key(library[book_id], sort), book_id),
+                      reverse=order == 'desc')
+    # Eşit anahtarlı kitaplar kimliğe göre sıralanır; sayfa sınırında tekrar ya da kayıp olmaz
+    assert _walk(client, sort=sort, order=order) == expected
+    assert [book['id'] for book in client.get(URL, query_string={'sort': sort, 'order': order})
+            .get_json()['books']] == expected
+
+
+@pytest.mark.parametrize('sort', ['created', 'title', 'progress'])
+@pytest.mark.parametrize('status', ['unread', 'in_progress', 'finished'])
+def test_status_filter_pages(client, library, sort, status):
+    expected = sorted((book_id for book_id, book in library.items() if book['status'] == status),
+                      key=lambda book_id: (_key(library[book_id], sort), book_id))
+    assert len(expected) >= 2
+    assert _walk(client, sort=sort, status=status) == expected
+
+
+def test_invalid_cursor_and_params_are_rejected(client, library):
+    first = client.get(URL, query_string={'sort': 'title', 'limit': 2}).get_json()
+    cursor = first['nextCursor']
+    assert client.get(URL, query_string={'sort': 'title', 'cursor': cursor}).status_code == 200
+    for query in (
+        {'cursor': 'bozuk!'},
+        {'cursor': 'W10'},
+        # İmleç başka sıralama ya da yön için üretilmiş
+        {'sort': 'progress', 'cursor': cursor},
+        {'sort': 'title', 'order': 'desc', 'cursor': cursor},
+        {'status': 'okunmuş'},
+        {'sort': 'pages'},
+        {'order': 'yukarı'},
+        {'limit': 0},
+    ):
+        response = client.get(URL, query_string=query)
+        assert response.status_code == 400, query
@@ -0,0 +1,74 @@
+import sqlite3
+
+import pytest
+
+from kitaptakip import encoding
+from kitaptakip.replicas import TOKEN_HEADER, parse_replicas
+
+URL = '/apps/a/users/u'
+
+
+@pytest.fixture
+def replicated(make_app, tmp_path):
+    """Birincil ve elle eşitlenen yerel SQLite kopyası; eşitleme anı testte seçilir."""
+    primary = tmp_path / 'test.db'
+    replica = tmp_path / 'replica.db'
+    app = make_app(REPLICAS=f'default=sqlite:///{replica}', SUMMARY_CACHE_ENABLED=False)
+
+    def sync():
+        source = sqlite3.connect(primary)
+        target = sqlite3.connect(replica, timeout=5)
+        source.backup(target)
+        target.close()
+        source.close()
+
+    return app, sync
+
+
+def test_token_skips_lagging_replica(replicated):
+    app, sync = replicated
+    client = app.test_client()
+    counters = app.extensions['replicas']
+    book = client.post(f'{URL}/books', json={'title': 'İnce Memed', 'totalPages': 436}).get_json()
+    sync()
+
+    response = client.post(f"{URL}/books/{book['id']}/pages", json={'pages': 10})
+    assert response.get_json()['pagesRead'] == 10
+    token = {TOKEN_HEADER: response.headers[TOKEN_HEADER]}
+
+    # Belirteçsiz okuma kopyadan gelir ve yazmayı henüz görmez
+    assert client.get(f"{URL}/books/{book['id']}").get_json()['pagesRead'] == 0
+    assert counters.replica_reads == 1
+    # Belirteçli okuma geride kalan kopyayı atlar
+    assert client.get(f"{URL}/books/{book['id']}", headers=token).get_json()['pagesRead'] == 10
+    assert client.get(f'{URL}/summary', headers=token).get_json()['pagesRead'] == 10
+    assert (counters.replica_reads, counters.primary_fallbacks) == (1, 2)
+
+    # Kopya yetişince aynı belirteçle okumalar yine kopyaya gider
+    sync()
+    assert client.get(f"{URL}/books/{book['id']}", headers=token).get_json()['pagesRead'] == 10
+    assert (counters.replica_reads, counters.primary_fallbacks) == (2, 2)
+
+
+def test_writes_and_change_stream_use_primary(replicated):
+    app, sync = replicated
+    client = app.test_client()
+    sync()
+    book = client.post(f'{URL}/books', json={'title': 'Yaban', 'totalPages': 200}).get_json()
+    # Kopya eşitlenmedi: kitap yalnızca birincilde
+    assert client.get(f'{URL}/books').get_json()['books'] == []
+    response = client.get(f'{URL}/changes', query_string={'since': 0}, headers={'Accept': encoding.COLUMNS})
+    assert book['id'] in response.get_data(as_text=True)
+
+
+def test_parse_replicas_groups_by_primary():
+    assert parse_replicas('default=sqlite:///a, default=sqlite:///b') == {
+        'default': ['sqlite:///a', 'sqlite:///b'],
+    }
+    with pytest.raises(RuntimeError):
+        parse_replicas('sqlite:///a')
+
+
+def test_unknown_primary_is_rejected(make_app, tmp_path):
+    with pytest.raises(RuntimeError):
+        make_app(REPLICAS=f's9=sqlite:///{tmp_path / "r.db"}')
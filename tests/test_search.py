@@ -0,0 +1,63 @@
+import time
+
+from kitaptakip.search import TitleTrie
+from kitaptakip.turkish import fold
+
+URL = '/apps/a/users/u'
+
+
+def _suggest(client, query):
+    response = client.get(f'{URL}/search', query_string={'q': query, 'typeahead': '1'})
+    return [hit['title'] for hit in response.get_json()['suggestions']]
+
+
+def test_search_folds_turkish_and_skips_deleted(client):
+    kept = client.post(f'{URL}/books', json={'title': 'Şeker Portakalı', 'totalPages': 100}).get_json()
+    gone = client.post(f'{URL}/books', json={'title': 'Şehir Mektupları', 'totalPages': 100}).get_json()
+    assert client.delete(f"{URL}/books/{gone['id']}").status_code == 204
+    found = client.get(f'{URL}/search', query_string={'q': 'seh'}).get_json()['books']
+    assert found == []
+    found = client.get(f'{URL}/search', query_string={'q': 'ŞEKER port'}).get_json()['books']
+    assert [book['id'] for book in found] == [kept['id']]
+
+
+def test_typeahead_sees_writes_from_another_instance(make_app):
+    writer = make_app(CHANGE_POLL_INTERVAL=0.05).test_client()
+    reader = make_app(CHANGE_POLL_INTERVAL=0.05).test_client()
+    writer.post(f'{URL}/books', json={'title': 'Kürk Mantolu Madonna', 'totalPages': 160})
+    assert _suggest(reader, 'kü') == ['Kürk Mantolu Madonna']
+
+    # Okuyucunun önbelleğindeki ağaç, diğer örnekteki eklemeyle geçersiz kılınır
+    writer.post(f'{URL}/books', json={'title': 'Küçük Prens', 'totalPages': 96})
+    deadline = time.monotonic() + 5
+    while len(_suggest(reader, 'kü')) < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert set(_suggest(reader, 'kü')) == {'Küçük Prens', 'Kürk Mantolu Madonna'}
+
+
+def _trie(titles, fanout):
+    trie = TitleTrie(fanout)
+    for i, title in enumerate(titles):
+        trie.add(f'b{i}', title, fold(title))
+    return trie
+
+
+def test_trie_keeps_first_titles_in_order():
+    # Ekleme sırası karışık: düğüm ilk gelenleri değil başlık sırasıyla ilkleri tutar
+    trie = _trie(['Kartal Yuvası', 'Kara', 'Karanlık Oda', 'Kar'], fanout=2)
+    assert [hit['title'] for hit in trie.search('kar', 2)] == ['Kar', 'Kara']
+    assert [hit['title'] for hit in trie.search('oda', 5)] == ['Karanlık Oda']
+    # Dolu düğüm daha fazlasını ya da süzülmüş sonucu kesin veremez
+    assert trie.search('kar', 3) is None
+    assert trie.search('kar oda', 1) is None
+    # Aynı öneki paylaşan iki kelime kitabı iki kez saymaz
+    assert [hit['title'] for hit in _trie(['Kara Karanlık'], fanout=2).search('ka', 5)] == ['Kara Karanlık']
+
+
+def test_typeahead_falls_back_to_database_when_trie_is_full(app, client):
+    app.extensions['search_trie'].fanout = 2
+    for title in ('Kar', 'Kırmızı Saçlı Kadın', 'Kafamda Bir Tuhaflık', 'Kara Kitap', 'Masumiyet Müzesi'):
+        client.post(f'{URL}/books', json={'title': title, 'totalPages': 100})
+    assert _suggest(client, 'ka kit') == ['Kara Kitap']
+    assert _suggest(client, 'ka') == ['Kafamda Bir Tuhaflık', 'Kar', 'Kara Kitap', 'Kırmızı Saçlı Kadın']
+    assert _suggest(client, 'müze') == ['Masumiyet Müzesi']
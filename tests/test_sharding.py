@@ -0,0 +1,211 @@
+import threading
+
+import pytest
+from sqlalchemy import func, select
+from werkzeug.exceptions import ServiceUnavailable
+
+from kitaptakip import books, sharding
+from kitaptakip.extensions import db
+from kitaptakip.models import Book
+
+APP_ID = 'a'
+SHARDS = ('s0', 's1', 's2')
+
+
+@pytest.fixture
+def sharded(make_app, tmp_path):
+    """Her parçası ayrı bir yerel SQLite dosyası olan uygulama."""
+    def make(**config):
+        shards = ','.join(f'{name}=sqlite:///{tmp_path / name}.db' for name in SHARDS)
+        return make_app(SHARDS=shards, SUMMARY_CACHE_ENABLED=False, **config)
+    return make
+
+
+def _add(client, user_id, pages=0):
+    response = client.post(f'/apps/{APP_ID}/users/{user_id}/books',
+                           json={'title': f'Kitap {user_id}', 'totalPages': 10**6})
+    book = response.get_json()
+    if pages:
+        client.post(f"/apps/{APP_ID}/users/{user_id}/books/{book['id']}/pages", json={'pages': pages})
+    return book['id']
+
+
+def _rows(app, shard, user_id=None):
+    with app.app_context():
+        sharding.use(shard)
+        stmt = select(func.count()).select_from(Book)
+        if user_id is not None:
+            stmt = stmt.where(Book.app_id == APP_ID, Book.user_id == user_id)
+        return db.session.scalar(stmt)
+
+
+def _pages(app, shard, book_id):
+    with app.app_context():
+        sharding.use(shard)
+        return db.session.get(Book, book_id).pages_read
+
+
+def test_ring_is_stable_and_moves_only_to_new_shard():
+    keys = [(APP_ID, f'u{i}') for i in range(2000)]
+    ring = sharding.HashRing(SHARDS)
+    placed = {key: ring.node(*key) for key in keys}
+    assert placed == {key: sharding.HashRing(SHARDS).node(*key) for key in keys}
+    assert set(placed.values()) == set(SHARDS)
+
+    grown = sharding.HashRing(SHARDS + ('s3',))
+    moved = [key for key in keys if grown.node(*key) != placed[key]]
+    assert all(grown.node(*key) == 's3' for key in moved)
+    # Beklenen 1/4; sanal düğümlerle sapma küçüktür
+    assert 0.15 < len(moved) / len(keys) < 0.35
+
+
+def test_requests_land_on_the_users_shard(sharded):
+    app = sharded()
+    client = app.test_client()
+    router = app.extensions['shard_router']
+    users = [f'u{i}' for i in range(30)]
+    for user_id in users:
+        _add(client, user_id)
+    for user_id in users:
+        home, _ = router.locate(APP_ID, user_id)
+        assert {shard: _rows(app, shard, user_id) for shard in SHARDS} == {
+            shard: int(shard == home) for shard in SHARDS
+        }
+        listed = client.get(f'/apps/{APP_ID}/users/{user_id}/books').get_json()['books']
+        assert len(listed) == 1
+
+
+def test_totals_sum_all_shards(sharded):
+    app = sharded()
+    client = app.test_client()
+    for i in range(20):
+        for _ in range(i % 3 + 1):
+            _add(client, f'u{i}', pages=i)
+    result = sharding.totals(app.extensions['shard_router'])
+    assert result['total'] == {
+        'users': 20,
+        'books': sum(i % 3 + 1 for i in range(20)),
+        'pagesRead': sum(i * (i % 3 + 1) for i in range(20)),
+    }
+    assert result['total']['books'] == sum(_rows(app, shard) for shard in SHARDS)
+    assert sum(shard['users'] for shard in result['shards'].values()) == 20
+    # Parçalar her çağrıda aynı iş parçacığı havuzunda sorgulanır
+    pool = app.extensions['shard_router']._pool
+    assert sharding.totals(app.extensions['shard_router']) == result
+    assert app.extensions['shard_router']._pool is pool
+
+
+def test_move_user_loses_no_writes(sharded):
+    app = sharded(SHARD_REFRESH=0.1)
+    client = app.test_client()
+    router = app.extensions['shard_router']
+    user_id = 'u0'
+    book_id = _add(client, user_id, pages=5)
+    source, _ = router.locate(APP_ID, user_id)
+    target = next(shard for shard in SHARDS if shard != source)
+
+    accepted = []
+    failed = []
+    states = set()
+    stop = threading.Event()
+
+    def write():
+        writer = app.test_client()
+        while not stop.is_set():
+            response = writer.post(f'/apps/{APP_ID}/users/{user_id}/books/{book_id}/pages',
+                                   json={'pages': 1})
+            (accepted if response.status_code == 200 else failed).append(response.status_code)
+
+    def record(message):
+        _, move = router.locate(APP_ID, user_id)
+        states.add(move['state'])
+
+    threads = [threading.Thread(target=write) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    try:
+        with app.app_context():
+            assert sharding.move_user(router, APP_ID, user_id, target, wait=0.3, log=record)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    assert states == {sharding.COPY, sharding.DUAL, sharding.FROZEN, sharding.MOVED}
+    assert failed == []
+    assert accepted
+    assert router.locate(APP_ID, user_id)[0] == target
+    assert _pages(app, target, book_id) == 5 + len(accepted)
+    assert _rows(app, source, user_id) == 0
+    # Taşımadan sonraki yazmalar da hedefe gider
+    client.post(f'/apps/{APP_ID}/users/{user_id}/books/{book_id}/pages', json={'pages': 1})
+    assert _pages(app, target, book_id) == 6 + len(accepted)
+
+
+def test_write_routed_before_cutover_is_rejected_at_commit(sharded):
+    app = sharded(SHARD_REFRESH=0.1)
+    client = app.test_client()
+    router = app.extensions['shard_router']
+    user_id = 'u0'
+    book_id = _add(client, user_id, pages=5)
+    source, _ = router.locate(APP_ID, user_id)
+    target = next(shard for shard in SHARDS if shard != source)
+
+    phases = {'çift yazılıyor': threading.Event(), 'geçildi': threading.Event()}
+
+    def record(message):
+        for phase, event in phases.items():
+            if phase in message:
+                event.set()
+
+    def move():
+        with app.app_context():
+            sharding.move_user(router, APP_ID, user_id, target, wait=0.3, log=record)
+
+    mover = threading.Thread(target=move)
+    mover.start()
+    try:
+        assert phases['çift yazılıyor'].wait(5)
+        with app.app_context():
+            # İstek DUAL'da yönlendirilir, commit'i geçişten sonraya kalır
+            assert sharding.bind(APP_ID, user_id, write=True)
+            assert books.increment_pages(APP_ID, user_id, book_id, 3) is not None
+            assert phases['geçildi'].wait(5)
+            with pytest.raises(ServiceUnavailable):
+                db.session.commit()
+            db.session.rollback()
+    finally:
+        mover.join()
+
+    # Kabul edilmiş hiçbir yazma kaybolmaz; istemci yeniden dener ve hedefe yazar
+    assert _pages(app, target, book_id) == 5
+    response = client.post(f'/apps/{APP_ID}/users/{user_id}/books/{book_id}/pages', json={'pages': 3})
+    assert response.status_code == 200
+    assert _pages(app, target, book_id) == 8
+    assert _rows(app, source, user_id) == 0
+
+
+def test_dual_writes_advance_synced_version(sharded):
+    app = sharded(SHARD_REFRESH=0.1)
+    client = app.test_client()
+    router = app.extensions['shard_router']
+    user_id = 'u0'
+    book_id = _add(client, user_id, pages=5)
+    source, _ = router.locate(APP_ID, user_id)
+    target = next(shard for shard in SHARDS if shard != source)
+    synced = []
+
+    def record(message):
+        if 'çift yazılıyor' in message:
+            client.post(f'/apps/{APP_ID}/users/{user_id}/books/{book_id}/pages', json={'pages': 1})
+            synced.append(router.locate(APP_ID, user_id)[1]['synced_version'])
+            client.post(f'/apps/{APP_ID}/users/{user_id}/books/{book_id}/pages', json={'pages': 1})
+            synced.append(router.locate(APP_ID, user_id)[1]['synced_version'])
+            synced.append(_pages(app, target, book_id))
+
+    with app.app_context():
+        assert sharding.move_user(router, APP_ID, user_id, target, wait=0.3, log=record)
+    # Her çift yazma yalnızca kendinden sonrasını kopyalasın diye sürüm ilerler
+    assert synced[0] < synced[1]
+    assert synced[2] == 7
+    assert _pages(app, target, book_id) == 7
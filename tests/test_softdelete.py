@@ -0,0 +1,144 @@
+import multiprocessing
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import inspect, select, update
+
+from kitaptakip import encoding, purge
+from kitaptakip.extensions import db
+from kitaptakip.models import Book, utcnow
+
+URL = '/apps/a/users/u/books'
+
+
+def _add(client, title='Kiralık Konak'):
+    return client.post(URL, json={'title': title, 'totalPages': 300}).get_json()['id']
+
+
+def _ids(client):
+    return [book['id'] for book in client.get(URL).get_json()['books']]
+
+
+def _age(app, book_id, seconds):
+    with app.app_context():
+        db.session.execute(
+            update(Book).where(Book.id == book_id).values(deleted_at=utcnow() - timedelta(seconds=seconds))
+        )
+        db.session.commit()
+
+
+def test_restore_only_within_undo_window(make_app):
+    app = make_app(DELETE_UNDO_SECONDS=60)
+    client = app.test_client()
+    kept, lost = _add(client), _add(client, 'Yaprak Dökümü')
+    assert client.delete(f'{URL}/{kept}').status_code == 204
+    assert client.delete(f'{URL}/{lost}').status_code == 204
+    assert _ids(client) == []
+    assert client.get(f'{URL}/{kept}').status_code == 404
+    # Silinmiş kitap yeniden silinemez
+    assert client.delete(f'{URL}/{kept}').status_code == 404
+
+    response = client.post(f'{URL}/{kept}:restore')
+    assert response.status_code == 200
+    assert response.get_json()['id'] == kept
+    _age(app, lost, 61)
+    assert client.post(f'{URL}/{lost}:restore').status_code == 404
+    assert _ids(client) == [kept]
+    # Silinmemiş kitap geri alınamaz
+    assert client.post(f'{URL}/{kept}:restore').status_code == 404
+
+
+def test_delete_emits_tombstone_event(make_app):
+    app = make_app(DELETE_UNDO_SECONDS=60)
+    client = app.test_client()
+    book_id = _add(client)
+    since = client.get('/apps/a/users/u/changes', headers={'Accept': encoding.COLUMNS}).get_json()['version']
+    client.delete(f'{URL}/{book_id}')
+    client.post(f'{URL}/{book_id}:restore')
+
+    body = client.get('/apps/a/users/u/changes', query_string={'since': since},
+                      headers={'Accept': encoding.COLUMNS}).get_json()
+    changes = body['changes']
+    assert changes['op'] == ['removed', 'added']
+    assert changes['bookId'] == [book_id, book_id]
+    deleted_at = datetime.fromisoformat(changes['deletedAt'][0].rstrip('Z'))
+    undo_until = datetime.fromisoformat(changes['undoUntil'][0].rstrip('Z'))
+    assert undo_until - deleted_at == timedelta(seconds=60)
+    # Geri alınan kitap tam haliyle yeniden eklenir
+    assert changes['title'][1] == 'Kiralık Konak'
+
+
+def test_purge_batch_removes_only_expired_tombstones(app, client):
+    book_ids = [_add(client, f'Kitap {i}') for i in range(5)]
+    for book_id in book_ids[:4]:
+        client.delete(f'{URL}/{book_id}')
+    for age, book_id in zip((300, 200, 100), book_ids):
+        _age(app, book_id, age)
+
+    before = utcnow() - timedelta(seconds=50)
+    with app.app_context():
+        with db.engine.begin() as connection:
+            assert purge.purge_batch(connection, before, 2) == 2
+            # En eski olanlar önce
+            assert connection.scalar(select(Book.id).where(Book.id == book_ids[2])) == book_ids[2]
+            assert purge.purge_batch(connection, before, 2) == 1
+            assert purge.purge_batch(connection, before, 2) == 0
+        # Geri alma penceresindeki mezar taşı kalır
+        assert {book.id for book in db.session.query(Book)} == set(book_ids[3:])
+    assert _ids(client) == [book_ids[4]]
+    assert app.extensions['reaper'].run_once() == 0
+
+
+def test_parse_hours_and_in_hours():
+    assert purge.parse_hours('') is None
+    assert purge.parse_hours(None) is None
+    assert purge.parse_hours(' 2-6 ') == (2, 6)
+    assert purge.parse_hours('3') == (3, 4)
+    for value in ('25-3', 'x-2', '-1'):
+        with pytest.raises(ValueError):
+            purge.parse_hours(value)
+
+    assert [hour for hour in range(24) if purge.in_hours((2, 6), hour)] == [2, 3, 4, 5]
+    # Gece yarısını aşan aralık
+    assert [hour for hour in range(24) if purge.in_hours((22, 2), hour)] == [0, 1, 22, 23]
+    assert all(purge.in_hours(None, hour) for hour in range(24))
+
+
+def _start(make_app, barrier):
+    barrier.wait()
+    make_app()
+
+
+def test_workers_migrate_legacy_schema_concurrently(make_app, tmp_path):
+    # İlk sürümün books tablosu: tahmin, deleted_at ve title_folded sütunları yok
+    connection = sqlite3.connect(tmp_path / 'test.db')
+    connection.execute(
+        'CREATE TABLE books (id VARCHAR(32) PRIMARY KEY, app_id VARCHAR(128), user_id VARCHAR(128), '
+        'title VARCHAR(512), total_pages INTEGER, pages_read INTEGER, last_page_read INTEGER, '
+        'created_at DATETIME)'
+    )
+    connection.execute(
+        "INSERT INTO books VALUES ('b1', 'a', 'u', 'Çalıkuşu', 500, 10, 10, '2026-01-01 10:00:00')"
+    )
+    connection.commit()
+    connection.close()
+
+    context = multiprocessing.get_context('fork')
+    barrier = context.Barrier(3)
+    workers = [context.Process(target=_start, args=(make_app, barrier)) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+    # Kilit olmadan aynı sütunu ikinci kez ekleyen worker çöker
+    assert [worker.exitcode for worker in workers] == [0, 0, 0]
+
+    app = make_app()
+    with app.app_context():
+        columns = {column['name'] for column in inspect(db.engine).get_columns('books')}
+    assert {'week_start', 'finish_day', 'deleted_at', 'title_folded'} <= columns
+    client = app.test_client()
+    assert _ids(client) == ['b1']
+    assert [book['id'] for book in client.get('/apps/a/users/u/search', query_string={'q': 'çalı'})
+            .get_json()['books']] == ['b1']
@@ -0,0 +1,82 @@
+import json
+import os
+
+from sqlalchemy import event, func, select
+
+from kitaptakip import startup, writebehind
+from kitaptakip.extensions import db
+from kitaptakip.models import Book
+
+URL = '/apps/a/users/u/books'
+
+
+def _record_statements(app):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', record)
+    return statements
+
+
+def test_warm_up_reads_only_and_runs_hooks(make_app):
+    calls = []
+    app = make_app(WARMUP_HOOKS=(calls.append,))
+    statements = _record_statements(app)
+    startup.warm_up(app)
+
+    assert calls == [app]
+    assert statements
+    # Isınma sorguları yazmaz
+    assert not [statement for statement in statements
+                if statement.lstrip().split()[0].upper() in ('INSERT', 'UPDATE', 'DELETE')]
+    with app.app_context():
+        assert db.engine.pool.checkedin() > 0
+        assert db.session.scalar(select(func.count()).select_from(Book)) == 0
+    assert app.test_client().get(URL).get_json()['books'] == []
+
+
+def test_warm_up_opens_a_connection_per_shard(make_app, tmp_path):
+    shards = ','.join(f'{name}=sqlite:///{tmp_path / name}.db' for name in ('s0', 's1'))
+    app = make_app(SHARDS=shards, SUMMARY_CACHE_ENABLED=False)
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+        startup.warm_up(app)
+        # Isınma her parçanın havuzunda bağlantı açar
+        assert all(db.engines[shard].pool.checkedin() > 0 for shard in ('s0', 's1'))
+        assert 'shard' not in db.session.info
+
+
+def test_after_fork_resets_pools_and_replays_journals(make_app, tmp_path):
+    journal = tmp_path / 'journal'
+    app = make_app(WRITE_BEHIND_ENABLED=True, WRITE_BEHIND_WINDOW=60, SUMMARY_CACHE_ENABLED=False,
+                   WRITE_BEHIND_JOURNAL_DIR=str(journal))
+    client = app.test_client()
+    book_id = client.post(URL, json={'title': 'Tutunamayanlar', 'totalPages': 700}).get_json()['id']
+    with app.app_context():
+        pools = {name: engine.pool for name, engine in db.engines.items()}
+
+    # Ana süreçten sonra ölen bir worker'ın günlüğü
+    journal.mkdir(exist_ok=True)
+    line = {'seq': 1, 'app': 'a', 'user': 'u', 'book': book_id, 'pages': 7, 'at': '2026-01-01T10:00:00'}
+    (journal / f'olu{writebehind.SUFFIX}').write_text(json.dumps(line) + '\n')
+
+    startup.after_fork(app)
+
+    with app.app_context():
+        # Havuzlar yenilenir, ısınma yeni havuzda bağlantı açar
+        assert all(engine.pool is not pools[name] for name, engine in db.engines.items())
+        assert db.engine.pool.checkedin() > 0
+    buffer = app.extensions['write_behind']
+    assert buffer.replayed == 1
+    assert not (journal / f'olu{writebehind.SUFFIX}').exists()
+    assert buffer._pid == os.getpid() and buffer._thread.is_alive()
+    assert client.get(f'{URL}/{book_id}').get_json()['pagesRead'] == 7
+    # Kendi günlüğü açıktır; artırımlar tampona girer
+    assert client.post(f'{URL}/{book_id}/pages', json={'pages': 3}).get_json()['pagesRead'] == 10
+    assert (journal / f'{buffer.name}{writebehind.SUFFIX}').exists()
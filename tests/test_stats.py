@@ -0,0 +1,88 @@
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select
+
+from kitaptakip import stats
+from kitaptakip.extensions import db
+from kitaptakip.models import DailyUserStats, MonthlyUserStats, ReadingSession, utcnow
+
+URL = '/apps/a/users/u'
+
+
+def _session(day, pages, user_id='u', book_id='b1'):
+    return {'app_id': 'a', 'user_id': user_id, 'book_id': book_id, 'pages': pages,
+            'created_at': datetime.combine(day, datetime.min.time()) + timedelta(hours=10)}
+
+
+def _rollups():
+    daily = db.session.execute(
+        select(DailyUserStats.user_id, DailyUserStats.day, DailyUserStats.pages, DailyUserStats.sessions)
+        .order_by(DailyUserStats.user_id, DailyUserStats.day)
+    ).all()
+    monthly = db.session.execute(
+        select(MonthlyUserStats.user_id, MonthlyUserStats.month, MonthlyUserStats.pages)
+        .order_by(MonthlyUserStats.user_id, MonthlyUserStats.month)
+    ).all()
+    return [tuple(row) for row in daily], [tuple(row) for row in monthly]
+
+
+def test_sessions_roll_up_by_day_and_month(app):
+    with app.app_context():
+        stats.record_sessions([
+            _session(date(2026, 9, 30), 10),
+            _session(date(2026, 9, 30), 5, book_id='b2'),
+            _session(date(2026, 10, 1), 20),
+            _session(date(2026, 10, 1), 7, user_id='v'),
+        ])
+        stats.record_sessions([_session(date(2026, 10, 2), 3)])
+        db.session.commit()
+
+        assert db.session.query(ReadingSession).count() == 5
+        daily, monthly = _rollups()
+        assert daily == [
+            ('u', date(2026, 9, 30), 15, 2),
+            ('u', date(2026, 10, 1), 20, 1),
+            ('u', date(2026, 10, 2), 3, 1),
+            ('v', date(2026, 10, 1), 7, 1),
+        ]
+        assert monthly == [('u', date(2026, 9, 1), 15), ('u', date(2026, 10, 1), 23), ('v', date(2026, 10, 1), 7)]
+
+        # Ham oturumlardan yeniden kurmak artımlı özetle aynı sonucu verir
+        stats.rebuild_daily_stats()
+        db.session.commit()
+        assert _rollups() == (daily, monthly)
+
+
+def test_reading_streak(app):
+    today = date(2026, 10, 17)
+    with app.app_context():
+        stats.record_sessions([_session(today - timedelta(days=days), 5) for days in (1, 2, 3, 5)])
+        stats.record_sessions([_session(today - timedelta(days=days), 5, user_id='v') for days in (0, 1)])
+        db.session.commit()
+        # Bugün henüz okunmadıysa seri dünden sayılır; boşlukta biter
+        assert stats.reading_streak('a', 'u', today) == 3
+        assert stats.reading_streak('a', 'v', today) == 2
+        # Dün de okunmadıysa seri kopmuştur
+        assert stats.reading_streak('a', 'u', today + timedelta(days=2)) == 0
+        # Geçmiş bir günden bakınca sonraki okumalar sayılmaz
+        assert stats.reading_streak('a', 'u', today - timedelta(days=3)) == 1
+        assert stats.reading_streak('a', 'u', today - timedelta(days=4)) == 1
+        assert stats.reading_streak('a', 'w', today) == 0
+
+
+def test_increments_feed_stats_in_the_same_transaction(app, client):
+    book = client.post(f'{URL}/books', json={'title': 'Sinekli Bakkal', 'totalPages': 300}).get_json()
+    for pages in (10, 15, 0):
+        client.post(f"{URL}/books/{book['id']}/pages", json={'pages': pages})
+    # Geçersiz artırım oturum yazmaz
+    client.post(f"{URL}/books/{book['id']}/pages", json={'pages': -3})
+
+    today = utcnow().date()
+    body = client.get(f'{URL}/stats', query_string={'weeks': 2}).get_json()
+    assert body['today'] == {'day': today.isoformat(), 'pages': 25}
+    # Sıfır sayfalık artırım oturum sayılmaz
+    assert body['daily'] == [{'day': today.isoformat(), 'pages': 25, 'sessions': 2}]
+    assert body['streak'] == 1
+    assert [week['pages'] for week in body['weekly']] == [0, 25]
+    with app.app_context():
+        assert db.session.scalar(select(MonthlyUserStats.pages)) == 25
@@ -0,0 +1,40 @@
+from sqlalchemy import func, select
+
+from kitaptakip import changes
+from kitaptakip.extensions import db
+from kitaptakip.models import BookChange
+
+URL = '/apps/a/users/u/books'
+NDJSON = 'application/x-ndjson'
+
+
+def _import(client, body, mimetype=NDJSON):
+    return client.post(f'{URL}:import', data=body.encode(), content_type=mimetype).get_json()
+
+
+def test_import_clamps_last_page_and_emits_one_reset(make_app):
+    app = make_app(IMPORT_CHUNK_SIZE=2)
+    client = app.test_client()
+    body = ''.join(
+        f'{{"title": "Kitap {i}", "totalPages": 100, "pagesRead": 150, "lastPageRead": 150}}\n'
+        for i in range(5)
+    ) + '{"title": ""}\n'
+    result = _import(client, body)
+    assert (result['imported'], result['rejected']) == (5, 1)
+    books = client.get(URL).get_json()['books']
+    assert {(book['pagesRead'], book['lastPageRead']) for book in books} == {(150, 100)}
+    with app.app_context():
+        # Üç parça, tek RESET
+        resets = db.session.scalar(
+            select(func.count()).select_from(BookChange).where(BookChange.op == changes.RESET)
+        )
+    assert resets == 1
+
+
+def test_export_skips_deleted_books(client):
+    kept = client.post(URL, json={'title': 'Kalan', 'totalPages': 10}).get_json()
+    gone = client.post(URL, json={'title': 'Silinen', 'totalPages': 10}).get_json()
+    client.delete(f"{URL}/{gone['id']}")
+    lines = client.get(f'{URL}:export', headers={'Accept': NDJSON}).get_data(as_text=True).splitlines()
+    assert [line for line in lines if gone['id'] in line] == []
+    assert len([line for line in lines if kept['id'] in line]) == 1
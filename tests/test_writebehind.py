@@ -0,0 +1,116 @@
+import json
+import threading
+
+import pytest
+
+from kitaptakip import books, writebehind
+
+APP_ID = 'a'
+
+
+@pytest.fixture
+def buffered_app(make_app, tmp_path):
+    # Pencere uzun: boşaltmayı test kendisi tetikler
+    return make_app(WRITE_BEHIND_ENABLED=True, WRITE_BEHIND_WINDOW=60, SUMMARY_CACHE_ENABLED=False,
+                    WRITE_BEHIND_JOURNAL_DIR=str(tmp_path / 'journal'))
+
+
+def _book(client, user_id):
+    url = f'/apps/{APP_ID}/users/{user_id}/books'
+    return url, client.post(url, json={'title': 'Kitap', 'totalPages': 1000}).get_json()['id']
+
+
+def _pages(client, url, book_id):
+    return client.get(f'{url}/{book_id}').get_json()['pagesRead']
+
+
+def test_flush_io_does_not_block_other_users(buffered_app, monkeypatch):
+    client = buffered_app.test_client()
+    buffer = buffered_app.extensions['write_behind']
+    slow_url, slow_book = _book(client, 'yavas')
+    url, book = _book(client, 'hizli')
+    client.post(f'{slow_url}/{slow_book}/pages', json={'pages': 3})
+
+    entered = threading.Event()
+    release = threading.Event()
+    apply = writebehind._apply
+
+    def blocking_apply(journal, app_id, user_id, entries):
+        if user_id == 'yavas':
+            entered.set()
+            assert release.wait(5)
+        return apply(journal, app_id, user_id, entries)
+
+    monkeypatch.setattr(writebehind, '_apply', blocking_apply)
+    flusher = threading.Thread(target=buffer.flush)
+    flusher.start()
+    try:
+        assert entered.wait(5)
+        # Başka kullanıcının artırımı ve okuması süren boşaltmayı beklemez
+        assert client.post(f'{url}/{book}/pages', json={'pages': 2}).get_json()['pagesRead'] == 2
+        assert _pages(client, url, book) == 2
+        # Boşaltılmakta olan artırım da bekleyen sayılır
+        assert buffer.stats()['pending'] == 2
+    finally:
+        release.set()
+        flusher.join()
+    # Boşaltılan artırım ne kaybolur ne de iki kez sayılır
+    assert _pages(client, slow_url, slow_book) == 3
+    assert client.get(f'/apps/{APP_ID}/users/yavas/summary').get_json()['pagesRead'] == 3
+
+
+def test_read_racing_a_flush_is_exact(buffered_app):
+    client = buffered_app.test_client()
+    buffer = buffered_app.extensions['write_behind']
+    url, book = _book(client, 'u')
+    with buffered_app.app_context():
+        # Okuma kuşağı alındıktan sonra boşaltma commit edilir
+        generation = writebehind.generation(APP_ID, 'u')
+        client.post(f'{url}/{book}/pages', json={'pages': 5})
+        found = [books.get_book(APP_ID, 'u', book)]
+        buffer.flush()
+        writebehind.apply_pending(APP_ID, 'u', found, generation)
+        assert found[0].pages_read == 5
+    assert _pages(client, url, book) == 5
+
+
+def test_orphaned_journal_is_replayed(buffered_app, tmp_path):
+    client = buffered_app.test_client()
+    buffer = buffered_app.extensions['write_behind']
+    url, book = _book(client, 'u')
+    # Ölmüş bir worker'dan kalan, kilitsiz günlük
+    (tmp_path / 'journal').mkdir(exist_ok=True)
+    lines = [
+        {'seq': seq, 'app': APP_ID, 'user': 'u', 'book': book, 'pages': 4, 'at': '2026-01-01T10:00:00'}
+        for seq in (1, 2)
+    ]
+    (tmp_path / 'journal' / f'olu{writebehind.SUFFIX}').write_text(
+        ''.join(json.dumps(line) + '\n' for line in lines) + '{"yarım'
+    )
+    buffer.replay()
+    assert _pages(client, url, book) == 8
+    assert not (tmp_path / 'journal' / f'olu{writebehind.SUFFIX}').exists()
+    assert buffer.replayed == 2
+
+
+def test_other_workers_see_increments_after_flush(make_app, tmp_path):
+    # Aynı veritabanı ve günlük dizinini paylaşan iki worker
+    config = dict(WRITE_BEHIND_ENABLED=True, WRITE_BEHIND_WINDOW=60, SUMMARY_CACHE_ENABLED=False,
+                  WRITE_BEHIND_JOURNAL_DIR=str(tmp_path / 'journal'))
+    owner, other = make_app(**config), make_app(**config)
+    client, other_client = owner.test_client(), other.test_client()
+    url, book = _book(client, 'u')
+    assert client.post(f'{url}/{book}/pages', json={'pages': 5}).get_json()['pagesRead'] == 5
+
+    # Okuma-kendi-yazması yalnızca tamponlayan worker'da: diğeri boşaltmayı bekler
+    assert _pages(client, url, book) == 5
+    assert _pages(other_client, url, book) == 0
+    assert other_client.get(f'/apps/{APP_ID}/users/u/summary').get_json()['pagesRead'] == 0
+
+    owner.extensions['write_behind'].flush()
+    assert _pages(other_client, url, book) == 5
+    assert other_client.get(f'/apps/{APP_ID}/users/u/summary').get_json()['pagesRead'] == 5
+    # Diğer worker'daki artırım boşaltılmış değerin üzerine eklenir
+    assert other_client.post(f'{url}/{book}/pages', json={'pages': 2}).get_json()['pagesRead'] == 7
+    other.extensions['write_behind'].flush()
+    assert _pages(client, url, book) == 7
@@ -0,0 +1,5 @@
+from kitaptakip import create_app, startup
+
+app = create_app()
+# preload_app açıksa gunicorn ana sürecinde bir kez çalışır; worker'lar fork ile devralır
+startup.warm_up(app)